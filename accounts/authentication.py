@@ -0,0 +1,185 @@
+"""
+CACHED JWT AUTHENTICATION (REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"]):
+
+simplejwt's JWTAuthentication SELECTs the user on every request. Here the
+user id comes from the token and the row from a cache:
+
+    - AUTH_USER_CACHE["ALIAS"] set:   that Django cache ("auth" in
+                                      settings; Redis in production)
+    - AUTH_USER_CACHE["ALIAS"] empty: a bounded LRU inside each process
+
+Entries expire after TIMEOUT seconds (5 by default) and are dropped on User
+post_save / post_delete (accounts/signals.py). Through a shared cache that
+drop reaches every process, so a deactivation, demotion or password change
+applies on the next request everywhere.
+
+With a per-process cache (the LRU, or a LocMemCache "auth") it only reaches
+the process that saved the user. Tokens carry is_staff / is_superuser
+claims (ClaimsTokenObtainPairSerializer), and a cached row that disagrees
+with them is re-read, which catches promotions; the database row always
+wins over the claims. Demotions, deactivations and password changes made
+elsewhere are still trusted from the stale row for up to TIMEOUT seconds.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "ALIAS": "",
+    "MAX_SIZE": 10000,
+    "TIMEOUT": 5,
+}
+
+CLAIM_FIELDS = ("is_staff", "is_superuser")
+
+
+def user_cache_settings():
+    return {**DEFAULTS, **getattr(settings, "AUTH_USER_CACHE", {})}
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping with per-entry expiry."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class UserCache:
+    def __init__(self):
+        self.local = LRUCache(DEFAULTS["MAX_SIZE"])
+
+    def backend(self):
+        conf = user_cache_settings()
+        if conf["ALIAS"]:
+            return caches[conf["ALIAS"]]
+        self.local.max_size = conf["MAX_SIZE"]
+        return self.local
+
+    def key(self, user_id):
+        return f"authuser:{user_id}"
+
+    def get(self, user_id):
+        user = self.backend().get(self.key(user_id))
+        # Callers may mutate request.user; never hand out the cached object
+        return copy.copy(user) if user is not None else None
+
+    def set(self, user_id, user):
+        self.backend().set(self.key(user_id), copy.copy(user), user_cache_settings()["TIMEOUT"])
+
+    def delete(self, user_id):
+        self.backend().delete(self.key(user_id))
+
+
+user_cache = UserCache()
+
+
+def add_user_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            # Miss, or a stale entry: read the row (and run simplejwt's checks)
+            user = super().get_user(validated_token)
+            if user_cache_settings()["ENABLED"]:
+                user_cache.set(self.get_user_id(validated_token), user)
+        return user
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; only a cache miss hits the database."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = await sync_to_async(self.get_user)(validated_token)
+        return user, validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+    def get_cached_user(self, validated_token):
+        """The cached, checked user row, or None if it has to be read."""
+        if not user_cache_settings()["ENABLED"]:
+            return None
+
+        user = user_cache.get(self.get_user_id(validated_token))
+        if user is None or not self.matches_claims(user, validated_token):
+            return None
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+    def matches_claims(self, user, validated_token):
+        # Tokens issued before the claims existed carry none of them
+        return all(
+            validated_token.get(field, getattr(user, field)) == getattr(user, field)
+            for field in CLAIM_FIELDS
+        )
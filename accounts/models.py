@@ -10,6 +10,8 @@ class Profile(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     address = models.CharField(max_length=255, blank=True)
     profile_photo = models.ImageField(upload_to=profile_photo_path, blank=True, null=True)
+    # thumb / card / full copies of `profile_photo` (core/images.py)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
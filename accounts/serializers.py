@@ -1,8 +1,31 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from core.images import rendition_urls
+from .authentication import add_user_claims
 from .models import Profile
 
 class ProfileSerializer(serializers.ModelSerializer):
+    # {"thumb": {"webp": url, "jpeg": url}, "card": ..., "full": ...}
+    photo_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
         fields = "__all__"
         read_only_fields = ['user']
+
+    def get_photo_renditions(self, obj):
+        return rendition_urls(
+            obj.photo_renditions,
+            obj.profile_photo.name,
+            obj.profile_photo.storage,
+            self.context.get("request"),
+        )
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds is_staff / is_superuser claims (see accounts/authentication.py)."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from core.images import needs_renditions
+from core.jobs import enqueue
+from .authentication import user_cache
 from .models import Profile
+from . import tasks  # noqa: F401  (registers job handlers)
 
 User = get_user_model()
 
@@ -16,3 +20,23 @@ def save_user_profile(sender, instance, **kwargs):
     """Save the related Profile if it exists (safe: won't crash if missing)."""
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Drop the row cached by CachedJWTAuthentication."""
+    user_cache.delete(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def schedule_photo_renditions(sender, instance, **kwargs):
+    """Build thumb / card / full copies of a new photo in the background."""
+    if not needs_renditions(instance.profile_photo, instance.photo_renditions):
+        return
+
+    photo = instance.profile_photo
+    enqueue(
+        "accounts.profile_photo_renditions",
+        {"profile_id": instance.pk},
+        key=f"renditions:profile:{instance.pk}:{photo.name}" if photo else None,
+    )
@@ -0,0 +1,13 @@
+"""
+JOB HANDLERS (enqueued from accounts/signals.py, run by `manage.py runworker`)
+"""
+
+from core.images import refresh_renditions
+from core.jobs import job
+
+from .models import Profile
+
+
+@job("accounts.profile_photo_renditions")
+def profile_photo_renditions(profile_id):
+    refresh_renditions(Profile, profile_id, "profile_photo", "photo_renditions")
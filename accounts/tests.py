@@ -1,3 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, add_user_claims, user_cache
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="pw")
+        self.token = add_user_claims(AccessToken.for_user(self.user), self.user)
+        user_cache.delete(self.user.pk)
+        self.auth = CachedJWTAuthentication()
+
+    def test_second_request_skips_the_user_select(self):
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+        self.assertEqual(user, self.user)
+
+    def test_saving_the_user_drops_the_cached_row(self):
+        self.auth.get_user(self.token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.auth.get_user(self.token)
+
+    def test_rows_are_shared_and_dropped_through_the_auth_cache(self):
+        self.auth.get_user(self.token)
+        key = user_cache.key(self.user.pk)
+        self.assertEqual(caches["auth"].get(key), self.user)
+
+        self.user.is_active = False
+        self.user.save()
+
+        # Every process reading this cache misses and re-checks the row
+        self.assertIsNone(caches["auth"].get(key))
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.auth.get_user(self.token)
+
+    def test_stale_entry_is_reread_when_claims_disagree(self):
+        self.auth.get_user(self.token)
+        # Promoted elsewhere without this process seeing post_save
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.user.is_staff = True
+        staff_token = add_user_claims(AccessToken.for_user(self.user), self.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.auth.get_user(staff_token).is_staff)
+
+    def test_obtained_tokens_carry_staff_claims(self):
+        response = self.client.post(
+            "/api/auth/token/", {"username": "reader", "password": "pw"}
+        )
+
+        access = AccessToken(response.json()["access"])
+        self.assertIs(access["is_staff"], False)
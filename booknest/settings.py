@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # third-party
     "rest_framework",
@@ -54,11 +55,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -99,11 +102,35 @@ DATABASES = {
     }
 }
 
+# Connection reuse (core/dbpool.py). DB_CONNECTION_MODE:
+#   off        - connect per request
+#   persistent - keep each thread's connection for DB_CONN_MAX_AGE seconds
+#                (WSGI; under ASGI prefer off or pool)
+#   pool       - psycopg 3 pool (needs `pip install "psycopg[binary,pool]"`
+#                in place of psycopg2-binary)
+DB_CONNECTION_MODE = os.getenv("DB_CONNECTION_MODE", "persistent")
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+DATABASES["default"]["OPTIONS"] = {}
+if DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+elif DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        # seconds a request may wait for a free connection
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+# psycopg 3 only: prepare a query server-side after it ran N times on a
+# connection. Leave unset behind PgBouncer in transaction mode.
+if os.getenv("DB_PREPARE_THRESHOLD"):
+    DATABASES["default"]["OPTIONS"]["prepare_threshold"] = int(os.getenv("DB_PREPARE_THRESHOLD"))
+
 
 # Django REST framework + JWT
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # simplejwt's JWTAuthentication with a cached user row
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -113,7 +140,8 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # ?page=N (default) or ?pagination=cursor for keyset feeds, see core/pagination.py
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.FeedPagination",
     "PAGE_SIZE": 10,
 
     "DEFAULT_FILTER_BACKENDS": [
@@ -127,9 +155,181 @@ from datetime import timedelta
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
+    # Adds is_staff / is_superuser claims (accounts/authentication.py)
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ClaimsTokenObtainPairSerializer",
     # tweak as needed
 }
 
+# User rows cached by CachedJWTAuthentication, in CACHES["auth"] (shared
+# between processes once that is Redis). ALIAS empty = per-process LRU:
+# demotions / deactivations / password changes saved by another process
+# then take up to TIMEOUT seconds to apply here.
+AUTH_USER_CACHE = {
+    "ENABLED": os.getenv("AUTH_USER_CACHE_ENABLED", "True") == "True",
+    "ALIAS": os.getenv("AUTH_USER_CACHE_ALIAS", "auth"),
+    "MAX_SIZE": 10000,
+    "TIMEOUT": int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "5")),
+}
+
+# Book search (core/search.py)
+# BACKEND: "auto" | "trigram" | "legacy" | "simple"
+BOOK_SEARCH = {
+    "BACKEND": os.getenv("BOOK_SEARCH_BACKEND", "auto"),
+    "WEIGHTS": {"title": 1.0, "author": 1.0, "description": 1.0},
+    "MIN_SIMILARITY": 0.1,
+    "CANDIDATE_LIMIT": 500,
+    # pg_trgm thresholds for the index-backed candidate phase
+    "CANDIDATE_THRESHOLDS": {"similarity": 0.3, "word_similarity": 0.6},
+    # ?search= via the search_vector column on Postgres (core/search.py)
+    "FULL_TEXT": os.getenv("BOOK_SEARCH_FULL_TEXT", "auto"),
+    "FTS_WEIGHTS": {"title": 1.0, "author": 0.4, "description": 0.2, "other": 0.1},
+}
+
+# Rows per bulk_create when fanning out notifications (core/notifications.py)
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "1000"))
+
+# Background jobs (core/jobs.py), processed by `manage.py runworker`
+JOBS = {
+    # Run jobs in-process right after commit (local dev without a worker)
+    "ALWAYS_EAGER": os.getenv("JOBS_ALWAYS_EAGER", "False") == "True",
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 2,
+    "BACKOFF_MAX": 3600,
+    "VISIBILITY_TIMEOUT": 600,
+    "BATCH_SIZE": 10,
+}
+
+# Caches
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Public catalogue responses (core/cache.py). Swap the backend for
+    # django.core.cache.backends.filebased.FileBasedCache or
+    # django.core.cache.backends.redis.RedisCache in production.
+    "catalogue": {
+        "BACKEND": os.getenv(
+            "CATALOGUE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CATALOGUE_CACHE_LOCATION", "booknest-catalogue"),
+    },
+    # User rows for CachedJWTAuthentication (accounts/authentication.py).
+    # Use RedisCache in production so a user's save reaches every process.
+    "auth": {
+        "BACKEND": os.getenv(
+            "AUTH_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("AUTH_CACHE_LOCATION", "booknest-auth"),
+    },
+}
+
+RESPONSE_CACHE = {
+    "ALIAS": "catalogue",
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),
+    "ENABLED": os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True",
+}
+
+# Request metrics (core/metrics.py, GET /api/metrics/)
+REQUEST_METRICS = {
+    "ENABLED": os.getenv("REQUEST_METRICS_ENABLED", "True") == "True",
+    "SERVER_TIMING": True,
+    "WINDOW_SECONDS": 300,
+    # Lets a scraper read /api/metrics/ with an X-Metrics-Token header
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+    "QUERY_COUNT_WARNING": 50,
+    # Fraction of requests run under cProfile; dumped only when slower
+    # than SLOW_REQUEST_MS
+    "PROFILE_SAMPLE_RATE": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    "SLOW_REQUEST_MS": int(os.getenv("SLOW_REQUEST_MS", "1000")),
+    "PROFILE_DIR": BASE_DIR / "profiles",
+}
+
+# Async read endpoints (core/async_views.py). Only worth enabling when
+# served by an ASGI server (booknest/asgi.py).
+ASYNC_READS = {
+    "ENABLED": os.getenv("ASYNC_READS", "False") == "True",
+    "LONG_POLL_MAX_WAIT": 30,
+    "LONG_POLL_INTERVAL": 1.0,
+}
+
+# Live notifications over Server-Sent Events (core/streams.py). Served by
+# booknest/asgi.py; the "postgres" bus uses LISTEN/NOTIFY, "local" is
+# in-process only.
+NOTIFICATION_STREAM = {
+    "BACKEND": os.getenv("NOTIFICATION_STREAM_BACKEND") or None,
+    "KEEPALIVE": int(os.getenv("NOTIFICATION_STREAM_KEEPALIVE", "20")),
+    "REPLAY_LIMIT": 100,
+}
+
+# Read-only .values() serializers for list actions (core/values_serializers.py)
+FAST_LIST = {
+    "ENABLED": os.getenv("FAST_LIST_ENABLED", "True") == "True",
+}
+
+# Read replicas (core/routers.py). DB_REPLICAS="host[:port][/name],..." adds
+# aliases replica1, replica2, ... sharing the primary's credentials.
+for index, spec in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1):
+    host, _, name = spec.strip().partition("/")
+    host, _, port = host.partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+        # Tests read the primary's test database through this alias
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+REPLICA_ROUTING = {
+    "REPLICAS": [alias for alias in DATABASES if alias != "default"],
+    "APPS": ["core", "accounts", "auth"],
+    # How long a user reads from the primary after writing
+    "STICKY_SECONDS": int(os.getenv("REPLICA_STICKY_SECONDS", "5")),
+    "CACHE_ALIAS": "default",
+}
+
+# "Readers also liked" (core/recommendations.py). Weights stay at their
+# defaults unless RECOMMENDATIONS["WEIGHTS"] is set here.
+RECOMMENDATIONS = {
+    "TOP_K": int(os.getenv("RECOMMENDATIONS_TOP_K", "20")),
+    "MIN_COMMON_READERS": int(os.getenv("RECOMMENDATIONS_MIN_COMMON_READERS", "1")),
+    "MAX_BOOKS_PER_READER": int(os.getenv("RECOMMENDATIONS_MAX_BOOKS_PER_READER", "500")),
+    # Seconds between incremental refreshes after wishlist / feedback / request changes
+    "REFRESH_DELAY": int(os.getenv("RECOMMENDATIONS_REFRESH_DELAY", "60")),
+}
+
+# Multi-way exchange matching (core/exchanges.py)
+EXCHANGES = {
+    # 2 = pairwise swaps only, 3 = also A -> B -> C -> A rings
+    "MAX_CYCLE_SIZE": int(os.getenv("EXCHANGES_MAX_CYCLE_SIZE", "3")),
+    "MAX_CYCLES_PER_USER": int(os.getenv("EXCHANGES_MAX_CYCLES_PER_USER", "20")),
+    # Seconds between incremental match runs after wishlist / book changes
+    "MATCH_DELAY": int(os.getenv("EXCHANGES_MATCH_DELAY", "60")),
+}
+
+# POST /api/bookrequests/bulk-status/ (core/transitions.py)
+BULK_REQUEST_STATUS = {
+    "MAX_TRANSITIONS": int(os.getenv("BULK_REQUEST_STATUS_MAX", "200")),
+}
+
+# Periodic jobs enqueued by `manage.py run_scheduler` (core/scheduler.py)
+SCHEDULER = {
+    # job name -> interval in seconds
+    "JOBS": {
+        "core.sweep_overdue_rentals": int(os.getenv("OVERDUE_SWEEP_INTERVAL", "3600")),
+    },
+    "TICK": 30,
+}
+
+# Overdue rental reminders (core/overdue.py)
+OVERDUE_RENTALS = {
+    "BATCH_SIZE": 500,
+    "GRACE_HOURS": int(os.getenv("OVERDUE_GRACE_HOURS", "0")),
+    "MAX_BATCHES": 100,
+}
+
 # Static & media
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -18,11 +18,12 @@ from accounts.views import register_user
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
-from core.views import AnnouncementViewSet, BookRequestViewSet, BookViewSet, FeedbackViewSet, ReportViewSet, TransactionViewSet, WishlistViewSet
+from core.views import AnnouncementViewSet, BookRequestViewSet, BookViewSet, FeedbackViewSet, NotificationViewSet, ReportViewSet, TransactionViewSet, WishlistViewSet, badges, exchange_suggestions, metrics
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
 from accounts.views import ProfileViewSet
+from core.streams import notification_stream
 
 # Create router FIRST
 router = routers.DefaultRouter()
@@ -36,13 +37,24 @@ router.register(r'feedback', FeedbackViewSet, basename='feedback')
 router.register(r'reports', ReportViewSet, basename='reports')
 router.register(r'announcements', AnnouncementViewSet, basename='announcements')
 router.register(r'bookrequests', BookRequestViewSet, basename='bookrequests')
+router.register(r'notifications', NotificationViewSet, basename='notifications')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Server-Sent Events, ahead of the router's notifications/<pk>/ route
+    path('api/notifications/stream/', notification_stream, name='notification-stream'),
     path('api/', include(router.urls)),
+    path('api/badges/', badges, name='badges'),
+    path('api/exchanges/suggestions/', exchange_suggestions, name='exchange-suggestions'),
+    path('api/metrics/', metrics, name='metrics'),
     # AUTH
     path("api/auth/register/", register_user, name="register"),
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+# Native async GETs for the hot read endpoints, for ASGI deployments
+# (core/async_views.py). Must come before the router's routes.
+if settings.ASYNC_READS["ENABLED"]:
+    urlpatterns.insert(1, path('api/', include('core.async_urls')))
+
@@ -4,6 +4,7 @@ from .models import (
     Book,
     BookRequest,
     Feedback,
+    Job,
     Report,
     Transaction,
     Wishlist,
@@ -91,3 +92,14 @@ class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ("title", "is_active", "created_by", "created_at")
     list_filter = ("is_active",)
     search_fields = ("title", "message")
+
+
+# -------------------------
+# Background Job Admin
+# -------------------------
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "updated_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "idempotency_key")
+    readonly_fields = ("last_error", "locked_by", "locked_at")
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import async_views
+
+
+# Mounted under api/ ahead of the router when ASYNC_READS["ENABLED"]
+# (booknest/urls.py); see core/async_views.py
+urlpatterns = [
+    path("books/", async_views.book_list_view),
+    path("books/fuzzy-search/", async_views.book_fuzzy_search_view),
+    path("books/<int:pk>/", async_views.book_detail_view),
+    path("bookrequests/my/", async_views.my_requests_view),
+    path("transactions/my/", async_views.my_transactions_view),
+    path("notifications/", async_views.notification_list_view),
+]
@@ -0,0 +1,261 @@
+"""
+ASYNC READ PATH (core/async_urls.py, enabled with ASYNC_READS["ENABLED"]):
+
+Under ASGI every sync DRF view runs in a worker thread. For the hot read
+endpoints the JSON GETs are served here instead, natively async:
+
+    GET /api/books/, /api/books/<pk>/, /api/books/fuzzy-search/
+    GET /api/bookrequests/my/, /api/transactions/my/, /api/notifications/
+
+Authentication, filtering, permissions and serializers are the ViewSet's
+own; only the queries (COUNT, page fetch, object lookup) go through the
+async ORM. Everything else (writes, the browsable API, anonymous requests
+served from the response cache) is handed to the sync ViewSet unchanged.
+
+GET /api/notifications/?since=<id>&wait=<seconds> long-polls: it returns
+as soon as a newer notification exists, sleeping between checks without
+holding a thread.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import models
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .models import Book, BookRequest, Transaction
+from .search import get_search_backend
+from .serializers import BookRequestSerializer, TransactionSerializer
+from .views import BookViewSet, BookRequestViewSet, NotificationViewSet, TransactionViewSet
+
+
+DEFAULTS = {
+    "ENABLED": False,
+    "LONG_POLL_MAX_WAIT": 30,
+    "LONG_POLL_INTERVAL": 1.0,
+}
+
+
+def async_settings():
+    return {**DEFAULTS, **getattr(settings, "ASYNC_READS", {})}
+
+
+authenticator = CachedJWTAuthentication()
+renderer = JSONRenderer()
+
+
+def wants_json(request):
+    fmt = request.GET.get("format")
+    if fmt:
+        return fmt == "json"
+    return "text/html" not in request.META.get("HTTP_ACCEPT", "")
+
+
+def render(response, request, view=None):
+    """Render a DRF Response the way finalize_response + JSONRenderer would."""
+    content = renderer.render(
+        response.data,
+        renderer.media_type,
+        {"request": request, "response": response, "view": view},
+    )
+    rendered = HttpResponse(
+        content, status=response.status_code, content_type="application/json"
+    )
+    for header, value in response.items():
+        if header.lower() != "content-type":
+            rendered[header] = value
+    patch_vary_headers(rendered, ["Accept", "Authorization"])
+    return rendered
+
+
+def async_read(viewset, actions, handler, basename, detail=False):
+    """
+    View for one ViewSet route: JSON GETs go to the async `handler`,
+    everything else to the sync ViewSet view.
+    """
+    action = actions["get"]
+    # What the router would pass, including @action(...) options
+    initkwargs = {"basename": basename, "detail": detail}
+    initkwargs.update(getattr(getattr(viewset, action), "kwargs", {}))
+    sync_view = sync_to_async(viewset.as_view(actions, **initkwargs))
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method != "GET" or not wants_json(request):
+            return await sync_view(request, *args, **kwargs)
+
+        drf_request = Request(request, authenticators=(authenticator,))
+        instance = viewset(**initkwargs)
+        instance.action_map = actions
+        instance.action = action
+        instance.request = drf_request
+        instance.args, instance.kwargs = args, kwargs
+        instance.format_kwarg = None
+        instance.headers = {}
+
+        try:
+            auth = await authenticator.aauthenticate(request)
+            # What Request._authenticate() would set, without running it
+            drf_request._authenticator = authenticator if auth else None
+            drf_request.user, drf_request.auth = auth or (AnonymousUser(), None)
+
+            # The response cache (core/cache.py) lives on the sync path
+            cacheable = getattr(instance, "is_cacheable", None)
+            if cacheable and cacheable(drf_request):
+                return await sync_view(request, *args, **kwargs)
+
+            instance.check_permissions(drf_request)
+            response = await handler(instance, drf_request, *args, **kwargs)
+        except (APIException, Http404) as exc:
+            response = handle_exception(exc, instance, drf_request)
+
+        return render(response, drf_request, instance)
+
+    view.cls = viewset
+    view.actions = actions
+    return view
+
+
+def handle_exception(exc, view, request):
+    """APIView.handle_exception() for the async handlers."""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        auth_header = authenticator.authenticate_header(request)
+        if auth_header:
+            exc.auth_header = auth_header
+        else:
+            exc.status_code = 403
+
+    response = exception_handler(exc, {"view": view, "request": request})
+    if response is None:
+        raise exc
+    response.exception = True
+    return response
+
+
+async def paginated(view, queryset, serializer_class=None, context=None):
+    """`serializer_class` / `context`: whatever the sync action serializes with."""
+    serializer_class = serializer_class or view.get_serializer_class()
+    context = view.get_serializer_context() if context is None else context
+
+    # ValuesListMixin viewsets: serialize .values() rows
+    fast = None
+    if hasattr(view, "get_values_serializer"):
+        fast = view.get_values_serializer(serializer_class, context)
+    if fast is not None:
+        queryset = fast.prepare(queryset, view.pagination_columns(queryset))
+
+    def serialize(rows):
+        if fast is not None:
+            return fast.serialize(rows)
+        return serializer_class(rows, many=True, context=context).data
+
+    paginator = view.paginator
+    if paginator is None:
+        return Response(serialize([row async for row in queryset]))
+
+    page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+    return paginator.get_paginated_response(serialize(page))
+
+
+# ------------------------------------------------------------
+# Handlers
+# ------------------------------------------------------------
+async def book_list(view, request):
+    return await paginated(view, view.filter_queryset(view.get_queryset()))
+
+
+async def book_detail(view, request, pk):
+    queryset = view.filter_queryset(view.get_queryset())
+    book = await queryset.filter(pk=pk).afirst()
+    if book is None:
+        raise Http404("No Book matches the given query.")
+    view.check_object_permissions(request, book)
+    return Response(view.get_serializer(book).data)
+
+
+async def book_fuzzy_search(view, request):
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"detail": "Missing query parameter ?q="}, status=400)
+
+    # Backends may query while building the queryset (trigram thresholds)
+    books = await sync_to_async(get_search_backend().search)(
+        Book.objects.select_related("owner"), query
+    )
+    return await paginated(view, books)
+
+
+async def my_requests(view, request):
+    user = request.user
+    queryset = (
+        BookRequest.objects.filter(models.Q(requester=user) | models.Q(book__owner=user))
+        .select_related("book", "requester", "book__owner")
+        .order_by("-created_at")
+    )
+    # The sync action serializes without a request: book_cover stays relative
+    return await paginated(view, queryset, BookRequestSerializer, context={})
+
+
+async def my_transactions(view, request):
+    user = request.user
+    queryset = (
+        Transaction.objects.filter(models.Q(owner=user) | models.Q(borrower=user))
+        .select_related("book", "owner", "borrower")
+        .order_by("-created_at")
+    )
+    return await paginated(view, queryset, TransactionSerializer, context={})
+
+
+async def notification_list(view, request):
+    queryset = view.get_queryset()
+
+    try:
+        wait = min(
+            float(request.query_params.get("wait", 0)),
+            async_settings()["LONG_POLL_MAX_WAIT"],
+        )
+    except ValueError:
+        wait = 0
+
+    if wait > 0 and "since" in request.query_params:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while not await queryset.aexists() and loop.time() < deadline:
+            await asyncio.sleep(async_settings()["LONG_POLL_INTERVAL"])
+
+    return await paginated(view, queryset)
+
+
+book_list_view = async_read(
+    BookViewSet, {"get": "list", "post": "create"}, book_list, "books"
+)
+book_detail_view = async_read(
+    BookViewSet,
+    {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"},
+    book_detail,
+    "books",
+    detail=True,
+)
+book_fuzzy_search_view = async_read(
+    BookViewSet, {"get": "fuzzy_search"}, book_fuzzy_search, "books"
+)
+my_requests_view = async_read(
+    BookRequestViewSet, {"get": "my_requests"}, my_requests, "bookrequests"
+)
+my_transactions_view = async_read(
+    TransactionViewSet, {"get": "my_transactions"}, my_transactions, "transactions"
+)
+notification_list_view = async_read(
+    NotificationViewSet, {"get": "list", "post": "create"}, notification_list, "notifications"
+)
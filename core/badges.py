@@ -0,0 +1,86 @@
+"""
+BADGE COUNTERS (GET /api/badges/):
+
+BadgeCounter holds, per user, the unread notification count and the number
+of pending requests on books the user owns, so the client's badge poll is a
+single primary-key lookup instead of two COUNT(*) queries.
+
+core/signals.py keeps them current with F() UPDATEs. Code that writes with
+bulk_create / .update() (core/notifications.py, mark-all-read) adjusts them
+itself. `manage.py reconcile_badges` recomputes them from scratch.
+"""
+
+from collections import defaultdict
+from itertools import islice
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+BADGE_FIELDS = ("unread_notifications", "pending_requests")
+
+
+def adjust_badges(counter_model, user_ids, **deltas):
+    """Apply `field=delta` to the counters of `user_ids`, creating missing rows."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids or not deltas:
+        return
+
+    updated = counter_model.objects.filter(user_id__in=user_ids).update(
+        **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+    )
+    # Missing rows count as zero, so only increments need to create them.
+    # Rows that already existed were updated above and are skipped here.
+    if updated < len(set(user_ids)) and any(delta > 0 for delta in deltas.values()):
+        counter_model.objects.bulk_create(
+            [
+                counter_model(
+                    user_id=user_id,
+                    **{field: max(delta, 0) for field, delta in deltas.items()},
+                )
+                for user_id in set(user_ids)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def adjust_badges_per_user(counter_model, field, deltas):
+    """Apply {user_id: delta} to `field`, one UPDATE per distinct delta."""
+    groups = defaultdict(list)
+    for user_id, delta in deltas.items():
+        groups[delta].append(user_id)
+    for delta, user_ids in groups.items():
+        adjust_badges(counter_model, user_ids, **{field: delta})
+
+
+def rebuild_badges(user_queryset, counter_model, notification_model, request_model,
+                   batch_size=1000):
+    """Recompute the counters of `user_queryset`. Returns the number of users."""
+    user_ids = user_queryset.order_by().values_list("pk", flat=True).iterator(chunk_size=batch_size)
+    while chunk := list(islice(user_ids, batch_size)):
+        counter_model.objects.bulk_create(
+            [counter_model(user_id=user_id) for user_id in chunk], ignore_conflicts=True
+        )
+
+    def user_total(queryset, user_field):
+        return Coalesce(
+            Subquery(
+                queryset.filter(**{user_field: OuterRef("user_id")})
+                .order_by()
+                .values(user_field)
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    return counter_model.objects.filter(user__in=user_queryset).update(
+        unread_notifications=user_total(
+            notification_model.objects.filter(is_read=False), "user"
+        ),
+        pending_requests=user_total(
+            request_model.objects.filter(status="pending"), "book__owner"
+        ),
+    )
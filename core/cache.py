@@ -0,0 +1,160 @@
+"""
+PUBLIC RESPONSE CACHE:
+
+Anonymous GETs of cached ViewSet actions (list / retrieve) are stored as
+rendered bytes in the cache alias settings.RESPONSE_CACHE["ALIAS"]
+(locmem, file based or Redis — anything in CACHES).
+
+    key = respcache:<namespace>:<version>:md5(scheme + host + path
+                                              + sorted query params + format)
+
+Bodies hold absolute URLs (pagination links, cover renditions) built from
+the request's Host, so the scheme and host are part of the key: a request
+with a forged Host only ever reads back its own entries.
+
+Every namespace ("books", "announcements") has a version token. Saving or
+deleting a related model swaps the token after commit (core/signals.py),
+so all old entries become unreachable at once and simply expire.
+
+Responses carry an ETag; a matching If-None-Match gets a 304.
+"""
+
+import hashlib
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+    "ENABLED": True,
+}
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, "RESPONSE_CACHE", {})}
+
+
+def response_cache():
+    return caches[cache_settings()["ALIAS"]]
+
+
+def _version_key(namespace):
+    return f"respcache:{namespace}:version"
+
+
+def namespace_version(namespace):
+    cache = response_cache()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), uuid4().hex, None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def invalidate(*namespaces):
+    """Drop every cached response of `namespaces`."""
+    cache = response_cache()
+    for namespace in namespaces:
+        cache.set(_version_key(namespace), uuid4().hex, None)
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag.removeprefix("W/") in [e.removeprefix("W/") for e in etags]
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching anonymous `cache_actions` under `cache_namespace`.
+    Must come before the DRF ViewSet in the bases.
+    """
+
+    cache_namespace = None
+    cache_actions = ("list", "retrieve")
+
+    def is_cacheable(self, request):
+        return (
+            cache_settings()["ENABLED"]
+            and request.method == "GET"
+            and self.action in self.cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+            if value != ""
+        )
+        raw = (
+            f"{request.scheme}://{request.get_host()}{request.path}?{urlencode(params)}"
+            f"|{request.accepted_renderer.format}"
+        )
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        version = namespace_version(self.cache_namespace)
+        return f"respcache:{self.cache_namespace}:{version}:{digest}"
+
+    def serve_cached(self, handler, request, *args, **kwargs):
+        self._response_cache_key = None
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        entry = response_cache().get(key)
+        if entry is None:
+            self._response_cache_key = key
+            return handler(request, *args, **kwargs)
+
+        if etag_matches(request, entry["etag"]):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        response["X-Cache"] = "HIT"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.serve_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.serve_cached(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ["Authorization"])
+
+        key = getattr(self, "_response_cache_key", None)
+        if not key or response.status_code != 200 or not isinstance(response, Response):
+            return response
+
+        response.render()
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response_cache().set(
+            key,
+            {
+                "content": bytes(response.content),
+                "content_type": response["Content-Type"],
+                "etag": etag,
+            },
+            cache_settings()["TIMEOUT"],
+        )
+        response["ETag"] = etag
+        response["X-Cache"] = "MISS"
+
+        if etag_matches(request, etag):
+            not_modified = HttpResponseNotModified()
+            not_modified["ETag"] = etag
+            return not_modified
+        return response
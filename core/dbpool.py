@@ -0,0 +1,79 @@
+"""
+DATABASE CONNECTIONS (settings.DB_CONNECTION_MODE, stats in /api/metrics/):
+
+    off         a new connection per request (Django's default)
+    persistent  each thread keeps its connection for CONN_MAX_AGE seconds;
+                CONN_HEALTH_CHECKS pings it before reuse after an error
+    pool        psycopg 3 ConnectionPool shared by the process's threads
+                (min_size / max_size / timeout). Needs psycopg[pool]; pooling
+                is not available with psycopg2
+
+OPTIONS["prepare_threshold"] (psycopg 3) makes psycopg prepare a statement
+server-side once it has run that many times on a connection, so the
+repeated ViewSet queries skip parse / plan. It only pays off with
+persistent or pooled connections, and must stay off behind PgBouncer in
+transaction mode.
+
+connection_stats() reports, per alias, the mode, how many connections
+this process opened, and for pools psycopg_pool's counters: size,
+available connections, waiting requests, total wait time.
+"""
+
+import threading
+from collections import defaultdict
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+_lock = threading.Lock()
+_opened = defaultdict(int)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def connection_mode(settings_dict):
+    if settings_dict.get("OPTIONS", {}).get("pool"):
+        return "pool"
+    if settings_dict.get("CONN_MAX_AGE"):
+        return "persistent"
+    return "off"
+
+
+def connection_stats():
+    stats = {}
+    for alias in connections:
+        conn = connections[alias]
+        entry = {
+            "vendor": conn.vendor,
+            "mode": connection_mode(conn.settings_dict),
+            "conn_max_age": conn.settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS", False),
+            "prepare_threshold": conn.settings_dict.get("OPTIONS", {}).get("prepare_threshold"),
+            "connections_opened": _opened[alias],
+        }
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            entry["pool"] = pool.get_stats()
+        stats[alias] = entry
+    return stats
+
+
+def as_prometheus(stats):
+    lines = [
+        "# TYPE booknest_db_connections_opened_total counter",
+    ]
+    for alias, entry in sorted(stats.items()):
+        lines.append(
+            f'booknest_db_connections_opened_total{{alias="{alias}"}} {entry["connections_opened"]}'
+        )
+    for alias, entry in sorted(stats.items()):
+        for name, value in sorted(entry.get("pool", {}).items()):
+            metric = name if name.startswith("pool_") else f"pool_{name}"
+            lines.append(f'booknest_db_{metric}{{alias="{alias}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,287 @@
+"""
+EXCHANGE CYCLES (GET /api/exchanges/suggestions/):
+
+A pairwise exchange needs two people who want each other's books. Rings
+find more: A wants B's book, B wants C's and C wants A's, so everyone
+hands one book to the person before them and gets the one they wished for.
+
+The "wants" graph has a node per user and an edge u -> v when u has
+wishlisted a book v offers for exchange (available_for="exchange"). One
+ordered query loads it into CSR arrays:
+
+    targets[offsets[i]:offsets[i + 1]]   nodes i wants from, sorted
+    books[edge]                          book behind the edge (lowest id)
+
+so "does i want from j" is a bisect, and finding the 2- and 3-cycles
+through a node costs the summed degree of its out-neighbours.
+
+Matching:
+    - `manage.py match_exchanges` finds every cycle (nightly)
+    - Wishlist changes, and books entering / leaving exchange or changing
+      owner, mark the users in StaleExchangeUser and schedule one
+      "core.match_exchanges" job per MATCH_DELAY window. A cycle can only
+      appear or break through an edge of a marked user, so the job drops
+      the cycles of those users and searches again from them only. It
+      loads only the edges such a search can use: MAX_CYCLE_SIZE - 1 hops
+      out of the marked users, plus the edges back into them, so a run
+      scales with the change rather than the catalogue.
+
+Shorter cycles are found first, and nobody is offered more than
+MAX_CYCLES_PER_USER.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .jobs import enqueue_debounced
+from .models import ExchangeCycle, ExchangeLeg, StaleExchangeUser, Wishlist
+from .notifications import chunked
+
+
+DEFAULTS = {
+    "MAX_CYCLE_SIZE": 3,  # 2 = pairwise swaps only
+    "MAX_CYCLES_PER_USER": 20,
+    "MATCH_DELAY": 60,
+}
+
+LOAD_CHUNK_SIZE = 10000
+WRITE_BATCH_SIZE = 500
+
+
+def exchange_settings():
+    return {**DEFAULTS, **getattr(settings, "EXCHANGES", {})}
+
+
+# ------------------------------------------------------------
+# Wants graph
+# ------------------------------------------------------------
+class WantsGraph:
+    def __init__(self, edges):
+        """`edges`: (wisher_id, owner_id, book_id) ordered by all three."""
+        wishers, owners, books = array("q"), array("q"), array("q")
+        last = None
+        for wisher, owner, book in edges:
+            # One edge per (wisher, owner): the first, lowest-id book
+            if (wisher, owner) != last:
+                wishers.append(wisher)
+                owners.append(owner)
+                books.append(book)
+                last = (wisher, owner)
+
+        # Node order follows user id, so the sorted edges stay sorted
+        self.users = array("q", sorted(set(wishers) | set(owners)))
+        self.index = {user_id: node for node, user_id in enumerate(self.users)}
+        self.offsets = array("q", bytes(8 * (len(self.users) + 1)))
+        for wisher in wishers:
+            self.offsets[self.index[wisher] + 1] += 1
+        for node in range(len(self.users)):
+            self.offsets[node + 1] += self.offsets[node]
+        self.targets = array("q", (self.index[owner] for owner in owners))
+        self.books = books
+
+    @staticmethod
+    def wants():
+        return (
+            Wishlist.objects.filter(book__available_for="exchange")
+            .exclude(book__owner_id=F("user_id"))
+            .values_list("user_id", "book__owner_id", "book_id")
+        )
+
+    @classmethod
+    def load(cls):
+        return cls(
+            cls.wants()
+            .order_by("user_id", "book__owner_id", "book_id")
+            .iterator(chunk_size=LOAD_CHUNK_SIZE)
+        )
+
+    @classmethod
+    def load_around(cls, user_ids, max_size):
+        """
+        The part of the graph a cycle search from `user_ids` can reach:
+        paths of up to `max_size` - 1 edges out of them, and the edges that
+        lead back into them.
+        """
+        def edges(field, ids):
+            for chunk in chunked(sorted(ids), WRITE_BATCH_SIZE):
+                yield from cls.wants().filter(**{f"{field}__in": chunk}).iterator(
+                    chunk_size=LOAD_CHUNK_SIZE
+                )
+
+        found, seen, frontier = set(), set(), set(user_ids)
+        for _ in range(max_size - 1):
+            seen |= frontier
+            reached = set()
+            for edge in edges("user_id", frontier):
+                found.add(edge)
+                reached.add(edge[1])
+            frontier = reached - seen
+        seen |= frontier
+
+        # A cycle closes with an edge back into the user it started from
+        for edge in edges("book__owner_id", user_ids):
+            if edge[0] in seen:
+                found.add(edge)
+        return cls(sorted(found))
+
+    def __len__(self):
+        return len(self.targets)
+
+    def edge(self, i, j):
+        """Position of the edge i -> j, or None."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        pos = bisect_left(self.targets, j, lo, hi)
+        return pos if pos < hi and self.targets[pos] == j else None
+
+    def cycles_from(self, i, size, lowest_first=False):
+        """
+        Yield the edge positions of every `size`-cycle (2 or 3) through
+        node i, starting with i's edge. With lowest_first, only cycles
+        where i is the lowest node, so a full scan yields each cycle once.
+        """
+        targets, offsets = self.targets, self.offsets
+        for first in range(offsets[i], offsets[i + 1]):
+            j = targets[first]
+            if lowest_first and j < i:
+                continue
+            if size == 2:
+                back = self.edge(j, i)
+                if back is not None:
+                    yield first, back
+                continue
+            for second in range(offsets[j], offsets[j + 1]):
+                k = targets[second]
+                if k == i or (lowest_first and k < i):
+                    continue
+                back = self.edge(k, i)
+                if back is not None:
+                    yield first, second, back
+
+    def legs(self, i, edges):
+        """[(giver_id, receiver_id, book_id), ...] for a cycle from node i."""
+        legs = []
+        wisher = i
+        for pos in edges:
+            owner = self.targets[pos]
+            legs.append((self.users[owner], self.users[wisher], self.books[pos]))
+            wisher = owner
+        # Rotate to start at the lowest giver, so each cycle has one key
+        start = min(range(len(legs)), key=lambda n: legs[n][0])
+        return legs[start:] + legs[:start]
+
+
+def cycle_key(legs):
+    return ",".join(f"{giver}:{book}" for giver, _, book in legs)
+
+
+def find_cycles(graph, starts=None, max_size=3, per_user=20, taken=None):
+    """
+    Cycles through the `starts` nodes (all nodes when None), shortest
+    first, as {key: legs}. `taken` counts the cycles users already have.
+    """
+    taken = defaultdict(int, taken or {})
+    lowest_first = starts is None
+    starts = range(len(graph.users)) if starts is None else starts
+    found = {}
+    for size in range(2, min(max_size, 3) + 1):
+        for i in starts:
+            if taken[graph.users[i]] >= per_user:
+                continue
+            for edges in graph.cycles_from(i, size, lowest_first):
+                legs = graph.legs(i, edges)
+                key = cycle_key(legs)
+                if key in found or any(taken[giver] >= per_user for giver, _, _ in legs):
+                    continue
+                found[key] = legs
+                for giver, _, _ in legs:
+                    taken[giver] += 1
+                if taken[graph.users[i]] >= per_user:
+                    break
+    return found
+
+
+def store(found, existing):
+    """Sync ExchangeCycle rows: `existing` {key: id} becomes `found`."""
+    stale = [pk for key, pk in existing.items() if key not in found]
+    new = [(key, legs) for key, legs in found.items() if key not in existing]
+
+    for chunk in chunked(stale, WRITE_BATCH_SIZE):
+        ExchangeCycle.objects.filter(pk__in=chunk).delete()
+    for chunk in chunked(new, WRITE_BATCH_SIZE):
+        with transaction.atomic():
+            cycles = ExchangeCycle.objects.bulk_create(
+                ExchangeCycle(key=key, size=len(legs)) for key, legs in chunk
+            )
+            ExchangeLeg.objects.bulk_create(
+                ExchangeLeg(
+                    cycle=cycle, position=position, giver_id=giver,
+                    receiver_id=receiver, book_id=book,
+                )
+                for cycle, (_, legs) in zip(cycles, chunk)
+                for position, (giver, receiver, book) in enumerate(legs)
+            )
+    return len(new), len(stale)
+
+
+# ------------------------------------------------------------
+# Full / incremental matching
+# ------------------------------------------------------------
+def match_exchanges():
+    """Find every cycle. Returns (cycles found, added, removed)."""
+    conf = exchange_settings()
+    started = timezone.now()
+    graph = WantsGraph.load()
+    found = find_cycles(graph, None, conf["MAX_CYCLE_SIZE"], conf["MAX_CYCLES_PER_USER"])
+    added, removed = store(found, dict(ExchangeCycle.objects.values_list("key", "pk")))
+    StaleExchangeUser.objects.filter(marked_at__lte=started).delete()
+    return len(found), added, removed
+
+
+def match_stale_exchanges():
+    """Search again from the users marked stale. Returns (found, added, removed)."""
+    started = timezone.now()
+    stale = list(StaleExchangeUser.objects.values_list("user_id", flat=True))
+    if not stale:
+        return 0, 0, 0
+
+    conf = exchange_settings()
+    graph = WantsGraph.load_around(stale, min(conf["MAX_CYCLE_SIZE"], 3))
+    touched = ExchangeCycle.objects.filter(legs__giver_id__in=stale)
+    existing = dict(touched.values_list("key", "pk").distinct())
+    # Cycles that stay count against their members' caps
+    taken = dict(
+        ExchangeLeg.objects.exclude(cycle__in=touched)
+        .values("giver_id")
+        .annotate(n=Count("pk"))
+        .values_list("giver_id", "n")
+    )
+    starts = sorted(graph.index[user_id] for user_id in stale if user_id in graph.index)
+    found = find_cycles(
+        graph, starts, conf["MAX_CYCLE_SIZE"], conf["MAX_CYCLES_PER_USER"], taken
+    )
+    added, removed = store(found, existing)
+
+    for chunk in chunked(stale, WRITE_BATCH_SIZE):
+        StaleExchangeUser.objects.filter(user_id__in=chunk, marked_at__lte=started).delete()
+    return len(found), added, removed
+
+
+def mark_stale(user_ids):
+    """Called from core/signals.py when a user's wants or offers change."""
+    StaleExchangeUser.objects.bulk_create(
+        [StaleExchangeUser(user_id=user_id) for user_id in set(user_ids)],
+        update_conflicts=True,
+        update_fields=["marked_at"],
+        unique_fields=["user_id"],
+    )
+    transaction.on_commit(schedule_matching)
+
+
+def schedule_matching():
+    enqueue_debounced("core.match_exchanges", exchange_settings()["MATCH_DELAY"])
@@ -0,0 +1,82 @@
+"""
+SPARSE FIELDSETS (?fields= / ?exclude= on GET):
+
+    GET /api/books/?fields=id,title,cover_renditions,owner
+    GET /api/books/42/?exclude=description
+
+- the serializer returns only the chosen fields
+  (SparseFieldsetSerializerMixin in core/serializers.py); unknown names
+  are a 400
+- the queryset loads only the columns those fields read: .values() on
+  the ValuesSerializer fast path, .only() everywhere else. Which columns a
+  SerializerMethodField reads comes from the ValuesSerializer's `computed`
+  map, so avg_rating / request_count skip rating_sum, rating_count and
+  request_count unless asked for
+- ForeignKeys followed with select_related stay loaded (Django refuses to
+  defer them), and so do the id / created_at columns the keyset cursor
+  (?pagination=cursor) reads, shown or not
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+from .values_serializers import ValuesSerializer
+
+
+def only_columns(queryset, columns):
+    """queryset.only() for the model fields behind .values()-style `columns`."""
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return queryset
+
+    model = queryset.model
+    names = {model._meta.pk.name, *(select_related or ())}
+    for column in columns:
+        name = column.split("__")[0]
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # annotation, e.g. distance_km
+            continue
+        if field.concrete:
+            names.add(name)
+    return queryset.only(*names)
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin for ?fields= / ?exclude=. Must come before
+    ValuesListMixin in the bases.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        request = self.request
+        if request is None or request.method not in SAFE_METHODS:
+            return context
+        for param in ("fields", "exclude"):
+            value = request.query_params.get(param)
+            if value:
+                names = frozenset(name.strip() for name in value.split(",") if name.strip())
+                context[f"sparse_{param}"] = names
+        return context
+
+    def load_only_needed(self, queryset, serializer_class=None, context=None):
+        context = self.get_serializer_context() if context is None else context
+        if "sparse_fields" not in context and "sparse_exclude" not in context:
+            return queryset
+        values_class = ValuesSerializer.registry.get(
+            serializer_class or self.get_serializer_class()
+        )
+        if values_class is None:
+            return queryset
+        # The keyset cursor reads created_at / id even when they aren't shown
+        columns = [*values_class(context).columns, *self.pagination_columns(queryset)]
+        return only_columns(queryset, columns)
+
+    def filter_queryset(self, queryset):
+        return self.load_only_needed(super().filter_queryset(queryset))
+
+    def list_response(self, queryset, serializer_class=None, context=None):
+        queryset = self.load_only_needed(queryset, serializer_class, context)
+        return super().list_response(queryset, serializer_class, context)
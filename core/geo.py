@@ -0,0 +1,78 @@
+"""
+"BOOKS NEAR ME" (plain SQL, no PostGIS):
+
+1. Bounding-box prefilter on the indexed (location_lat, location_lng)
+   columns — a cheap range scan that discards almost the whole table.
+2. Exact haversine distance computed only for the rows inside the box,
+   then filtered to the radius and ordered nearest first.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def bounding_boxes(lat, lng, radius_km):
+    """
+    Return [(lat_min, lat_max, lng_min, lng_max), ...] covering the circle.
+    More than one box is returned when the circle crosses the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    # Near the poles every longitude is within reach
+    cos_lat = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    if cos_lat <= 1e-9 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180:
+        return [(lat_min, lat_max, -180.0, 180.0)]
+
+    dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    lng_min, lng_max = lng - dlng, lng + dlng
+
+    if lng_min < -180:
+        return [
+            (lat_min, lat_max, -180.0, lng_max),
+            (lat_min, lat_max, lng_min + 360, 180.0),
+        ]
+    if lng_max > 180:
+        return [
+            (lat_min, lat_max, lng_min, 180.0),
+            (lat_min, lat_max, -180.0, lng_max - 360),
+        ]
+    return [(lat_min, lat_max, lng_min, lng_max)]
+
+
+def haversine_km(lat, lng, lat_field="location_lat", lng_field="location_lng"):
+    """Great-circle distance in km from (lat, lng) to the row's coordinates."""
+    row_lat = Radians(Cast(F(lat_field), FloatField()))
+    row_lng = Radians(Cast(F(lng_field), FloatField()))
+    origin_lat = math.radians(lat)
+    origin_lng = math.radians(lng)
+
+    a = Power(Sin((row_lat - Value(origin_lat)) / 2), 2) + Value(
+        math.cos(origin_lat)
+    ) * Cos(row_lat) * Power(Sin((row_lng - Value(origin_lng)) / 2), 2)
+
+    # Least() guards against a > 1 from float rounding
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def nearby(queryset, lat, lng, radius_km):
+    """Filter `queryset` to rows within `radius_km`, nearest first, with `distance_km`."""
+    box = Q()
+    for lat_min, lat_max, lng_min, lng_max in bounding_boxes(lat, lng, radius_km):
+        box |= Q(
+            location_lat__range=(lat_min, lat_max),
+            location_lng__range=(lng_min, lng_max),
+        )
+
+    return (
+        queryset.filter(box)
+        .annotate(distance_km=haversine_km(lat, lng))
+        .filter(distance_km__lte=radius_km)
+        .order_by("distance_km", "-created_at")
+    )
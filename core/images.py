@@ -0,0 +1,158 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+
+"""
+IMAGE RENDITIONS (Book.cover, Profile.profile_photo):
+
+Uploads are stored untouched; a background job (core/tasks.py,
+accounts/tasks.py) then writes fixed-size copies next to them:
+
+    renditions/<original path without extension>/<size>.<webp|jpg>
+
+Renditions are EXIF-free (orientation is applied first, then the pixels
+are re-encoded without metadata). The generated names are recorded on the
+model as {"source": <original name>, "thumb": {"webp": ..., "jpeg": ...}, ...}
+and exposed as per-size URLs by the serializers.
+
+A rebuild never touches the files in use: the new set is written under
+fresh names (the storage suffixes taken ones), swapped in with one UPDATE,
+and only then is the old set deleted. A build that fails removes what it
+wrote. Until the swap, renditions whose "source" is not the current upload
+are hidden rather than served for the previous image.
+"""
+
+
+DEFAULTS = {
+    # size -> (mode, (width, height)); "fit" crops to exactly that size,
+    # "contain" only shrinks to fit inside it
+    "SIZES": {
+        "thumb": ("fit", (150, 150)),
+        "card": ("fit", (400, 600)),
+        "full": ("contain", (1200, 1200)),
+    },
+    "FORMATS": {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")},
+    "QUALITY": 82,
+}
+
+
+def rendition_settings():
+    return {**DEFAULTS, **getattr(settings, "IMAGE_RENDITIONS", {})}
+
+
+def rendition_name(source_name, size, extension):
+    stem, _ = posixpath.splitext(source_name)
+    return posixpath.join("renditions", stem, f"{size}.{extension}")
+
+
+def resize(image, mode, box):
+    if mode == "fit":
+        return ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail(box, Image.Resampling.LANCZOS)
+    return image
+
+
+def build_renditions(field_file):
+    """
+    Render every configured size/format of `field_file` and save it to the
+    same storage. Returns the dict to store on the model.
+    """
+    conf = rendition_settings()
+    storage = field_file.storage
+
+    with field_file.open("rb") as fh:
+        image = Image.open(fh)
+        image.load()
+
+    # Apply the camera orientation before the EXIF block is dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    renditions = {"source": field_file.name}
+    try:
+        for size, (mode, box) in conf["SIZES"].items():
+            resized = resize(image, mode, box)
+            renditions[size] = {}
+            for key, (pil_format, extension) in conf["FORMATS"].items():
+                frame = resized.convert("RGB") if pil_format == "JPEG" else resized
+                buffer = BytesIO()
+                # No exif= / icc_profile= passed: the output carries no metadata
+                frame.save(buffer, pil_format, quality=conf["QUALITY"], optimize=True)
+
+                # A taken name gets a suffix: the set in use stays intact
+                name = rendition_name(field_file.name, size, extension)
+                renditions[size][key] = storage.save(name, ContentFile(buffer.getvalue()))
+    except Exception:
+        delete_renditions(renditions, storage)
+        raise
+
+    return renditions
+
+
+def delete_renditions(renditions, storage):
+    for size, files in (renditions or {}).items():
+        if size == "source":
+            continue
+        for name in files.values():
+            if storage.exists(name):
+                storage.delete(name)
+
+
+def rendition_urls(renditions, source, storage, request=None):
+    """
+    {"thumb": {"webp": url, "jpeg": url}, ...} for a serializer. `source` is
+    the current upload's name; renditions of an earlier one are left out.
+    """
+    if (source or None) != (renditions or {}).get("source"):
+        return {}
+
+    urls = {}
+    for size, files in (renditions or {}).items():
+        if size == "source":
+            continue
+        urls[size] = {}
+        for key, name in files.items():
+            url = storage.url(name)
+            urls[size][key] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def refresh_renditions(model, pk, field, target):
+    """
+    Bring `model.<target>` in line with the file in `model.<field>`.
+    Safe to run repeatedly; returns True when something changed.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return False
+
+    field_file = getattr(instance, field)
+    current = getattr(instance, target) or {}
+    if not needs_renditions(field_file, current):
+        return False
+
+    if field_file:
+        renditions = build_renditions(field_file)
+        unchanged = Q(**{field: field_file.name})
+    else:
+        renditions = {}
+        unchanged = Q(**{field: ""}) | Q(**{f"{field}__isnull": True})
+
+    # Only store them if the upload wasn't replaced while we were rendering
+    swapped = model.objects.filter(unchanged, pk=pk, **{target: current}).update(
+        **{target: renditions}
+    )
+    # Whichever set lost the swap is no longer referenced
+    delete_renditions(current if swapped else renditions, field_file.storage)
+    return bool(swapped)
+
+
+def needs_renditions(field_file, renditions):
+    return (field_file.name or None) != (renditions or {}).get("source")
@@ -0,0 +1,166 @@
+"""
+STREAMING BOOK IMPORT (POST /api/books/bulk-import/, `manage.py import_books`):
+
+Rows are read one line at a time from a CSV (header row required) or
+NDJSON stream, validated with BookSerializer's rules and written with
+bulk_create in chunks of settings.BOOK_IMPORT["BATCH_SIZE"]. Each chunk is
+its own transaction, so one bad row never discards the rest of the file.
+Only counters and the first MAX_ERRORS row errors are kept in memory;
+?batch_size= / --batch-size is capped at MAX_BATCH_SIZE to keep it so.
+Lines that aren't UTF-8 and rows the csv module can't parse are reported
+as row errors like any invalid row.
+"""
+
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .cache import invalidate
+from .models import Book
+from .notifications import chunked
+from .serializers import BookSerializer
+
+
+DEFAULTS = {
+    "BATCH_SIZE": 1000,
+    "MAX_BATCH_SIZE": 5000,
+    "MAX_ERRORS": 1000,
+}
+
+IMPORT_FIELDS = {
+    "title", "author", "description", "isbn", "genre",
+    "available_for", "location_lat", "location_lng",
+}
+
+FORMATS = ("csv", "ndjson")
+
+
+def import_settings():
+    return {**DEFAULTS, **getattr(settings, "BOOK_IMPORT", {})}
+
+
+def detect_format(content_type="", filename=""):
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    filename = (filename or "").lower()
+    if content_type in ("text/csv", "application/csv") or filename.endswith(".csv"):
+        return "csv"
+    if content_type in (
+        "application/x-ndjson", "application/ndjson", "application/jsonl",
+        "application/jsonlines",
+    ) or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def decode_lines(stream, bad_lines):
+    """
+    Text lines of a binary line iterator. Lines that aren't UTF-8 are
+    appended to `bad_lines` as (line_number, message) and read as blank.
+    """
+    for line_number, raw in enumerate(stream, start=1):
+        if line_number == 1:
+            raw = raw.removeprefix(codecs.BOM_UTF8)
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            bad_lines.append((line_number, f"Invalid UTF-8 at byte {e.start}: {e.reason}."))
+            yield "\n"
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (row_number, data, error) from a binary line iterator. Exactly
+    one of `data` / `error` is set.
+    """
+    bad_lines = []
+    lines = decode_lines(stream, bad_lines)
+
+    def decode_errors():
+        while bad_lines:
+            line_number, message = bad_lines.pop(0)
+            yield line_number, None, {"non_field_errors": [message]}
+
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                data = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # The failing line is consumed but not counted yet; the
+                # reader carries on with the next one
+                yield from decode_errors()
+                yield reader.line_num + 1, None, {"non_field_errors": [f"Invalid CSV: {e}"]}
+                continue
+            yield from decode_errors()
+            yield reader.line_num, data, None
+        yield from decode_errors()
+        return
+
+    for row_number, line in enumerate(lines, start=1):
+        yield from decode_errors()
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, {"non_field_errors": [f"Invalid JSON: {e}"]}
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, {"non_field_errors": ["Each line must be a JSON object."]}
+            continue
+        yield row_number, data, None
+    yield from decode_errors()
+
+
+def clean_row(data):
+    # Unknown / read-only columns are ignored, blanks fall back to defaults
+    return {
+        key: value
+        for key, value in data.items()
+        if key in IMPORT_FIELDS and value not in ("", None)
+    }
+
+
+def import_books(rows, owner, batch_size=None, max_errors=None):
+    """Validate and bulk insert `rows` (from iter_rows) owned by `owner`."""
+    conf = import_settings()
+    batch_size = min(batch_size or conf["BATCH_SIZE"], conf["MAX_BATCH_SIZE"])
+    max_errors = conf["MAX_ERRORS"] if max_errors is None else max_errors
+
+    result = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    validator = BookSerializer()
+
+    for batch in chunked(rows, batch_size):
+        books = []
+        for row_number, data, error in batch:
+            if error is None:
+                try:
+                    validated = validator.run_validation(clean_row(data))
+                except ValidationError as e:
+                    error = e.detail
+                else:
+                    books.append(Book(owner=owner, **validated))
+                    continue
+
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": row_number, "errors": error})
+            else:
+                result["errors_truncated"] = True
+
+        with transaction.atomic():
+            Book.objects.bulk_create(books, batch_size=batch_size)
+        result["created"] += len(books)
+
+    # bulk_create skips post_save, so drop cached catalogue pages here
+    if result["created"]:
+        transaction.on_commit(lambda: invalidate("books"))
+
+    return result
@@ -0,0 +1,192 @@
+"""
+BACKGROUND JOBS (DB-backed, no broker):
+
+    @job("core.notify_wishlist_users")
+    def notify_wishlist_users(book_id, message): ...
+
+    enqueue("core.notify_wishlist_users", {"book_id": 1, "message": "..."},
+            key="book-returned:42")
+
+- enqueue() inserts a Job row in the caller's transaction, so the job only
+  becomes visible to workers if the triggering write commits.
+- `key` is an idempotency key: enqueuing the same key twice is a no-op.
+- `manage.py runworker` claims due jobs with SELECT ... FOR UPDATE SKIP
+  LOCKED, runs them, and retries failures with exponential backoff until
+  max_attempts is reached.
+- With settings.JOBS["ALWAYS_EAGER"] jobs run in-process right after
+  commit instead (handy for local dev without a worker).
+"""
+
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS = {
+    "ALWAYS_EAGER": False,
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 2,  # seconds, doubled on every retry
+    "BACKOFF_MAX": 3600,
+    "VISIBILITY_TIMEOUT": 600,  # requeue jobs stuck in "running" this long
+    "BATCH_SIZE": 10,
+}
+
+_registry = {}
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, "JOBS", {})}
+
+
+def job(name):
+    """Register `fn` as a job handler under `name`."""
+
+    def decorator(fn):
+        if name in _registry and _registry[name] is not fn:
+            raise ValueError(f"Job {name!r} is already registered")
+        _registry[name] = fn
+        fn.job_name = name
+        return fn
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No job registered as {name!r}")
+
+
+def enqueue(name, payload=None, *, key=None, delay=0, max_attempts=None):
+    """Queue `name(**payload)`. Returns the Job (the existing one for a known key)."""
+    get_handler(name)
+    conf = job_settings()
+
+    fields = {
+        "name": name,
+        "payload": payload or {},
+        "run_at": timezone.now() + timedelta(seconds=delay),
+        "max_attempts": max_attempts or conf["MAX_ATTEMPTS"],
+    }
+
+    if key is None:
+        queued = Job.objects.create(**fields)
+    else:
+        try:
+            with transaction.atomic():
+                queued = Job.objects.create(idempotency_key=key, **fields)
+        except IntegrityError:
+            return Job.objects.get(idempotency_key=key)
+
+    if conf["ALWAYS_EAGER"]:
+        transaction.on_commit(lambda: Worker(name="eager").execute(queued))
+
+    return queued
+
+
+def enqueue_debounced(name, window):
+    """Queue `name()` at most once per `window` seconds, due at the window's end."""
+    now = time.time()
+    key = f"{name}:{int(now // window)}"
+    # The cache spares most callers the idempotency-key INSERT
+    if cache.add(f"debounce:{key}", True, window):
+        enqueue(name, key=key, delay=window - now % window)
+
+
+def backoff(attempts):
+    conf = job_settings()
+    delay = min(conf["BACKOFF_MAX"], conf["BACKOFF_BASE"] * 2 ** (attempts - 1))
+    return delay + random.uniform(0, delay / 10)
+
+
+# ------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------
+class Worker:
+    def __init__(self, name=None, batch_size=None):
+        conf = job_settings()
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size or conf["BATCH_SIZE"]
+        self.visibility_timeout = conf["VISIBILITY_TIMEOUT"]
+
+    def requeue_stale(self):
+        """Put back jobs whose worker died mid-run."""
+        cutoff = timezone.now() - timedelta(seconds=self.visibility_timeout)
+        return Job.objects.filter(status="running", locked_at__lt=cutoff).update(
+            status="queued", locked_by="", locked_at=None
+        )
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status="queued", run_at__lte=now)
+                .order_by("run_at", "pk")[: self.batch_size]
+            )
+            if jobs:
+                Job.objects.filter(pk__in=[j.pk for j in jobs]).update(
+                    status="running", locked_by=self.name, locked_at=now
+                )
+        return jobs
+
+    def execute(self, queued):
+        queued.attempts += 1
+        try:
+            with transaction.atomic():
+                get_handler(queued.name)(**queued.payload)
+        except Exception:
+            queued.last_error = traceback.format_exc()
+            if queued.attempts >= queued.max_attempts:
+                queued.status = "failed"
+                logger.error("Job %s failed permanently", queued, exc_info=True)
+            else:
+                queued.status = "queued"
+                queued.run_at = timezone.now() + timedelta(seconds=backoff(queued.attempts))
+                logger.warning("Job %s failed, retrying at %s", queued, queued.run_at)
+        else:
+            queued.status = "done"
+            queued.last_error = ""
+
+        queued.locked_by = ""
+        queued.locked_at = None
+        queued.save(
+            update_fields=[
+                "status", "attempts", "run_at", "last_error",
+                "locked_by", "locked_at", "updated_at",
+            ]
+        )
+        return queued.status == "done"
+
+    def run_once(self):
+        """Claim and run one batch. Returns the number of jobs processed."""
+        jobs = self.claim()
+        for queued in jobs:
+            self.execute(queued)
+        return len(jobs)
+
+
+def run_pending_jobs(limit=None):
+    """Drain every due job in-process (tests, `runworker --once`)."""
+    worker = Worker(name="inline")
+    processed = 0
+    while limit is None or processed < limit:
+        count = worker.run_once()
+        if not count:
+            break
+        processed += count
+    return processed
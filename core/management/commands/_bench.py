@@ -0,0 +1,25 @@
+"""Small helpers shared by the bench_* management commands."""
+
+import statistics
+import time
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_ms(fn, *args, **kwargs):
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(timings):
+    return {
+        "p50": statistics.median(timings),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+        "max": max(timings),
+    }
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from booknest import urls as project_urls
+from core import async_urls
+from core.models import Book, Notification
+
+User = get_user_model()
+
+ENDPOINTS = [
+    "/api/books/",
+    "/api/books/fuzzy-search/?q=dune",
+    "/api/bookrequests/my/",
+    "/api/transactions/my/",
+    "/api/notifications/",
+]
+
+
+class SyncURLConf:
+    urlpatterns = [
+        pattern for pattern in project_urls.urlpatterns
+        if getattr(pattern, "urlconf_name", None) is not async_urls
+    ]
+
+
+class AsyncURLConf:
+    urlpatterns = [path("api/", include("core.async_urls"))] + SyncURLConf.urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/second of the hot read endpoints through the WSGI handler, "
+        "the ASGI handler with the sync ViewSets, and the ASGI handler with "
+        "core/async_views.py, at a given concurrency. In-process (Django test "
+        "clients, no network); writes a small fixture and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--books", type=int, default=200)
+        parser.add_argument(
+            "--long-pollers",
+            type=int,
+            default=0,
+            help="Idle ?wait= notification pollers kept open during the ASGI-async run",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench_async_{time.time_ns()}")
+        try:
+            Book.objects.bulk_create(
+                Book(owner=user, title=f"Dune {i}", author="Herbert", available_for="rent")
+                for i in range(options["books"])
+            )
+            Notification.objects.create(user=user, message="bench")
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+            self.stdout.write(f"{'endpoint':<34} {'mode':<11} {'req/s':>9} {'p50 ms':>9}")
+            for endpoint in ENDPOINTS:
+                for mode, run in (
+                    ("wsgi", self.run_wsgi),
+                    ("asgi-sync", self.run_asgi_sync),
+                    ("asgi-async", self.run_asgi_async),
+                ):
+                    rate, p50 = run(endpoint, headers, options)
+                    self.stdout.write(f"{endpoint:<34} {mode:<11} {rate:>9.1f} {p50:>9.2f}")
+        finally:
+            user.delete()
+
+    # ---------------------------------------------------
+    # Drivers
+    # ---------------------------------------------------
+    def run_wsgi(self, endpoint, headers, options):
+        def worker(count):
+            client = Client(headers=headers)
+            return [self.timed(client.get, endpoint) for _ in range(count)]
+
+        concurrency, total = options["concurrency"], options["requests"]
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        with override_settings(ROOT_URLCONF=SyncURLConf):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                timings = [t for chunk in pool.map(worker, shares) for t in chunk]
+            elapsed = time.perf_counter() - started
+        return total / elapsed, sorted(timings)[len(timings) // 2]
+
+    def run_asgi_sync(self, endpoint, headers, options):
+        with override_settings(ROOT_URLCONF=SyncURLConf):
+            return asyncio.run(self.drive(endpoint, headers, options, long_pollers=0))
+
+    def run_asgi_async(self, endpoint, headers, options):
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            return asyncio.run(
+                self.drive(endpoint, headers, options, options["long_pollers"])
+            )
+
+    async def drive(self, endpoint, headers, options, long_pollers):
+        client = AsyncClient()
+        gate = asyncio.Semaphore(options["concurrency"])
+
+        async def one():
+            async with gate:
+                started = time.perf_counter()
+                await client.get(endpoint, headers=headers)
+                return (time.perf_counter() - started) * 1000
+
+        pollers = [
+            asyncio.ensure_future(
+                client.get("/api/notifications/?since=999999999&wait=30", headers=headers)
+            )
+            for _ in range(long_pollers)
+        ]
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(one() for _ in range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+        return options["requests"] / elapsed, sorted(timings)[len(timings) // 2]
+
+    @staticmethod
+    def timed(fn, *args):
+        started = time.perf_counter()
+        fn(*args)
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import add_user_claims, user_cache
+from core.metrics import RequestSample
+
+from ._bench import summary, timed_ms
+
+User = get_user_model()
+
+ENDPOINTS = [
+    "/api/books/",
+    "/api/notifications/",
+    "/api/badges/",
+    "/api/bookrequests/my/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare queries and latency per authenticated request with the "
+        "CachedJWTAuthentication user cache off and on. Runs in a rolled back "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'endpoint':<24} {'cache':>6} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+
+        with transaction.atomic():
+            user = User.objects.create_user(username="bench_auth")
+            token = add_user_claims(AccessToken.for_user(user), user)
+            client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+            for path in ENDPOINTS:
+                for enabled in (False, True):
+                    user_cache.delete(user.pk)
+                    with override_settings(AUTH_USER_CACHE={"ENABLED": enabled}):
+                        client.get(path)  # warm up (fills the cache when enabled)
+                        # Counted with a wrapper: request_started resets connection.queries
+                        queries = RequestSample()
+                        with connection.execute_wrapper(queries):
+                            client.get(path)
+                        stats = summary(
+                            [timed_ms(client.get, path) for _ in range(options["repeat"])]
+                        )
+                    self.stdout.write(
+                        f"{path:<24} {'on' if enabled else 'off':>6} {queries.queries:>8} "
+                        f"{stats['p50']:>8.2f} {stats['p95']:>8.2f}"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,84 @@
+import copy
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client, override_settings
+
+from core.dbpool import connection_stats
+
+from ._bench import summary, timed_ms
+
+MODES = {
+    "off": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 600},
+    "pool": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": 2, "max_size": 4}}},
+    "pool+prepared": {
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {"pool": {"min_size": 2, "max_size": 4}, "prepare_threshold": 2},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request latency with each DB_CONNECTION_MODE on the default database. "
+        "Requests run through the full handler, with the connection cleanup "
+        "the server does around every request. Pool modes need psycopg 3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--path", default="/api/books/")
+        parser.add_argument("--mode", action="append", dest="modes", choices=list(MODES))
+
+    @override_settings(RESPONSE_CACHE={"ENABLED": False})
+    def handle(self, *args, **options):
+        conn = connections["default"]
+        original = copy.deepcopy(conn.settings_dict)
+        client = Client()
+
+        def request():
+            # What the WSGI / ASGI handlers do on request_started / finished;
+            # the test Client skips it
+            close_old_connections()
+            client.get(options["path"])
+            close_old_connections()
+
+        self.stdout.write(
+            f"{'mode':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'connects':>9} {'wait ms':>8}"
+        )
+        for mode in options["modes"] or list(MODES):
+            if mode.startswith("pool") and not self.pool_available(conn):
+                self.stdout.write(f"{mode:<14} skipped: needs PostgreSQL with psycopg[pool]")
+                continue
+
+            conn.close()
+            conn.settings_dict.update(copy.deepcopy(original))
+            conn.settings_dict.update(copy.deepcopy(MODES[mode]))
+            request()  # warm up, opens the pool
+
+            opened = connection_stats()["default"]["connections_opened"]
+            stats = summary([timed_ms(request) for _ in range(options["repeat"])])
+            database = connection_stats()["default"]
+            wait = database.get("pool", {}).get("requests_wait_ms", "-")
+            self.stdout.write(
+                f"{mode:<14} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} "
+                f"{database['connections_opened'] - opened:>9} {wait:>8}"
+            )
+            if getattr(conn, "pool", None):
+                conn.close()
+                conn.close_pool()
+
+        conn.close()
+        conn.settings_dict.clear()
+        conn.settings_dict.update(original)
+
+    @staticmethod
+    def pool_available(conn):
+        if conn.vendor != "postgresql":
+            return False
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        return True
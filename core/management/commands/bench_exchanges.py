@@ -0,0 +1,76 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.exchanges import WantsGraph, exchange_settings, find_cycles
+
+from ._bench import summary, timed_ms
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark exchange-cycle matching (core/exchanges.py) on a synthetic "
+        "in-memory wants graph: CSR build, full 2-/3-cycle search, and "
+        "incremental searches from a few stale users. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--edges", type=int, default=1_000_000, help="Wishlist edges")
+        parser.add_argument("--books-per-user", type=int, default=5)
+        parser.add_argument(
+            "--skew", type=float, default=2.0,
+            help="Popularity skew of wanted owners (1 = uniform)",
+        )
+        parser.add_argument("--stale", type=int, default=100, help="Stale users per incremental run")
+        parser.add_argument("--runs", type=int, default=20, help="Incremental runs")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        conf = exchange_settings()
+        users = options["users"]
+
+        started = time.perf_counter()
+        graph = WantsGraph(self.edges(rng, users, options))
+        build = time.perf_counter() - started
+        self.stdout.write(
+            f"{len(graph)} wants edges between {len(graph.users)} users "
+            f"(built in {build:.2f}s)"
+        )
+
+        started = time.perf_counter()
+        found = find_cycles(graph, None, conf["MAX_CYCLE_SIZE"], conf["MAX_CYCLES_PER_USER"])
+        full = time.perf_counter() - started
+        sizes = {size: 0 for size in range(2, conf["MAX_CYCLE_SIZE"] + 1)}
+        for legs in found.values():
+            sizes[len(legs)] += 1
+        self.stdout.write(
+            f"full match: {len(found)} cycles "
+            f"({', '.join(f'{n} x {size}-way' for size, n in sizes.items())}) in {full:.2f}s"
+        )
+
+        def incremental():
+            starts = sorted(rng.sample(range(len(graph.users)), options["stale"]))
+            find_cycles(graph, starts, conf["MAX_CYCLE_SIZE"], conf["MAX_CYCLES_PER_USER"])
+
+        stats = summary([timed_ms(incremental) for _ in range(options["runs"])])
+        self.stdout.write(
+            f"incremental ({options['stale']} stale users): "
+            f"p50 {stats['p50']:.1f} ms  p95 {stats['p95']:.1f} ms  max {stats['max']:.1f} ms"
+        )
+
+    def edges(self, rng, users, options):
+        """(wisher, owner, book) sorted the way WantsGraph.load() orders them."""
+        per_wisher = options["edges"] / users
+        books_per_user = options["books_per_user"]
+        skew = options["skew"]
+        for wisher in range(users):
+            wanted = set()
+            for _ in range(rng.randint(0, int(2 * per_wisher))):
+                owner = int(users * rng.random() ** skew)
+                if owner != wisher:
+                    wanted.add((owner, owner * books_per_user + rng.randrange(books_per_user)))
+            for owner, book in sorted(wanted):
+                yield wisher, owner, book
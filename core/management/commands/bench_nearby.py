@@ -0,0 +1,106 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.geo import haversine_km, nearby
+from core.models import Book
+
+from ._bench import summary, timed_ms
+
+User = get_user_model()
+
+# (lat, lng) centres the synthetic catalogue is clustered around
+CITIES = [
+    (9.9312, 76.2673), (12.9716, 77.5946), (19.0760, 72.8777),
+    (28.6139, 77.2090), (13.0827, 80.2707), (22.5726, 88.3639),
+    (51.5074, -0.1278), (40.7128, -74.0060), (35.6762, 139.6503),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/books/nearby/ (bounding box + haversine) against a "
+        "full-table haversine scan on a synthetic catalogue. The synthetic "
+        "books are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1_000_000)
+        parser.add_argument("--radius-km", type=float, default=10)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--skip-full-scan",
+            action="store_true",
+            help="Only time the indexed query (the full scan is slow at 1M rows)",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        radius = options["radius_km"]
+        page_size = options["page_size"]
+
+        with transaction.atomic():
+            owner = User.objects.create_user(username=f"bench_nearby_{rng.random()}")
+            self.load_books(owner, options["books"], options["batch_size"], rng)
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE core_book")
+
+            origins = [
+                self.jitter(rng.choice(CITIES), rng, 0.2) for _ in range(options["queries"])
+            ]
+
+            def indexed(lat, lng):
+                return list(nearby(Book.objects.all(), lat, lng, radius)[:page_size])
+
+            def full_scan(lat, lng):
+                return list(
+                    Book.objects.annotate(distance_km=haversine_km(lat, lng))
+                    .filter(distance_km__lte=radius)
+                    .order_by("distance_km")[:page_size]
+                )
+
+            strategies = [("bbox+haversine", indexed)]
+            if not options["skip_full_scan"]:
+                strategies.append(("full scan", full_scan))
+
+            self.stdout.write(
+                f"{options['books']} books, radius {radius} km, {len(origins)} queries"
+            )
+            self.stdout.write(
+                f"{'strategy':>16} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}"
+            )
+            for name, fn in strategies:
+                stats = summary([timed_ms(fn, lat, lng) for lat, lng in origins])
+                self.stdout.write(
+                    f"{name:>16} {stats['p50']:>10.2f} {stats['p95']:>10.2f} "
+                    f"{stats['p99']:>10.2f} {stats['max']:>10.2f}"
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def jitter(point, rng, spread):
+        lat, lng = point
+        return lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread)
+
+    def load_books(self, owner, count, batch_size, rng):
+        for start in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - start)):
+                lat, lng = self.jitter(rng.choice(CITIES), rng, 1.5)
+                batch.append(
+                    Book(
+                        owner=owner,
+                        title=f"Synthetic book {start}",
+                        available_for="rent",
+                        location_lat=round(lat, 6),
+                        location_lng=round(lng, 6),
+                    )
+                )
+            Book.objects.bulk_create(batch)
@@ -0,0 +1,105 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Book
+from core.search import BACKENDS, get_search_backend
+
+from ._bench import summary, timed_ms
+
+User = get_user_model()
+
+WORDS = [
+    "shadow", "river", "empire", "garden", "silent", "winter", "history",
+    "secret", "ocean", "machine", "dragon", "kingdom", "memory", "stone",
+    "night", "house", "letters", "journey", "fire", "glass", "science",
+    "island", "forest", "crown", "storm", "mirror", "city", "light",
+]
+AUTHORS = [
+    "Ann Walker", "Ravi Menon", "Maria Costa", "John Ellis", "Mei Lin",
+    "Omar Haddad", "Sara Novak", "Liam Byrne", "Anita Rao", "Peter Holm",
+]
+QUERIES = ["shadow river", "dragn", "Menon", "silent winter", "glas city", "histroy"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark BookViewSet.fuzzy_search backends against catalogue size. "
+        "Synthetic books are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000")
+        parser.add_argument(
+            "--backends",
+            default=None,
+            help="Comma separated backend names (default: all usable on this DB)",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options["sizes"].split(","))
+        if options["backends"]:
+            backends = options["backends"].split(",")
+        elif connection.vendor == "postgresql":
+            backends = list(BACKENDS)
+        else:
+            backends = ["simple"]
+
+        rng = random.Random(options["seed"])
+
+        self.stdout.write(
+            f"{'books':>10} {'backend':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+        )
+
+        with transaction.atomic():
+            owner = User.objects.create_user(username=f"bench_search_{rng.random()}")
+            loaded = 0
+            for size in sizes:
+                self.load_books(owner, size - loaded, rng)
+                loaded = size
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE core_book")
+
+                for name in backends:
+                    stats = summary(
+                        self.run_queries(
+                            get_search_backend(name),
+                            options["repeat"],
+                            options["page_size"],
+                        )
+                    )
+                    self.stdout.write(
+                        f"{size:>10} {name:>10} "
+                        f"{stats['p50']:>10.2f} {stats['p95']:>10.2f} {stats['max']:>10.2f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def load_books(self, owner, count, rng, batch_size=5000):
+        for start in range(0, count, batch_size):
+            Book.objects.bulk_create(
+                [
+                    Book(
+                        owner=owner,
+                        title=" ".join(rng.sample(WORDS, 3)).title(),
+                        author=rng.choice(AUTHORS),
+                        description=" ".join(rng.choices(WORDS, k=40)),
+                        available_for=rng.choice(["rent", "exchange", "donate"]),
+                    )
+                    for _ in range(min(batch_size, count - start))
+                ]
+            )
+
+    def run_queries(self, backend, repeat, page_size):
+        timings = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                qs = backend.search(Book.objects.all(), query)[:page_size]
+                timings.append(timed_ms(list, qs))
+        return timings
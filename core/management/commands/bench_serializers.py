@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from core.models import Book, BookRequest
+from core.serializers import BookRequestSerializer, BookSerializer
+from core.values_serializers import values_serializer_for
+
+from ._bench import summary, timed_ms
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows/sec of the ModelSerializers against their .values() counterparts "
+        "(core/values_serializers.py), fetch + serialize. Runs in a rolled back "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        context = {"request": RequestFactory().get("/api/books/")}
+
+        self.stdout.write(f"{'serializer':<24} {'mode':>7} {'p50 ms':>9} {'rows/sec':>10}")
+
+        with transaction.atomic():
+            owner = User.objects.create_user(username="bench_serializers_owner")
+            reader = User.objects.create_user(username="bench_serializers_reader")
+            books = Book.objects.bulk_create(
+                [
+                    Book(owner=owner, title=f"Book {i}", author="Author", available_for="rent")
+                    for i in range(rows)
+                ],
+                batch_size=1000,
+            )
+            BookRequest.objects.bulk_create(
+                [BookRequest(book=book, requester=reader, request_type="rent") for book in books],
+                batch_size=1000,
+            )
+
+            cases = [
+                (BookSerializer, Book.objects.select_related("owner").filter(owner=owner)),
+                (
+                    BookRequestSerializer,
+                    BookRequest.objects.select_related("book", "requester", "book__owner")
+                    .filter(requester=reader),
+                ),
+            ]
+            for serializer_class, queryset in cases:
+                fast = values_serializer_for(serializer_class, context)
+
+                def model_path():
+                    return serializer_class(queryset.all(), many=True, context=context).data
+
+                def values_path():
+                    return fast.serialize(fast.prepare(queryset.all()))
+
+                for mode, fn in (("model", model_path), ("values", values_path)):
+                    stats = summary([timed_ms(fn) for _ in range(repeat)])
+                    self.stdout.write(
+                        f"{serializer_class.__name__:<24} {mode:>7} {stats['p50']:>9.2f} "
+                        f"{rows / stats['p50'] * 1000:>10.0f}"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,54 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import FORMATS, detect_format, import_books, iter_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream books from a CSV or NDJSON file (or - for stdin) into the catalogue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--owner", required=True, help="Username owning the books")
+        parser.add_argument("--type", choices=FORMATS, default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--max-errors", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['owner']!r}")
+
+        path = options["path"]
+        fmt = options["type"] or detect_format(filename=path)
+        if fmt is None:
+            raise CommandError("Cannot tell the file type, pass --type csv|ndjson")
+
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            result = import_books(
+                iter_rows(stream, fmt),
+                owner=owner,
+                batch_size=options["batch_size"],
+                max_errors=options["max_errors"],
+            )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in result["errors"]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'], default=str)}")
+        if result["errors_truncated"]:
+            self.stderr.write("... more errors not shown")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['created']} book(s), {result['failed']} row(s) failed."
+            )
+        )
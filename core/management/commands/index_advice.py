@@ -0,0 +1,193 @@
+import random
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from core.models import Book, BookRequest, Notification, Transaction, Wishlist
+
+User = get_user_model()
+
+GENRES = [choice for choice, _ in Book.GENRE_CHOICES]
+
+# (label, path) of the GETs each ViewSet serves; {user} / {book} are
+# filled in from the seeded data
+CASES = [
+    ("BookViewSet.list", "/api/books/"),
+    ("BookViewSet.list cursor", "/api/books/?pagination=cursor"),
+    ("BookViewSet.list filters", "/api/books/?available_for=rent&genre=fiction"),
+    ("BookViewSet.list owner", "/api/books/?owner__id={user}"),
+    ("BookViewSet.list search", "/api/books/?search=river"),
+    ("BookViewSet.retrieve", "/api/books/{book}/"),
+    ("BookViewSet.my_books", "/api/books/my/"),
+    ("BookViewSet.nearby", "/api/books/nearby/?lat=12.97&lng=77.59&radius_km=5"),
+    ("BookRequestViewSet.list", "/api/bookrequests/"),
+    ("BookRequestViewSet.my_requests", "/api/bookrequests/my/"),
+    ("TransactionViewSet.list", "/api/transactions/"),
+    ("TransactionViewSet.my_transactions", "/api/transactions/my/"),
+    ("WishlistViewSet.list", "/api/wishlist/"),
+    ("FeedbackViewSet.list", "/api/feedback/"),
+    ("NotificationViewSet.list", "/api/notifications/"),
+    ("NotificationViewSet.list cursor", "/api/notifications/?pagination=cursor"),
+    ("badges", "/api/badges/"),
+]
+
+# Tables small enough that a full scan is the right plan
+IGNORED_TABLES = {"auth_user", "core_badgecounter", "django_content_type", "django_session"}
+
+
+class QueryLog:
+    """execute_wrapper collecting every SELECT a request runs."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the GET queries of each ViewSet against a seeded dataset, "
+        "EXPLAIN them and flag sequential scans / sorts. The seed data is "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the full plan of every query"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        flagged = 0
+
+        with transaction.atomic():
+            user, book = self.seed(options["users"], options["books"], rng)
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            client = APIClient()
+            client.force_authenticate(user)
+
+            for label, path in CASES:
+                log = QueryLog()
+                with connection.execute_wrapper(log):
+                    response = client.get(path.format(user=user.pk, book=book.pk))
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{label}  [{response.status_code}]"))
+                seen = set()
+                for sql, params in log.queries:
+                    if sql in seen:
+                        continue
+                    seen.add(sql)
+                    plan = self.explain(sql, params)
+                    problems = self.problems(plan)
+                    flagged += bool(problems)
+
+                    self.stdout.write(f"  {self.shorten(sql)}")
+                    for problem in problems:
+                        self.stdout.write(self.style.WARNING(f"    ! {problem}"))
+                    if options["plans"]:
+                        for line in plan:
+                            self.stdout.write(f"      {line}")
+
+            transaction.set_rollback(True)
+
+        style = self.style.WARNING if flagged else self.style.SUCCESS
+        self.stdout.write(style(f"{flagged} query plan(s) flagged."))
+
+    # ---------------------------------------------------
+    # Seed data
+    # ---------------------------------------------------
+    def seed(self, user_count, book_count, rng):
+        prefix = f"advice_{rng.random()}"
+        users = User.objects.bulk_create(
+            [User(username=f"{prefix}_{i}") for i in range(user_count)]
+        )
+        books = Book.objects.bulk_create(
+            [
+                Book(
+                    owner=rng.choice(users),
+                    title=f"{rng.choice(['River', 'Stone', 'Glass'])} {i}",
+                    author=f"Author {rng.randrange(200)}",
+                    genre=rng.choice(GENRES),
+                    available_for=rng.choice(["rent", "exchange", "donate", "none"]),
+                    location_lat=rng.uniform(-60, 60),
+                    location_lng=rng.uniform(-180, 180),
+                )
+                for i in range(book_count)
+            ],
+            batch_size=1000,
+        )
+        pairs = {(rng.choice(users), rng.choice(books)) for _ in range(book_count // 2)}
+        BookRequest.objects.bulk_create(
+            [
+                BookRequest(
+                    requester=u, book=b, request_type=b.available_for,
+                    status=rng.choice(["pending", "approved", "rejected"]),
+                )
+                for u, b in pairs
+            ],
+            batch_size=1000,
+        )
+        Transaction.objects.bulk_create(
+            [
+                Transaction(owner=b.owner, borrower=u, book=b, transaction_type="rent")
+                for u, b in list(pairs)[: book_count // 4]
+            ],
+            batch_size=1000,
+        )
+        Wishlist.objects.bulk_create(
+            [Wishlist(user=u, book=b) for u, b in pairs], batch_size=1000, ignore_conflicts=True
+        )
+        Notification.objects.bulk_create(
+            [
+                Notification(user=rng.choice(users), message="seed", is_read=rng.random() < 0.8)
+                for _ in range(book_count)
+            ],
+            batch_size=1000,
+        )
+        user = max(users, key=lambda u: sum(1 for b in books[:2000] if b.owner_id == u.pk))
+        return user, books[0]
+
+    # ---------------------------------------------------
+    # EXPLAIN
+    # ---------------------------------------------------
+    def explain(self, sql, params):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        if connection.vendor == "sqlite":
+            # (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+    def problems(self, plan):
+        problems = []
+        for line in plan:
+            if connection.vendor == "sqlite":
+                match = re.match(r"\s*SCAN (\w+)(?! USING)", line)
+                if match and match.group(1) not in IGNORED_TABLES and "USING" not in line:
+                    problems.append(f"full scan of {match.group(1)}")
+                elif "USE TEMP B-TREE FOR ORDER BY" in line:
+                    problems.append("sort not served by an index")
+            else:
+                match = re.search(r"Seq Scan on (\w+)", line)
+                if match and match.group(1) not in IGNORED_TABLES:
+                    problems.append(f"sequential scan on {match.group(1)}")
+        return problems
+
+    @staticmethod
+    def shorten(sql, width=110):
+        sql = re.sub(r"SELECT .*? FROM", "SELECT ... FROM", sql, count=1, flags=re.S)
+        return sql if len(sql) <= width else sql[: width - 3] + "..."
@@ -0,0 +1,241 @@
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from core.models import Book
+from core.synthetic import CITIES, WORDS
+
+from ._bench import summary
+
+User = get_user_model()
+
+AVAILABLE_FOR = [choice for choice, _ in Book.AVAILABLE_CHOICES]
+GENRES = [choice for choice, _ in Book.GENRE_CHOICES]
+
+
+# ------------------------------------------------------------
+# Scenario mix: name -> (weight, method, needs_user, build(ctx, rng))
+# build() returns (path, query dict, JSON body or None)
+# ------------------------------------------------------------
+SCENARIOS = {
+    "books.list": (20, "GET", False, lambda ctx, rng: (
+        "/api/books/", {"page": rng.randint(1, 20)}, None)),
+    "books.filter": (10, "GET", False, lambda ctx, rng: (
+        "/api/books/",
+        {"available_for": rng.choice(AVAILABLE_FOR), "genre": rng.choice(GENRES)},
+        None,
+    )),
+    "books.cursor": (8, "GET", False, lambda ctx, rng: (
+        "/api/books/", {"pagination": "cursor"}, None)),
+    "books.detail": (15, "GET", False, lambda ctx, rng: (
+        f"/api/books/{ctx.random_book(rng)}/", {}, None)),
+    "books.nearby": (8, "GET", False, lambda ctx, rng: (
+        "/api/books/nearby/",
+        dict(zip(("lat", "lng"), rng.choice(CITIES)), radius_km=rng.choice((2, 5, 10))),
+        None,
+    )),
+    "books.search": (5, "GET", False, lambda ctx, rng: (
+        "/api/books/fuzzy-search/", {"q": rng.choice(WORDS)}, None)),
+    "books.my": (5, "GET", True, lambda ctx, rng: ("/api/books/my/", {}, None)),
+    "bookrequests.my": (8, "GET", True, lambda ctx, rng: (
+        "/api/bookrequests/my/", {}, None)),
+    "transactions.my": (4, "GET", True, lambda ctx, rng: (
+        "/api/transactions/my/", {}, None)),
+    "notifications.list": (6, "GET", True, lambda ctx, rng: (
+        "/api/notifications/", {"pagination": "cursor"}, None)),
+    "badges": (8, "GET", True, lambda ctx, rng: ("/api/badges/", {}, None)),
+    "wishlist.list": (3, "GET", True, lambda ctx, rng: ("/api/wishlist/", {}, None)),
+    "auth.token": (1, "POST", False, lambda ctx, rng: (
+        "/api/auth/token/",
+        {},
+        {"username": rng.choice(ctx.usernames), "password": ctx.password},
+    )),
+}
+
+
+class Context:
+    """Seeded users / tokens / book ids shared by the workers (read-only)."""
+
+    def __init__(self, users, password):
+        self.usernames = [user.username for user in users]
+        self.tokens = [
+            str(ClaimsTokenObtainPairSerializer.get_token(user).access_token) for user in users
+        ]
+        self.password = password
+        bounds = Book.objects.aggregate(low=Min("pk"), high=Max("pk"))
+        self.book_low, self.book_high = bounds["low"] or 1, bounds["high"] or 1
+
+    def random_book(self, rng):
+        return rng.randint(self.book_low, self.book_high)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of API calls against a running server with N "
+        "concurrent clients and report throughput and latency percentiles per "
+        "endpoint. Uses users created by `manage.py seed_synthetic`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds")
+        parser.add_argument(
+            "--requests", type=int, default=0, help="Stop after this many requests (0 = no cap)"
+        )
+        parser.add_argument("--users", type=int, default=100, help="Distinct seeded users")
+        parser.add_argument("--prefix", default="synth")
+        parser.add_argument("--password", default="loadtest")
+        parser.add_argument(
+            "--anonymous", type=float, default=0.3,
+            help="Share of public requests sent without a token",
+        )
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS),
+            help="Only run the given scenario (repeatable)",
+        )
+        parser.add_argument("--timeout", type=float, default=10)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["base_url"])
+        if url.scheme not in ("http", "https"):
+            raise CommandError("--base-url must be an http(s) URL.")
+
+        users = list(
+            User.objects.filter(username__startswith=options["prefix"], is_active=True)
+            .order_by("pk")[: options["users"]]
+        )
+        if not users:
+            raise CommandError(
+                f"No users named '{options['prefix']}*'; run `manage.py seed_synthetic` first."
+            )
+
+        self.options = options
+        self.url = url
+        self.ctx = Context(users, options["password"])
+        names = options["scenarios"] or sorted(SCENARIOS)
+        self.names = names
+        self.weights = [SCENARIOS[name][0] for name in names]
+        self.budget = options["requests"]
+        self.sent = 0
+        self.lock = threading.Lock()
+
+        self.stdout.write(
+            f"{options['concurrency']} clients, {len(users)} users -> {options['base_url']}"
+        )
+        started = time.perf_counter()
+        deadline = started + options["duration"]
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            results = list(
+                pool.map(
+                    lambda worker: self.run_worker(worker, deadline),
+                    range(options["concurrency"]),
+                )
+            )
+        elapsed = time.perf_counter() - started
+
+        self.report(results, elapsed)
+
+    # ---------------------------------------------------
+    # Workers
+    # ---------------------------------------------------
+    def take_ticket(self):
+        if not self.budget:
+            return True
+        with self.lock:
+            if self.sent >= self.budget:
+                return False
+            self.sent += 1
+            return True
+
+    def connect(self):
+        connection_class = (
+            http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+        )
+        return connection_class(self.url.hostname, self.url.port, timeout=self.options["timeout"])
+
+    def run_worker(self, worker, deadline):
+        seed = self.options["seed"]
+        rng = random.Random(None if seed is None else seed + worker)
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        statuses = defaultdict(lambda: defaultdict(int))
+        conn = self.connect()
+        prefix = self.url.path.rstrip("/")
+
+        while time.perf_counter() < deadline and self.take_ticket():
+            name = rng.choices(self.names, weights=self.weights)[0]
+            _, method, needs_user, build = SCENARIOS[name]
+            path, query, body = build(self.ctx, rng)
+
+            headers = {"Accept": "application/json"}
+            if needs_user or rng.random() >= self.options["anonymous"]:
+                headers["Authorization"] = f"Bearer {rng.choice(self.ctx.tokens)}"
+            if body is not None:
+                body = json.dumps(body)
+                headers["Content-Type"] = "application/json"
+
+            target = prefix + path + (f"?{urlencode(query)}" if query else "")
+            started = time.perf_counter()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = self.connect()
+                status = "error"
+
+            timings[name].append((time.perf_counter() - started) * 1000)
+            statuses[name][status] += 1
+            if status == "error" or status >= 500 or (status >= 400 and status != 404):
+                errors[name] += 1
+
+        conn.close()
+        return timings, errors, statuses
+
+    # ---------------------------------------------------
+    # Report
+    # ---------------------------------------------------
+    def report(self, results, elapsed):
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        statuses = defaultdict(lambda: defaultdict(int))
+        for worker_timings, worker_errors, worker_statuses in results:
+            for name, values in worker_timings.items():
+                timings[name].extend(values)
+                timings["TOTAL"].extend(values)
+            for name, count in worker_errors.items():
+                errors[name] += count
+                errors["TOTAL"] += count
+            for name, counts in worker_statuses.items():
+                for status, count in counts.items():
+                    statuses[name][status] += count
+
+        self.stdout.write(
+            f"{'endpoint':<20} {'reqs':>7} {'errors':>6} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  status"
+        )
+        for name in sorted(timings, key=lambda n: (n == "TOTAL", n)):
+            values = timings[name]
+            stats = summary(values)
+            codes = " ".join(
+                f"{status}x{count}" for status, count in sorted(statuses[name].items(), key=str)
+            )
+            self.stdout.write(
+                f"{name:<20} {len(values):>7} {errors[name]:>6} {len(values) / elapsed:>8.1f} "
+                f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} "
+                f"{stats['max']:>8.1f}  {codes}"
+            )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.exchanges import match_exchanges, match_stale_exchanges
+
+
+class Command(BaseCommand):
+    help = (
+        "Find 2- and 3-way exchange cycles over wishlists (run nightly), or "
+        "with --stale only from the users changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Only search from users marked stale (what the background job does)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["stale"]:
+            found, added, removed = match_stale_exchanges()
+        else:
+            found, added, removed = match_exchanges()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{found} cycle(s) found, {added} added, {removed} removed "
+                f"in {time.perf_counter() - started:.1f}s."
+            )
+        )
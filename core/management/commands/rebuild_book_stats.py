@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Book, BookRequest, Feedback
+from core.stats import rebuild_book_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute Book.rating_sum, rating_count and request_count from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--book",
+            type=int,
+            action="append",
+            dest="book_ids",
+            help="Only rebuild the given book id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        books = Book.objects.all()
+        if options["book_ids"]:
+            books = books.filter(pk__in=options["book_ids"])
+
+        updated = rebuild_book_stats(books, Feedback, BookRequest)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {updated} book(s)."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.cache import invalidate
+from core.recommendations import rebuild_similar_books, refresh_stale_similarities
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the 'readers also liked' neighbours of every book "
+        "(run nightly), or with --stale only the books changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Only refresh books marked stale (what the background job does)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["stale"]:
+            books, rows = refresh_stale_similarities()
+        else:
+            books, rows = rebuild_similar_books()
+        invalidate("books")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {rows} neighbour(s) for {books} book(s) "
+                f"in {time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.badges import rebuild_badges
+from core.models import BadgeCounter, BookRequest, Notification
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's unread-notification and pending-request badge counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only reconcile the given user id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        if options["user_ids"]:
+            users = users.filter(pk__in=options["user_ids"])
+
+        updated = rebuild_badges(users, BadgeCounter, Notification, BookRequest)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled badges for {updated} user(s)."))
@@ -0,0 +1,57 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.scheduler import Scheduler, scheduler_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueue the periodic jobs in settings.SCHEDULER['JOBS'] (see "
+        "core/scheduler.py). `manage.py runworker` runs them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tick",
+            type=float,
+            default=None,
+            help="Seconds between checks (default: SCHEDULER['TICK'])",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Enqueue the jobs due in the current interval, then exit",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+        if options["once"]:
+            enqueued = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f"Enqueued {len(enqueued)} job(s)."))
+            return
+
+        tick = options["tick"] or scheduler_settings()["TICK"]
+        stopping = []
+
+        def shutdown(signum, frame):
+            # Only flag here, like runworker
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(
+            f"Scheduling {len(scheduler.jobs)} job(s), checking every {tick:g}s. "
+            "Ctrl+C to stop."
+        )
+        while not stopping:
+            close_old_connections()
+            for name in scheduler.tick():
+                self.stdout.write(f"Enqueued {name}.")
+            next_tick = time.monotonic() + tick
+            while not stopping and time.monotonic() < next_tick:
+                time.sleep(max(0, min(1, next_tick - time.monotonic())))
+        self.stdout.write("Scheduler stopped.")
@@ -0,0 +1,93 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core.jobs import Worker, run_pending_jobs
+
+
+def work(stop, batch_size, poll_interval):
+    # Each process needs its own DB connection, never the parent's
+    connections.close_all()
+    # Shutdown is driven by the parent through `stop`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    worker = Worker(batch_size=batch_size)
+    while not stop.is_set():
+        close_old_connections()
+        worker.requeue_stale()
+        if not worker.run_once():
+            stop.wait(poll_interval)
+
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the core Job table (see core/jobs.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain every due job, then exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            processed = run_pending_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
+            return
+
+        # Fork after closing connections so children don't share sockets
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        pool = [
+            context.Process(
+                target=work,
+                args=(stop, options["batch_size"], options["poll_interval"]),
+                name=f"runworker-{i}",
+            )
+            for i in range(max(1, options["processes"]))
+        ]
+
+        stopping = []
+
+        def shutdown(signum, frame):
+            # Only flag here: Event.set() can deadlock inside a signal handler
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        for process in pool:
+            process.start()
+        self.stdout.write(f"Started {len(pool)} worker process(es). Ctrl+C to stop.")
+
+        while not stopping:
+            # Replace crashed workers
+            for i, process in enumerate(pool):
+                if not process.is_alive():
+                    pool[i] = context.Process(
+                        target=work,
+                        args=(stop, options["batch_size"], options["poll_interval"]),
+                        name=process.name,
+                    )
+                    pool[i].start()
+            time.sleep(1)
+
+        stop.set()
+        for process in pool:
+            process.join()
+        self.stdout.write("Workers stopped.")
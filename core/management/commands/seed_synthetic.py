@@ -0,0 +1,301 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from accounts.models import Profile
+from core.badges import rebuild_badges
+from core.cache import invalidate
+from core.models import (
+    BadgeCounter,
+    Book,
+    BookRequest,
+    Feedback,
+    Notification,
+    Transaction,
+    Wishlist,
+)
+from core.stats import rebuild_book_stats
+from core.synthetic import (
+    AUTHORS,
+    BATCH_SIZE,
+    REQUEST_STATUS_WEIGHTS,
+    TRANSACTION_STATUS_WEIGHTS,
+    Loader,
+    coordinates,
+    next_id,
+    title,
+)
+
+User = get_user_model()
+
+AVAILABLE_FOR = [choice for choice, _ in Book.AVAILABLE_CHOICES]
+GENRES = [choice for choice, _ in Book.GENRE_CHOICES]
+MESSAGES = (
+    "Your request for '{}' was approved.",
+    "New request for your book '{}'.",
+    "'{}' is now available.",
+    "Reminder: '{}' is due back soon.",
+)
+HISTORY_DAYS = 365
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, profiles, books, requests, "
+        "transactions, wishlists, feedback and notifications (COPY on "
+        "PostgreSQL). Every user can log in with --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--books-per-user", type=float, default=5)
+        parser.add_argument("--requests-per-book", type=float, default=1)
+        parser.add_argument("--transactions-per-book", type=float, default=0.3)
+        parser.add_argument("--feedback-per-book", type=float, default=0.5)
+        parser.add_argument("--wishlist-per-user", type=float, default=5)
+        parser.add_argument("--notifications-per-user", type=float, default=10)
+        parser.add_argument("--prefix", default="synth", help="Username prefix")
+        parser.add_argument("--password", default="loadtest")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["users"] < 2:
+            raise CommandError("--users must be at least 2.")
+
+        self.rng = random.Random(options["seed"])
+        self.loader = Loader(batch_size=options["batch_size"])
+        self.now = self.loader.now
+        self.users = options["users"]
+        self.books = max(1, int(self.users * options["books_per_user"]))
+        # per-book available_for, indexes into AVAILABLE_FOR
+        self.available = bytearray()
+
+        self.stdout.write(
+            f"Seeding {self.users} users / {self.books} books "
+            f"({'COPY' if self.loader.using_copy else 'INSERT'})"
+        )
+
+        with transaction.atomic():
+            self.user_start = next_id(User)
+            self.book_start = next_id(Book)
+            password = make_password(options["password"])
+
+            self.step(User, self.user_rows(options["prefix"], password))
+            self.step(Profile, self.profile_rows())
+            self.step(Book, self.book_rows())
+            self.step(
+                BookRequest,
+                self.request_rows(int(self.books * options["requests_per_book"])),
+            )
+            self.step(
+                Transaction,
+                self.transaction_rows(int(self.books * options["transactions_per_book"])),
+            )
+            self.step(Wishlist, self.wishlist_rows(options["wishlist_per_user"]))
+            self.step(Feedback, self.feedback_rows(options["feedback_per_book"]))
+            self.step(
+                Notification,
+                self.notification_rows(int(self.users * options["notifications_per_user"])),
+            )
+
+            self.loader.reset_sequences(
+                User, Profile, Book, BookRequest, Transaction, Wishlist, Feedback, Notification
+            )
+
+            started = time.perf_counter()
+            rebuild_book_stats(Book.objects.filter(pk__gte=self.book_start), Feedback, BookRequest)
+            rebuild_badges(
+                User.objects.filter(pk__gte=self.user_start), BadgeCounter, Notification, BookRequest
+            )
+            self.stdout.write(f"  counters rebuilt in {time.perf_counter() - started:.1f}s")
+
+            transaction.on_commit(lambda: invalidate("books", "announcements"))
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def step(self, model, rows):
+        started = time.perf_counter()
+        count = self.loader.load(model, rows)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {model._meta.label:<20} {count:>10} rows  {elapsed:>7.1f}s  "
+            f"{count / elapsed if elapsed else 0:>10.0f} rows/s"
+        )
+
+    # ---------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------
+    def timestamp(self):
+        return self.now - timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+
+    def count(self, mean):
+        """An integer averaging `mean`."""
+        whole = int(mean)
+        return whole + (self.rng.random() < mean - whole)
+
+    def user_id(self, index):
+        return self.user_start + index
+
+    def owner_index(self, book_index):
+        return book_index % self.users
+
+    def other_user(self, index):
+        other = self.rng.randrange(self.users - 1)
+        return other + 1 if other >= index else other
+
+    def book_of(self, user_index):
+        """A random book owned by user `user_index`, or None."""
+        if user_index >= self.books:
+            return None
+        owned = (self.books - 1 - user_index) // self.users + 1
+        return self.book_start + user_index + self.rng.randrange(owned) * self.users
+
+    # ---------------------------------------------------
+    # Rows
+    # ---------------------------------------------------
+    def user_rows(self, prefix, password):
+        for index in range(self.users):
+            username = f"{prefix}{self.user_id(index)}"
+            yield {
+                "id": self.user_id(index),
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": password,
+                "date_joined": self.timestamp(),
+            }
+
+    def profile_rows(self):
+        profile_start = next_id(Profile)
+        for index in range(self.users):
+            yield {
+                "id": profile_start + index,
+                "user_id": self.user_id(index),
+                "bio": "Synthetic reader.",
+            }
+
+    def book_rows(self):
+        rng = self.rng
+        for index in range(self.books):
+            available = rng.randrange(len(AVAILABLE_FOR))
+            self.available.append(available)
+            lat, lng = coordinates(rng)
+            created_at = self.timestamp()
+            yield {
+                "id": self.book_start + index,
+                "owner_id": self.user_id(self.owner_index(index)),
+                "title": title(rng),
+                "author": rng.choice(AUTHORS),
+                "description": f"{title(rng)}. {title(rng)}.",
+                "isbn": f"978{rng.randrange(10**10):010d}",
+                "genre": rng.choice(GENRES),
+                "available_for": AVAILABLE_FOR[available],
+                "location_lat": lat,
+                "location_lng": lng,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def request_rows(self, count):
+        rng = self.rng
+        start = next_id(BookRequest)
+        statuses = rng.choices(
+            list(REQUEST_STATUS_WEIGHTS), weights=REQUEST_STATUS_WEIGHTS.values(), k=count
+        )
+        for n, status in enumerate(statuses):
+            book = rng.randrange(self.books)
+            requester = self.other_user(self.owner_index(book))
+            request_type = AVAILABLE_FOR[self.available[book]]
+            created_at = self.timestamp()
+            yield {
+                "id": start + n,
+                "book_id": self.book_start + book,
+                "requester_id": self.user_id(requester),
+                "request_type": request_type,
+                "exchange_book_id": (
+                    self.book_of(requester) if request_type == "exchange" else None
+                ),
+                "status": status,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def transaction_rows(self, count):
+        rng = self.rng
+        start = next_id(Transaction)
+        statuses = rng.choices(
+            list(TRANSACTION_STATUS_WEIGHTS), weights=TRANSACTION_STATUS_WEIGHTS.values(), k=count
+        )
+        for n, status in enumerate(statuses):
+            book = rng.randrange(self.books)
+            owner = self.owner_index(book)
+            started = self.timestamp()
+            yield {
+                "id": start + n,
+                "book_id": self.book_start + book,
+                "owner_id": self.user_id(owner),
+                "borrower_id": self.user_id(self.other_user(owner)),
+                "transaction_type": AVAILABLE_FOR[self.available[book]],
+                "status": status,
+                "start_date": started,
+                "end_date": (
+                    started + timedelta(days=rng.randint(7, 60)) if status == "returned" else None
+                ),
+                "created_at": started,
+                "updated_at": started,
+            }
+
+    def wishlist_rows(self, per_user):
+        start = next_id(Wishlist)
+        n = 0
+        for user in range(self.users):
+            for book in self.rng.sample(range(self.books), min(self.count(per_user), self.books)):
+                yield {
+                    "id": start + n,
+                    "user_id": self.user_id(user),
+                    "book_id": self.book_start + book,
+                    "added_at": self.timestamp(),
+                }
+                n += 1
+
+    def feedback_rows(self, per_book):
+        rng = self.rng
+        start = next_id(Feedback)
+        n = 0
+        for book in range(self.books):
+            owner = self.owner_index(book)
+            for user in rng.sample(range(self.users), min(self.count(per_book), self.users)):
+                if user == owner:
+                    continue
+                created_at = self.timestamp()
+                yield {
+                    "id": start + n,
+                    "user_id": self.user_id(user),
+                    "book_id": self.book_start + book,
+                    "rating": rng.choices((1, 2, 3, 4, 5), weights=(5, 10, 25, 35, 25))[0],
+                    "comment": "Synthetic review.",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                n += 1
+
+    def notification_rows(self, count):
+        rng = self.rng
+        start = next_id(Notification)
+        for n in range(count):
+            yield {
+                "id": start + n,
+                "user_id": self.user_id(rng.randrange(self.users)),
+                "message": rng.choice(MESSAGES).format(title(rng)),
+                "is_read": rng.random() < 0.7,
+                "created_at": self.timestamp(),
+            }
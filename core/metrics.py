@@ -0,0 +1,285 @@
+"""
+REQUEST METRICS (see core/middleware.py):
+
+Per request the middleware records query count, SQL time, serializer time,
+total time and response size. They are sent back as a Server-Timing header
+and folded into rolling, per-view-action histograms kept in this process,
+exposed by /api/metrics/ as JSON or Prometheus text.
+
+The JSON histograms cover the last WINDOW_SECONDS, split into SLICES
+sub-windows that rotate out as they age. The Prometheus output exports
+process-lifetime cumulative histograms instead: counter values must never
+go down, and Prometheus computes its own windows with rate().
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import serializers
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "WINDOW_SECONDS": 300,
+    "SLICES": 5,
+    "TOKEN": "",
+    "QUERY_COUNT_WARNING": 50,
+    "SLOW_REQUEST_MS": 1000,
+    "PROFILE_SAMPLE_RATE": 0.0,
+    "PROFILE_DIR": "profiles",
+}
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+SERIES = {
+    "duration_ms": LATENCY_BUCKETS_MS,
+    "sql_ms": LATENCY_BUCKETS_MS,
+    "serializer_ms": LATENCY_BUCKETS_MS,
+    "queries": QUERY_BUCKETS,
+    "response_bytes": SIZE_BUCKETS,
+}
+
+
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, "REQUEST_METRICS", {})}
+
+
+# ------------------------------------------------------------
+# Per-request sample
+# ------------------------------------------------------------
+class RequestSample:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+current_sample = contextvars.ContextVar("current_request_sample", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Permanent execute_wrapper: counts into the current request's sample.
+    The context variable follows the request into sync_to_async threads,
+    so async ORM queries are counted too.
+    """
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    return sample(execute, sql, params, many, context)
+
+
+def install_query_timing(sender=None, connection=None, **kwargs):
+    """connection_created receiver; also safe to call on any connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_serializer_timing():
+    """
+    Time every top-level `serializer.data` call into the current sample.
+    Nested serializers are counted once, by their outermost `.data`.
+    """
+    base = serializers.BaseSerializer
+    if getattr(base.data.fget, "_timed", False):
+        return
+
+    untimed = base.data.fget
+
+    def timed_data(self):
+        sample = current_sample.get()
+        if sample is None:
+            return untimed(self)
+
+        sample._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return untimed(self)
+        finally:
+            sample._serializer_depth -= 1
+            if not sample._serializer_depth:
+                sample.serializer_ms += (time.perf_counter() - started) * 1000
+
+    timed_data._timed = True
+    base.data = property(timed_data)
+
+
+# ------------------------------------------------------------
+# Rolling histograms
+# ------------------------------------------------------------
+class RollingHistogram:
+    def __init__(self, buckets, window_seconds, slices):
+        self.buckets = tuple(buckets)
+        self.slice_seconds = window_seconds / slices
+        self.slices = [self._empty(0) for _ in range(slices)]
+
+    def _empty(self, epoch):
+        return {"epoch": epoch, "counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "n": 0}
+
+    def _slot(self, now):
+        epoch = int(now // self.slice_seconds)
+        slot = self.slices[epoch % len(self.slices)]
+        if slot["epoch"] != epoch:
+            slot.update(self._empty(epoch))
+        return slot
+
+    def observe(self, value, now):
+        slot = self._slot(now)
+        slot["counts"][bisect.bisect_left(self.buckets, value)] += 1
+        slot["sum"] += value
+        slot["n"] += 1
+
+    def snapshot(self, now):
+        oldest = int(now // self.slice_seconds) - len(self.slices) + 1
+        counts = [0] * (len(self.buckets) + 1)
+        total, n = 0.0, 0
+        for slot in self.slices:
+            if slot["epoch"] >= oldest:
+                counts = [a + b for a, b in zip(counts, slot["counts"])]
+                total += slot["sum"]
+                n += slot["n"]
+        return {"buckets": self.buckets, "counts": counts, "sum": total, "count": n}
+
+
+class CumulativeHistogram:
+    """Process-lifetime counts, for Prometheus counters."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.n += 1
+
+    def snapshot(self):
+        return {
+            "buckets": self.buckets, "counts": list(self.counts), "sum": self.sum, "count": self.n,
+        }
+
+
+def quantile(snapshot, q):
+    """Upper bucket bound containing the q-th observation (None if empty)."""
+    if not snapshot["count"]:
+        return None
+    rank = q * snapshot["count"]
+    seen = 0
+    for bound, count in zip(snapshot["buckets"] + (float("inf"),), snapshot["counts"]):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.totals = {}
+        self.status_counts = defaultdict(lambda: defaultdict(int))
+
+    def _series(self, view):
+        if view not in self.views:
+            conf = metrics_settings()
+            self.views[view] = {
+                name: RollingHistogram(buckets, conf["WINDOW_SECONDS"], conf["SLICES"])
+                for name, buckets in SERIES.items()
+            }
+            self.totals[view] = {
+                name: CumulativeHistogram(buckets) for name, buckets in SERIES.items()
+            }
+        return self.views[view]
+
+    def record(self, view, status, values):
+        now = time.time()
+        with self.lock:
+            series = self._series(view)
+            totals = self.totals[view]
+            for name, value in values.items():
+                series[name].observe(value, now)
+                totals[name].observe(value)
+            self.status_counts[view][status] += 1
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            data = {}
+            for view, series in self.views.items():
+                data[view] = {name: hist.snapshot(now) for name, hist in series.items()}
+                data[view]["status"] = dict(self.status_counts[view])
+            return data
+
+    def lifetime_snapshot(self):
+        """Like snapshot(), over the whole life of the process."""
+        with self.lock:
+            return {
+                view: {name: hist.snapshot() for name, hist in series.items()}
+                for view, series in self.totals.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+            self.totals.clear()
+            self.status_counts.clear()
+
+
+registry = MetricsRegistry()
+
+
+def as_json(snapshot):
+    summary = {}
+    for view, series in sorted(snapshot.items()):
+        summary[view] = {"status": series["status"]}
+        for name in SERIES:
+            hist = series[name]
+            summary[view][name] = {
+                "count": hist["count"],
+                "avg": round(hist["sum"] / hist["count"], 3) if hist["count"] else None,
+                "p50": quantile(hist, 0.5),
+                "p95": quantile(hist, 0.95),
+                "p99": quantile(hist, 0.99),
+            }
+    return summary
+
+
+def as_prometheus(snapshot):
+    """`snapshot`: registry.lifetime_snapshot(); the windowed one would go down."""
+    lines = []
+    for name in SERIES:
+        metric = f"booknest_request_{name}"
+        lines.append(f"# TYPE {metric} histogram")
+        for view, series in sorted(snapshot.items()):
+            hist = series[name]
+            cumulative = 0
+            for bound, count in zip(hist["buckets"] + ("+Inf",), hist["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{view="{view}"}} {hist["sum"]:.3f}')
+            lines.append(f'{metric}_count{{view="{view}"}} {hist["count"]}')
+    return "\n".join(lines) + "\n"
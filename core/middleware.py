@@ -0,0 +1,214 @@
+import cProfile
+import logging
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .metrics import (
+    RequestSample,
+    current_sample,
+    install_query_timing,
+    install_serializer_timing,
+    metrics_settings,
+    registry,
+)
+from .routers import RoutingState, is_pinned, pin_to_primary, replica_settings, routing_state
+
+
+logger = logging.getLogger("core.metrics")
+
+
+def view_key(view_func, method):
+    """`BookViewSet.list` for DRF viewsets, the function / class name otherwise."""
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    name = cls.__name__ if cls else getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        name = f"{name}.{actions.get(method, method)}"
+    return name
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, SQL / serializer / total time and response size
+    for every request (see core/metrics.py). Place it near the top of
+    MIDDLEWARE so the timings include the rest of the stack.
+
+    Works under WSGI and ASGI; the cProfile sampler only runs for sync
+    requests (a profiler in the event loop would see every coroutine).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        install_serializer_timing()
+        # Connections opened later, in any thread, report into current_sample
+        connection_created.connect(install_query_timing)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        conf = metrics_settings()
+        if not conf["ENABLED"]:
+            return self.get_response(request)
+
+        for alias in connections:
+            install_query_timing(connection=connections[alias])
+
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        profiler = None
+        if conf["PROFILE_SAMPLE_RATE"] and random.random() < conf["PROFILE_SAMPLE_RATE"]:
+            profiler = cProfile.Profile()
+
+        try:
+            if profiler:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+        finally:
+            current_sample.reset(token)
+
+        return self.finish(request, response, sample, conf, profiler)
+
+    async def __acall__(self, request):
+        conf = metrics_settings()
+        if not conf["ENABLED"]:
+            return await self.get_response(request)
+
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+
+        return self.finish(request, response, sample, conf)
+
+    def finish(self, request, response, sample, conf, profiler=None):
+        total_ms = sample.elapsed_ms
+        view = getattr(request, "_metrics_view", None) or "unresolved"
+        size = 0 if response.streaming else len(response.content)
+
+        registry.record(
+            view,
+            response.status_code,
+            {
+                "duration_ms": total_ms,
+                "sql_ms": sample.sql_ms,
+                "serializer_ms": sample.serializer_ms,
+                "queries": sample.queries,
+                "response_bytes": size,
+            },
+        )
+
+        if conf["SERVER_TIMING"]:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={sample.sql_ms:.1f};desc="{sample.queries} queries"',
+                f"serialize;dur={sample.serializer_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ])
+
+        if sample.queries > conf["QUERY_COUNT_WARNING"]:
+            logger.warning(
+                "%s %s (%s) ran %d queries", request.method, request.path, view, sample.queries
+            )
+
+        if profiler and total_ms >= conf["SLOW_REQUEST_MS"]:
+            self._dump_profile(profiler, conf["PROFILE_DIR"], view, total_ms)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_key(view_func, request.method.lower())
+        return None
+
+    def _dump_profile(self, profiler, directory, view, total_ms):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{int(time.time())}-{view}-{int(total_ms)}ms.prof")
+        profiler.dump_stats(path)
+        logger.info("Slow request profile written to %s", path)
+
+
+def request_user_id(request):
+    """User id from the session, or from a valid JWT (no database lookup)."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw = header and authenticator.get_raw_token(header)
+    if not raw:
+        return None
+    try:
+        return authenticator.get_validated_token(raw).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routing scope for core/routers.py: safe-method requests may read from a
+    replica unless the user wrote within STICKY_SECONDS. Place it after
+    AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        replicas = replica_settings()["REPLICAS"]
+        user_id = request_user_id(request) if replicas else None
+        replica = None
+        if replicas and request.method in SAFE_METHODS and not (user_id and is_pinned(user_id)):
+            replica = random.choice(replicas)
+        state = RoutingState(replica)
+        return state, user_id, routing_state.set(state)
+
+    def finish(self, state, user_id, token):
+        routing_state.reset(token)
+        if state.wrote and user_id:
+            pin_to_primary(user_id)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        state, user_id, token = self.start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.finish(state, user_id, token)
+
+    async def __acall__(self, request):
+        state, user_id, token = self.start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self.finish(state, user_id, token)
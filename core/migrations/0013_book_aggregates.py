@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+from core.stats import rebuild_book_stats
+
+
+def backfill_book_stats(apps, schema_editor):
+    rebuild_book_stats(
+        apps.get_model("core", "Book").objects.all(),
+        apps.get_model("core", "Feedback"),
+        apps.get_model("core", "BookRequest"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_book_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='request_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_book_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_keyset_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['location_lat', 'location_lng'], name='book_location_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from core.badges import rebuild_badges
+
+
+def backfill_badges(apps, schema_editor):
+    user_model = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    rebuild_badges(
+        user_model.objects.all(),
+        apps.get_model("core", "BadgeCounter"),
+        apps.get_model("core", "Notification"),
+        apps.get_model("core", "BookRequest"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0017_book_cover_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadgeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='badges', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_notifications', models.PositiveIntegerField(default=0)),
+                ('pending_requests', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookrequest',
+            index=models.Index(fields=['book', 'status'], name='bookreq_book_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notif_user_unread_idx'),
+        ),
+        migrations.RunPython(backfill_badges, migrations.RunPython.noop),
+    ]
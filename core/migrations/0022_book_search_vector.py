@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# Full-text search for ?search= (core.search.FullTextSearchFilter). The
+# tsvector is a STORED generated column, so PostgreSQL keeps it current on
+# every INSERT / UPDATE / COPY. It is Postgres-only and not a model field:
+# SQLite keeps migrating, and Book queries never load it.
+#
+# Weights: A title, B author, C description, D isbn + genre. The text
+# search configs must match core.search.FTS_CONFIG.
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+    || setweight(to_tsvector('simple'::regconfig, coalesce(author, '')), 'B')
+    || setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+    || setweight(
+        to_tsvector('simple'::regconfig, coalesce(isbn, '') || ' ' || coalesce(genre, '')), 'D'
+    )
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE core_book ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS core_book_search_vector_gin "
+        "ON core_book USING gin (search_vector)"
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS core_book_search_vector_gin")
+    schema_editor.execute("ALTER TABLE core_book DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_exchange_cycles"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_book_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweepMark',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('position_at', models.DateTimeField(blank=True, null=True)),
+                ('position_id', models.BigIntegerField(default=0)),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('rows_scanned', models.BigIntegerField(default=0)),
+                ('last_scanned', models.PositiveIntegerField(default=0)),
+                ('last_processed', models.PositiveIntegerField(default=0)),
+                ('last_duration_ms', models.FloatField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'received'), ('transaction_type', 'rent')), fields=['end_date', 'id'], name='txn_open_rent_due_idx'),
+        ),
+    ]
@@ -34,6 +34,8 @@ class Book(models.Model):
     description = models.TextField(blank=True)
     isbn = models.CharField(max_length=20, blank=True)
     cover = models.ImageField(upload_to="book_covers/", null=True, blank=True)
+    # thumb / card / full copies of `cover` (core/images.py)
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     genre = models.CharField(max_length=50, choices=GENRE_CHOICES, default='other')
 
@@ -42,9 +44,47 @@ class Book(models.Model):
     location_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     location_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
 
+    # Denormalized aggregates, kept in sync by core/signals.py
+    # (rebuild with `manage.py rebuild_book_stats`)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    request_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (core/pagination.py)
+            models.Index(fields=["-created_at", "-id"], name="book_created_id_idx"),
+            # bounding-box prefilter for /api/books/nearby/ (core/geo.py)
+            models.Index(fields=["location_lat", "location_lng"], name="book_location_idx"),
+            # /api/books/my/ and ?owner__id= listings
+            models.Index(fields=["owner", "-created_at", "-id"], name="book_owner_feed_idx"),
+            # ?available_for=&genre= catalogue filters
+            models.Index(
+                fields=["available_for", "genre", "-created_at"], name="book_avail_genre_feed_idx"
+            ),
+        ]
+
+    # Only ever changed with F() updates (core/stats.py)
+    COUNTER_FIELDS = ("rating_sum", "rating_count", "request_count")
+
+    def save(self, *args, **kwargs):
+        # A full save of a loaded book would write back the counters read
+        # with it, losing increments made since; leave them out, and the
+        # columns deferred by .only() as Model.save() would
+        if not self._state.adding and kwargs.get("update_fields") is None and not args:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} — {self.owner.username}"
 
@@ -88,6 +128,21 @@ class BookRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["requester", "-created_at", "-id"], name="bookreq_requester_feed_idx"
+            ),
+            models.Index(fields=["book", "status"], name="bookreq_book_status_idx"),
+            models.Index(fields=["requester", "status"], name="bookreq_requester_status_idx"),
+            # duplicate-pending check in BookRequestSerializer.validate
+            models.Index(
+                fields=["book", "requester"],
+                condition=models.Q(status="pending"),
+                name="bookreq_pending_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.requester.username} → {self.book.title} ({self.request_type})"
 
@@ -118,6 +173,18 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-id"], name="txn_owner_feed_idx"),
+            models.Index(fields=["borrower", "-created_at", "-id"], name="txn_borrower_feed_idx"),
+            # keyset scan of open rentals by due date (core/overdue.py)
+            models.Index(
+                fields=["end_date", "id"],
+                condition=models.Q(transaction_type="rent", status="received"),
+                name="txn_open_rent_due_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.book.title} — {self.transaction_type} ({self.status})"
 
@@ -221,5 +288,171 @@ class Notification(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="notif_user_feed_idx"),
+            # unread badge / mark-all-read; read rows stay out of the index
+            models.Index(
+                fields=["user"], condition=models.Q(is_read=False), name="notif_unread_user_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"To {self.user.username}: {self.message}"
+
+
+# ------------------------------------------------------------
+# Per-user badge counts (see core/badges.py, GET /api/badges/)
+# ------------------------------------------------------------
+class BadgeCounter(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="badges"
+    )
+    unread_notifications = models.PositiveIntegerField(default=0)
+    # Pending requests on books the user owns
+    pending_requests = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Badges for user #{self.user_id}"
+
+
+# ------------------------------------------------------------
+# "Readers also liked" (see core/recommendations.py,
+# GET /api/books/{id}/similar/)
+# ------------------------------------------------------------
+class SimilarBook(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="similar_books")
+    similar = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="similar_to")
+    score = models.FloatField()
+    # 1 = most similar
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # also the index behind the /similar/ read
+            models.UniqueConstraint(fields=["book", "rank"], name="similarbook_book_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"#{self.book_id} ~ #{self.similar_id} ({self.score:.3f})"
+
+
+class StaleSimilarity(models.Model):
+    """Books whose neighbours must be recomputed by the next refresh."""
+
+    # Not a ForeignKey: marks are written from post_delete receivers while
+    # the book itself may be going away in the same cascade.
+    book_id = models.BigIntegerField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stale similarities for book #{self.book_id}"
+
+
+# ------------------------------------------------------------
+# Multi-way exchanges (see core/exchanges.py,
+# GET /api/exchanges/suggestions/)
+# ------------------------------------------------------------
+class ExchangeCycle(models.Model):
+    # "giver:book,giver:book,..." starting at the lowest giver id
+    key = models.CharField(max_length=255, unique=True)
+    size = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.size}-way exchange #{self.pk}"
+
+
+class ExchangeLeg(models.Model):
+    """`giver` hands `book` (on their shelf for exchange) to `receiver`."""
+
+    cycle = models.ForeignKey(ExchangeCycle, on_delete=models.CASCADE, related_name="legs")
+    position = models.PositiveSmallIntegerField()
+    giver = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    receiver = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="exchange_legs"
+    )
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cycle", "position"], name="exchangeleg_cycle_position_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.giver_id} -> #{self.receiver_id}: book #{self.book_id}"
+
+
+class StaleExchangeUser(models.Model):
+    """Users whose exchange cycles must be recomputed by the next match run."""
+
+    # Not a ForeignKey, like StaleSimilarity.book_id
+    user_id = models.BigIntegerField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stale exchanges for user #{self.user_id}"
+
+
+# ------------------------------------------------------------
+# BACKGROUND JOB QUEUE (see core/jobs.py, `manage.py runworker`)
+# ------------------------------------------------------------
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+
+    # Enqueuing twice with the same key is a no-op
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+# ------------------------------------------------------------
+# PERIODIC SWEEPS (see core/scheduler.py, `manage.py run_scheduler`)
+# ------------------------------------------------------------
+class SweepMark(models.Model):
+    """High-water mark and run counters of one sweep."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+
+    # Rows up to (position_at, position_id) have been handled
+    position_at = models.DateTimeField(null=True, blank=True)
+    position_id = models.BigIntegerField(default=0)
+
+    runs = models.PositiveIntegerField(default=0)
+    rows_scanned = models.BigIntegerField(default=0)
+    last_scanned = models.PositiveIntegerField(default=0)
+    last_processed = models.PositiveIntegerField(default=0)
+    last_duration_ms = models.FloatField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Sweep {self.name} at {self.position_at} #{self.position_id}"
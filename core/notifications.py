@@ -0,0 +1,52 @@
+"""
+NOTIFICATION FAN-OUT:
+
+Notifications sent to many users at once are written with bulk_create in
+chunks of settings.NOTIFICATION_BATCH_SIZE rows: one SELECT for the
+recipients plus one INSERT per chunk, instead of an INSERT (and a lazy
+user fetch) per recipient. bulk_create skips post_save, so each chunk also
+bumps the recipients' unread badge counters itself (core/badges.py), and
+wakes their open notification streams after commit (core/streams.py).
+"""
+
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .badges import adjust_badges
+from .models import BadgeCounter, Notification, Wishlist
+from .streams import publish
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_notify(user_ids, message, batch_size=None):
+    """Create one Notification per user id. Returns the number created."""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    created = 0
+    for chunk in chunked(user_ids, batch_size):
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, message=message) for user_id in chunk]
+        )
+        adjust_badges(BadgeCounter, chunk, unread_notifications=1)
+        transaction.on_commit(partial(publish, chunk))
+        created += len(chunk)
+    return created
+
+
+def notify_wishlist_users(book_id, message, batch_size=None):
+    """Notify everyone who wishlisted `book_id`."""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    user_ids = (
+        Wishlist.objects.filter(book_id=book_id)
+        .order_by()
+        .values_list("user_id", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+    return bulk_notify(user_ids, message, batch_size=batch_size)
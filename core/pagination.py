@@ -0,0 +1,231 @@
+"""
+PAGINATION:
+
+FeedPagination is the project-wide DEFAULT_PAGINATION_CLASS.
+
+    - ?page=N                 -> classic page numbers (COUNT + OFFSET),
+                                 used by the admin UI
+    - ?pagination=cursor      -> keyset pagination on (created_at, id),
+      or ?cursor=<token>         constant cost at any depth (mobile feeds)
+
+Keyset mode only applies when the queryset is ordered newest-first on the
+view's `keyset_field` (default "created_at"); anything else (e.g.
+?ordering=title or fuzzy-search relevance) silently stays on page numbers.
+"""
+
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from urllib import parse
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+Keyset = namedtuple("Keyset", ["position", "pk", "reverse"])
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    keyset_field = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_keyset_field(self, view):
+        return getattr(view, "keyset_field", self.keyset_field)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, cursor = self.keyset_queryset(queryset, request, view)
+        return self.set_page(list(queryset), cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset, cursor = self.keyset_queryset(queryset, request, view)
+        return self.set_page([row async for row in queryset], cursor)
+
+    def keyset_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field = field = self.get_keyset_field(view)
+
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            queryset = queryset.order_by(f"-{field}", "-pk")
+        elif cursor.reverse:
+            # Walk backwards (ascending) from the cursor, flip afterwards
+            queryset = queryset.filter(
+                Q(**{f"{field}__gt": cursor.position})
+                | Q(**{field: cursor.position, "pk__gt": cursor.pk})
+            ).order_by(field, "pk")
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": cursor.position})
+                | Q(**{field: cursor.position, "pk__lt": cursor.pk})
+            ).order_by(f"-{field}", "-pk")
+
+        # Fetch one extra row to know whether another page exists
+        return queryset[: self.page_size + 1], cursor
+
+    def set_page(self, rows, cursor):
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+
+        if cursor is not None and cursor.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        return self.page
+
+    # ---------------------------------------------------
+    # Cursor encoding
+    # ---------------------------------------------------
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position = parse_datetime(tokens["p"][0])
+            pk = int(tokens["i"][0])
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+        except (KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return Keyset(position=position, pk=pk, reverse=reverse)
+
+    def encode_cursor(self, row, reverse=False):
+        tokens = {
+            "p": self._get_value(row, self.field).isoformat(),
+            "i": str(self._get_value(row, "pk")),
+        }
+        if reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _get_value(row, name):
+        if isinstance(row, dict):
+            return row["id"] if name == "pk" else row[name]
+        return getattr(row, name)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class FeedPageNumberPagination(PageNumberPagination):
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() with the COUNT and page fetch on the async ORM."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property; fill it so page() never
+        # runs the COUNT synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        self.page.object_list = [row async for row in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
+
+
+class FeedPagination(BasePagination):
+    """
+    Page numbers by default, keyset pagination when the client opts in
+    with ?pagination=cursor (or sends a ?cursor= token from a previous page).
+    """
+
+    mode_query_param = "pagination"
+    page_class = FeedPageNumberPagination
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, queryset, request, view):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode == "page":
+            return False
+        if mode != "cursor" and self.keyset_class.cursor_query_param not in request.query_params:
+            return False
+
+        field = getattr(view, "keyset_field", self.keyset_class.keyset_field)
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        return bool(ordering) and ordering[0] == f"-{field}"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.choose_paginator(queryset, request, view)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """For the async read views (core/async_views.py)."""
+        self.paginator = self.choose_paginator(queryset, request, view)
+        return await self.paginator.apaginate_queryset(queryset, request, view)
+
+    def choose_paginator(self, queryset, request, view):
+        if self.use_keyset(queryset, request, view):
+            return self.keyset_class()
+        return self.page_class()
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_class().get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return getattr(getattr(self, "paginator", None), "display_page_controls", False)
+
+    def to_html(self):
+        return self.paginator.to_html()
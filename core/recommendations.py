@@ -0,0 +1,245 @@
+"""
+READERS ALSO LIKED (item-to-item, GET /api/books/{id}/similar/):
+
+Every (user, book) pair gets an interest weight, the strongest of
+
+    the book is on the user's wishlist    WEIGHTS["wishlist"]
+    the user requested the book           WEIGHTS["request"]
+    the user rated the book               WEIGHTS["rating"][rating]
+
+Each book is a sparse vector over users, and the similarity of two books
+is the cosine of their vectors. The full matrix is never built. A book's
+dot products come from walking its readers' other books through dict
+inverted indexes, which is exactly what the sparse product M^T M would
+compute. Only the TOP_K neighbours per book are kept, ranked, in
+SimilarBook.
+
+Refreshing:
+    - `manage.py rebuild_similar_books` recomputes every book (nightly)
+    - Wishlist / Feedback / BookRequest changes mark their book in
+      StaleSimilarity and schedule one "core.refresh_similar_books" job per
+      REFRESH_DELAY window. That job recomputes the stale books plus every
+      book that shares a reader with one of them or lists one as a
+      neighbour; those are the only rows whose cosines can change. It only
+      reads the interests of the readers those cosines depend on: the
+      readers of the stale books, of the books being recomputed, and of
+      every book those readers have (for its norm), so a run scales with
+      the change rather than the whole catalogue.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import enqueue_debounced
+from .models import BookRequest, Feedback, SimilarBook, StaleSimilarity, Wishlist
+from .notifications import chunked
+
+
+DEFAULTS = {
+    "TOP_K": 20,
+    "MIN_COMMON_READERS": 1,
+    # Readers with more books keep only their strongest interests
+    "MAX_BOOKS_PER_READER": 500,
+    "REFRESH_DELAY": 60,
+    "WEIGHTS": {
+        "wishlist": 1.0,
+        "request": 2.0,
+        # ratings below 3 are not a sign of interest
+        "rating": {5: 2.0, 4: 1.5, 3: 0.5},
+    },
+}
+
+WRITE_BATCH_SIZE = 500
+
+
+def recommendation_settings():
+    return {**DEFAULTS, **getattr(settings, "RECOMMENDATIONS", {})}
+
+
+# ------------------------------------------------------------
+# Interest vectors
+# ------------------------------------------------------------
+# (model, user column) of every source of interest
+INTEREST_SOURCES = (
+    (Wishlist, "user_id"),
+    (BookRequest, "requester_id"),
+    (Feedback, "user_id"),
+)
+
+
+def load_interests(conf, user_ids=None):
+    """
+    {user_id: {book_id: weight}} from wishlists, requests and feedback, for
+    every user or only `user_ids`.
+    """
+    weights = conf["WEIGHTS"]
+    interests = defaultdict(dict)
+
+    def add(user_id, book_id, weight):
+        if weight and weight > interests[user_id].get(book_id, 0):
+            interests[user_id][book_id] = weight
+
+    def rows(model, user_field, *fields):
+        queryset = model.objects.values_list(user_field, "book_id", *fields)
+        if user_ids is None:
+            yield from queryset.iterator()
+            return
+        for chunk in chunked(sorted(user_ids), WRITE_BATCH_SIZE):
+            yield from queryset.filter(**{f"{user_field}__in": chunk}).iterator()
+
+    for user_id, book_id in rows(Wishlist, "user_id"):
+        add(user_id, book_id, weights["wishlist"])
+    for user_id, book_id in rows(BookRequest, "requester_id"):
+        add(user_id, book_id, weights["request"])
+    for user_id, book_id, rating in rows(Feedback, "user_id", "rating"):
+        add(user_id, book_id, weights["rating"].get(rating, 0))
+
+    limit = conf["MAX_BOOKS_PER_READER"]
+    for user_id, books in interests.items():
+        if len(books) > limit:
+            interests[user_id] = dict(heapq.nlargest(limit, books.items(), key=lambda i: i[1]))
+    return interests
+
+
+def readers_of(book_ids):
+    """Ids of the users with a wishlist entry, request or rating for `book_ids`."""
+    users = set()
+    for chunk in chunked(sorted(book_ids), WRITE_BATCH_SIZE):
+        for model, user_field in INTEREST_SOURCES:
+            users.update(
+                model.objects.filter(book_id__in=chunk).values_list(user_field, flat=True)
+            )
+    return users
+
+
+class SimilarityIndex:
+    def __init__(self, interests, conf):
+        self.interests = interests
+        self.top_k = conf["TOP_K"]
+        self.min_common = conf["MIN_COMMON_READERS"]
+
+        self.readers = defaultdict(dict)
+        for user_id, books in interests.items():
+            for book_id, weight in books.items():
+                self.readers[book_id][user_id] = weight
+        self.norms = {
+            book_id: math.sqrt(sum(w * w for w in readers.values()))
+            for book_id, readers in self.readers.items()
+        }
+
+    def co_read(self, book_id):
+        """Books sharing at least one reader with `book_id`."""
+        books = set()
+        for user_id in self.readers.get(book_id, ()):
+            books.update(self.interests[user_id])
+        books.discard(book_id)
+        return books
+
+    def neighbours(self, book_id):
+        """[(score, other_id), ...] best first (ties: lower id), at most TOP_K."""
+        dots = defaultdict(float)
+        common = defaultdict(int)
+        for user_id, weight in self.readers.get(book_id, {}).items():
+            for other_id, other_weight in self.interests[user_id].items():
+                if other_id != book_id:
+                    dots[other_id] += weight * other_weight
+                    common[other_id] += 1
+
+        norm = self.norms.get(book_id)
+        scored = (
+            (dot / (norm * self.norms[other_id]), other_id)
+            for other_id, dot in dots.items()
+            if common[other_id] >= self.min_common
+        )
+        return heapq.nlargest(self.top_k, scored, key=lambda item: (item[0], -item[1]))
+
+
+def store(index, book_ids):
+    """Replace the SimilarBook rows of `book_ids`. Returns rows written."""
+    written = 0
+    for chunk in chunked(sorted(book_ids), WRITE_BATCH_SIZE):
+        rows = [
+            SimilarBook(book_id=book_id, similar_id=other_id, score=score, rank=rank)
+            for book_id in chunk
+            for rank, (score, other_id) in enumerate(index.neighbours(book_id), start=1)
+        ]
+        with transaction.atomic():
+            SimilarBook.objects.filter(book_id__in=chunk).delete()
+            SimilarBook.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+# ------------------------------------------------------------
+# Full rebuild / incremental refresh
+# ------------------------------------------------------------
+def rebuild_similar_books():
+    """Recompute every book. Returns (books, rows written)."""
+    conf = recommendation_settings()
+    index = SimilarityIndex(load_interests(conf), conf)
+    # Books that lost all their readers still have rows to clear
+    targets = set(index.readers) | set(
+        SimilarBook.objects.values_list("book_id", flat=True).distinct()
+    )
+    written = store(index, targets)
+    StaleSimilarity.objects.all().delete()
+    return len(targets), written
+
+
+def refresh_stale_similarities():
+    """Recompute the books marked stale and the rows they affect."""
+    started = timezone.now()
+    stale = list(StaleSimilarity.objects.values_list("book_id", flat=True))
+    if not stale:
+        return 0, 0
+
+    conf = recommendation_settings()
+    interests, loaded = {}, set()
+
+    def load_readers(book_ids):
+        users = readers_of(book_ids) - loaded
+        loaded.update(users)
+        interests.update(load_interests(conf, users))
+
+    # Readers of the stale books: their other books are the co-read ones
+    load_readers(stale)
+    nearby = SimilarityIndex(interests, conf)
+    targets = set(stale)
+    for book_id in stale:
+        targets |= nearby.co_read(book_id)
+    for chunk in chunked(stale, WRITE_BATCH_SIZE):
+        targets.update(
+            SimilarBook.objects.filter(similar_id__in=chunk).values_list("book_id", flat=True)
+        )
+
+    # Every reader of a target (its dot products), then every reader of
+    # the books those readers have (their norms)
+    load_readers(targets)
+    load_readers({book_id for books in interests.values() for book_id in books})
+
+    index = SimilarityIndex(interests, conf)
+    written = store(index, targets)
+    # Marks refreshed while we were computing stay for the next run
+    for chunk in chunked(stale, WRITE_BATCH_SIZE):
+        StaleSimilarity.objects.filter(book_id__in=chunk, marked_at__lte=started).delete()
+    return len(targets), written
+
+
+def mark_stale(book_ids):
+    """Called from core/signals.py when a book's readers change."""
+    StaleSimilarity.objects.bulk_create(
+        [StaleSimilarity(book_id=book_id) for book_id in book_ids],
+        update_conflicts=True,
+        update_fields=["marked_at"],
+        unique_fields=["book_id"],
+    )
+    transaction.on_commit(schedule_refresh)
+
+
+def schedule_refresh():
+    enqueue_debounced("core.refresh_similar_books", recommendation_settings()["REFRESH_DELAY"])
@@ -0,0 +1,104 @@
+"""
+READ REPLICAS (DATABASE_ROUTERS, see also core/middleware.py):
+
+ReplicaRoutingMiddleware opens a routing scope for each request:
+
+    - GET / HEAD / OPTIONS      -> reads of REPLICA_ROUTING["APPS"] models go
+                                   to one replica, picked once per request
+    - any other method          -> everything on "default"
+    - writes, select_for_update -> always "default" (db_for_write)
+    - inside transaction.atomic -> reads stay on "default"
+    - outside a request (jobs, commands, signals) -> "default"
+
+Read-your-writes: once a request has written, its user is pinned to the
+primary for STICKY_SECONDS (a key in the CACHE_ALIAS cache, so use a
+shared cache with several processes). The user is taken from the JWT in
+the Authorization header, or from the session. So after approving a
+request in BookRequestViewSet.update, the owner's next GETs read what
+they just wrote. Other users can see the old value for as long as the
+replica lags.
+
+Replicas are never migrated; they get their schema through replication.
+To try it locally with SQLite, point a replica alias at a copy of the
+database file. Re-copy the file to "replicate".
+"""
+
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+DEFAULTS = {
+    "REPLICAS": [],
+    "APPS": ["core", "accounts", "auth"],
+    "STICKY_SECONDS": 5,
+    "CACHE_ALIAS": "default",
+}
+
+
+def replica_settings():
+    return {**DEFAULTS, **getattr(settings, "REPLICA_ROUTING", {})}
+
+
+class RoutingState:
+    def __init__(self, replica=None):
+        # Alias this request may read from; None = primary only
+        self.replica = replica
+        self.wrote = False
+
+
+routing_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+# ------------------------------------------------------------
+# Read-your-writes pins
+# ------------------------------------------------------------
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    conf = replica_settings()
+    caches[conf["CACHE_ALIAS"]].set(
+        _pin_key(user_id), time.time() + conf["STICKY_SECONDS"], conf["STICKY_SECONDS"]
+    )
+
+
+def is_pinned(user_id):
+    until = caches[replica_settings()["CACHE_ALIAS"]].get(_pin_key(user_id))
+    return until is not None and until > time.time()
+
+
+# ------------------------------------------------------------
+# Router
+# ------------------------------------------------------------
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or state.replica is None or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label not in replica_settings()["APPS"]:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replica_settings()["REPLICAS"]}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_settings()["REPLICAS"]:
+            return False
+        return None
@@ -0,0 +1,112 @@
+"""
+PERIODIC JOBS (`manage.py run_scheduler`):
+
+    SCHEDULER = {"JOBS": {"core.sweep_overdue_rentals": 3600}}
+
+The scheduler enqueues every job once per its interval, with the
+idempotency key "schedule:<name>:<slot>", and `manage.py runworker` runs
+them like any other job. Several schedulers can run side by side: the key
+keeps each slot to one job.
+
+Sweeps (core/overdue.py) keep a SweepMark row: a high-water mark, so each
+run only reads rows past the last one it handled, plus counters of rows
+scanned. /api/metrics/ reports them under "sweeps".
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import SweepMark
+
+
+DEFAULTS = {
+    "JOBS": {},
+    # Seconds between scheduler ticks
+    "TICK": 30,
+}
+
+
+def scheduler_settings():
+    return {**DEFAULTS, **getattr(settings, "SCHEDULER", {})}
+
+
+# ------------------------------------------------------------
+# Scheduler
+# ------------------------------------------------------------
+class Scheduler:
+    def __init__(self, jobs=None):
+        self.jobs = scheduler_settings()["JOBS"] if jobs is None else jobs
+        self.slots = {}
+
+    def tick(self, now=None):
+        """Enqueue the jobs whose interval started since the last tick."""
+        now = time.time() if now is None else now
+        enqueued = []
+        for name, interval in self.jobs.items():
+            slot = int(now // interval)
+            # Restarts and other schedulers are covered by the key
+            if self.slots.get(name) == slot:
+                continue
+            enqueue(name, key=f"schedule:{name}:{slot}")
+            self.slots[name] = slot
+            enqueued.append(name)
+        return enqueued
+
+
+# ------------------------------------------------------------
+# Sweep high-water marks
+# ------------------------------------------------------------
+@contextmanager
+def locked_mark(name):
+    """The SweepMark `name`, row-locked for one transaction."""
+    SweepMark.objects.get_or_create(name=name)
+    with transaction.atomic():
+        yield SweepMark.objects.select_for_update().get(name=name)
+
+
+def record_run(name, scanned, processed, duration_ms):
+    with locked_mark(name) as mark:
+        mark.runs += 1
+        mark.rows_scanned += scanned
+        mark.last_scanned = scanned
+        mark.last_processed = processed
+        mark.last_duration_ms = round(duration_ms, 3)
+        mark.last_run_at = timezone.now()
+        mark.save()
+
+
+def sweep_stats():
+    return {
+        mark.name: {
+            "runs": mark.runs,
+            "rows_scanned": mark.rows_scanned,
+            "last_scanned": mark.last_scanned,
+            "last_processed": mark.last_processed,
+            "last_duration_ms": mark.last_duration_ms,
+            "last_run_at": mark.last_run_at,
+            "position_at": mark.position_at,
+        }
+        for mark in SweepMark.objects.order_by("name")
+    }
+
+
+PROMETHEUS_SERIES = (
+    ("booknest_sweep_runs_total", "counter", "runs"),
+    ("booknest_sweep_rows_scanned_total", "counter", "rows_scanned"),
+    ("booknest_sweep_last_rows_scanned", "gauge", "last_scanned"),
+    ("booknest_sweep_last_duration_ms", "gauge", "last_duration_ms"),
+)
+
+
+def as_prometheus(stats):
+    lines = []
+    for metric, kind, field in PROMETHEUS_SERIES:
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, entry in sorted(stats.items()):
+            lines.append(f'{metric}{{sweep="{name}"}} {entry[field]}')
+    return "\n".join(lines) + "\n"
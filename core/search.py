@@ -0,0 +1,256 @@
+"""
+BOOK SEARCH BACKENDS:
+
+Used by BookViewSet.fuzzy_search (?q=). The backend is picked from
+settings.BOOK_SEARCH["BACKEND"]:
+
+    - "trigram": two-phase search on Postgres
+        1. candidate set via the pg_trgm GIN indexes (migration 0012): the
+           CANDIDATE_LIMIT best `%` / `%>` matches by weighted similarity.
+           The operators match against CANDIDATE_THRESHOLDS (pg_trgm's own
+           defaults), set with SET LOCAL for this one query
+        2. weighted similarity ranking over the candidates only, keeping
+           those above MIN_SIMILARITY
+    - "legacy":  the original full-scan sum of TrigramSimilarity
+    - "simple":  icontains matching for databases without pg_trgm (SQLite)
+    - "auto":    "trigram" on Postgres, "simple" everywhere else
+
+?search= on the book list goes through FullTextSearchFilter instead of
+DRF's SearchFilter (five ILIKE '%term%' per term, no ranking):
+
+    - Postgres: core_book.search_vector (generated tsvector, GIN index,
+      migration 0022) @@ "term1:* & term2:*", so every term also matches
+      as a prefix (typeahead). Results are ordered by ts_rank with
+      FTS_WEIGHTS for title / author / description / isbn + genre, unless
+      ?ordering= is given
+    - elsewhere, or with FULL_TEXT off: DRF's SearchFilter, unchanged
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from rest_framework import filters
+
+
+SEARCH_FIELDS = ("title", "author", "description")
+
+DEFAULTS = {
+    "BACKEND": "auto",
+    "WEIGHTS": {"title": 1.0, "author": 1.0, "description": 1.0},
+    "MIN_SIMILARITY": 0.1,
+    "CANDIDATE_LIMIT": 500,
+    # pg_trgm thresholds for the `%` / `%>` candidate phase; lower values
+    # match more rows and make the index scan less selective
+    "CANDIDATE_THRESHOLDS": {"similarity": 0.3, "word_similarity": 0.6},
+    # ?search= through core_book.search_vector: "auto" = on Postgres only,
+    # True / "True" = always, anything else = never
+    "FULL_TEXT": "auto",
+    "FTS_WEIGHTS": {"title": 1.0, "author": 0.4, "description": 0.2, "other": 0.1},
+}
+
+# Must match the configs in migration 0022
+FTS_CONFIG = "english"
+
+
+def search_settings():
+    return {**DEFAULTS, **getattr(settings, "BOOK_SEARCH", {})}
+
+
+class BaseSearchBackend:
+    def __init__(
+        self, weights=None, min_similarity=None, candidate_limit=None, candidate_thresholds=None
+    ):
+        conf = search_settings()
+        self.weights = {**DEFAULTS["WEIGHTS"], **conf["WEIGHTS"], **(weights or {})}
+        self.candidate_thresholds = {
+            **DEFAULTS["CANDIDATE_THRESHOLDS"],
+            **conf["CANDIDATE_THRESHOLDS"],
+            **(candidate_thresholds or {}),
+        }
+        self.min_similarity = (
+            conf["MIN_SIMILARITY"] if min_similarity is None else min_similarity
+        )
+        self.candidate_limit = (
+            conf["CANDIDATE_LIMIT"] if candidate_limit is None else candidate_limit
+        )
+
+    def weighted(self, field):
+        return Value(float(self.weights.get(field, 0.0)), output_field=FloatField())
+
+    def search(self, queryset, query):
+        """Return `queryset` filtered to matches and ordered by `-similarity`."""
+        raise NotImplementedError
+
+
+# ------------------------------------------------------------
+# Postgres: index-backed candidates, then rank
+# ------------------------------------------------------------
+class TrigramSearchBackend(BaseSearchBackend):
+    def set_thresholds(self, using, similarity, word_similarity):
+        """SET LOCAL the `%` / `%>` thresholds. Returns the previous values."""
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('pg_trgm.similarity_threshold'),"
+                " current_setting('pg_trgm.word_similarity_threshold')"
+            )
+            previous = cursor.fetchone()
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true),"
+                " set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(similarity), str(word_similarity)],
+            )
+        return previous
+
+    def candidates(self, queryset, query):
+        # `%` / `%>` are the operators the gin_trgm_ops indexes can serve,
+        # so this phase never scans the whole table. The limit keeps the
+        # best matches, not the first ones found.
+        return (
+            queryset.filter(
+                Q(title__trigram_similar=query)
+                | Q(author__trigram_similar=query)
+                | Q(description__trigram_word_similar=query)
+            )
+            .order_by(self.rank(query).desc(), "-pk")
+            .values_list("pk", flat=True)[: self.candidate_limit]
+        )
+
+    def rank(self, query):
+        return (
+            self.weighted("title") * TrigramSimilarity("title", query)
+            + self.weighted("author") * TrigramSimilarity("author", query)
+            + self.weighted("description") * TrigramWordSimilarity(query, "description")
+        )
+
+    def search(self, queryset, query):
+        # The candidates are read here, while the thresholds are in force.
+        # is_local settings end with the transaction (or are undone with a
+        # rolled-back savepoint), so a persistent connection never carries
+        # them into other queries; inside an outer transaction they are put
+        # back explicitly.
+        thresholds = self.candidate_thresholds
+        with transaction.atomic(using=queryset.db):
+            previous = self.set_thresholds(
+                queryset.db, thresholds["similarity"], thresholds["word_similarity"]
+            )
+            candidates = list(self.candidates(queryset, query))
+            self.set_thresholds(queryset.db, *previous)
+
+        return (
+            queryset.filter(pk__in=candidates)
+            .annotate(similarity=self.rank(query))
+            .filter(similarity__gt=self.min_similarity)
+            .order_by("-similarity", "-created_at")
+        )
+
+
+class LegacyTrigramSearchBackend(BaseSearchBackend):
+    def search(self, queryset, query):
+        return (
+            queryset.annotate(
+                similarity=self.weighted("title") * TrigramSimilarity("title", query)
+                + self.weighted("author") * TrigramSimilarity("author", query)
+                + self.weighted("description")
+                * TrigramSimilarity("description", query)
+            )
+            .filter(similarity__gt=self.min_similarity)
+            .order_by("-similarity")
+        )
+
+
+# ------------------------------------------------------------
+# Fallback for databases without pg_trgm (SQLite in dev/tests)
+# ------------------------------------------------------------
+class SimpleSearchBackend(BaseSearchBackend):
+    def search(self, queryset, query):
+        match = Q()
+        score = Value(0.0, output_field=FloatField())
+        for field in SEARCH_FIELDS:
+            lookup = {f"{field}__icontains": query}
+            match |= Q(**lookup)
+            score = score + Case(
+                When(Q(**lookup), then=self.weighted(field)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+
+        return (
+            queryset.filter(match)
+            .annotate(similarity=score)
+            .order_by("-similarity", "-created_at")
+        )
+
+
+# ------------------------------------------------------------
+# ?search= filter backend
+# ------------------------------------------------------------
+def tsquery_text(terms):
+    """to_tsquery() input matching every word of `terms` as a prefix."""
+    words = (word for term in terms for word in re.findall(r"\w+", term.lower()))
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def full_text_enabled():
+    full_text = search_settings()["FULL_TEXT"]
+    if full_text == "auto":
+        return connection.vendor == "postgresql"
+    return full_text in (True, "True")
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        if not full_text_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        query = tsquery_text(self.get_search_terms(request))
+        if not query:
+            return queryset
+
+        weights = {**DEFAULTS["FTS_WEIGHTS"], **search_settings()["FTS_WEIGHTS"]}
+        # ts_rank weights are ordered {D, C, B, A}
+        rank_weights = "{%s}" % ",".join(
+            str(float(weights[field])) for field in ("other", "description", "author", "title")
+        )
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        tsquery = "to_tsquery(%s::regconfig, %s)"
+
+        queryset = queryset.filter(
+            RawSQL(
+                f"{table}.search_vector @@ {tsquery}",
+                (FTS_CONFIG, query),
+                output_field=BooleanField(),
+            )
+        ).alias(
+            search_rank=RawSQL(
+                f"ts_rank(%s::float4[], {table}.search_vector, {tsquery})",
+                (rank_weights, FTS_CONFIG, query),
+                output_field=FloatField(),
+            )
+        )
+        if request.query_params.get("ordering"):
+            return queryset
+        return queryset.order_by("-search_rank", "-created_at")
+
+
+BACKENDS = {
+    "trigram": TrigramSearchBackend,
+    "legacy": LegacyTrigramSearchBackend,
+    "simple": SimpleSearchBackend,
+}
+
+
+def get_search_backend(name=None, **options):
+    name = name or search_settings()["BACKEND"]
+    if name == "auto":
+        name = "trigram" if connection.vendor == "postgresql" else "simple"
+
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown book search backend: {name!r}")
+
+    return backend_class(**options)
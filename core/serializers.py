@@ -1,16 +1,66 @@
 from rest_framework import serializers
-from django.db.models import Avg, Count
-from .models import Announcement, Book, BookRequest, Feedback, Notification, Report, Transaction, Wishlist
+from .images import rendition_urls
+from .models import (
+    Announcement,
+    Book,
+    BookRequest,
+    ExchangeCycle,
+    ExchangeLeg,
+    Feedback,
+    Notification,
+    Report,
+    Transaction,
+    Wishlist,
+)
 
-class BookSerializer(serializers.ModelSerializer):
+
+def average_rating(rating_sum, rating_count):
+    if not rating_count:
+        return 0
+    return round(rating_sum / rating_count, 2)
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Keeps only the fields in context["sparse_fields"] and drops those in
+    context["sparse_exclude"] (?fields= / ?exclude=, see core/fieldsets.py).
+    Nested serializers are left whole.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        only = self.context.get("sparse_fields")
+        exclude = self.context.get("sparse_exclude", frozenset())
+        if parent is not None or (only is None and not exclude):
+            return fields
+
+        unknown = (exclude | (only or frozenset())) - fields.keys()
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."}
+            )
+        return {
+            name: field
+            for name, field in fields.items()
+            if (only is None or name in only) and name not in exclude
+        }
+
+
+class BookSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     avg_rating = serializers.SerializerMethodField()
     request_count = serializers.SerializerMethodField()
+    # {"thumb": {"webp": url, "jpeg": url}, "card": ..., "full": ...}
+    cover_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Book
         fields = [
-            'id', 'owner', 'title', 'author', 'description', 'isbn', 'cover', 'genre',
+            'id', 'owner', 'title', 'author', 'description', 'isbn', 'cover',
+            'cover_renditions', 'genre',
             'available_for', 'location_lat', 'location_lng',
             'created_at', 'updated_at',
             'avg_rating', 'request_count'
@@ -18,23 +68,69 @@ class BookSerializer(serializers.ModelSerializer):
         read_only_fields = ['owner', 'avg_rating', 'request_count']
 
     # --- computed fields ---
+    # Read the denormalized columns maintained by core/signals.py
     def get_avg_rating(self, obj):
-        # Use annotation if available (more efficient)
-        if hasattr(obj, "avg_rating"):
-            return round(obj.avg_rating or 0, 2)
-
-        agg = obj.feedbacks.aggregate(avg=Avg("rating"))
-        return round(agg["avg"] or 0, 2)
+        return average_rating(obj.rating_sum, obj.rating_count)
 
     def get_request_count(self, obj):
-        if hasattr(obj, "request_count"):
-            return obj.request_count
-        return obj.requests.count()
+        return obj.request_count
+
+    def get_cover_renditions(self, obj):
+        return rendition_urls(
+            obj.cover_renditions, obj.cover.name, obj.cover.storage, self.context.get("request")
+        )
+
+class NearbyBookSerializer(BookSerializer):
+    # annotated by core.geo.nearby()
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ['distance_km']
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 3)
+
+
+class SimilarBookSerializer(BookSerializer):
+    # annotated from SimilarBook.score by BookViewSet.similar
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ['score']
+
+class ExchangeLegSerializer(serializers.ModelSerializer):
+    giver_username = serializers.CharField(source="giver.username", read_only=True)
+    receiver_username = serializers.CharField(source="receiver.username", read_only=True)
+    book_title = serializers.CharField(source="book.title", read_only=True)
+    book_author = serializers.CharField(source="book.author", read_only=True)
+
+    class Meta:
+        model = ExchangeLeg
+        fields = [
+            "position",
+            "giver",
+            "giver_username",
+            "receiver",
+            "receiver_username",
+            "book",
+            "book_title",
+            "book_author",
+        ]
+
+
+class ExchangeCycleSerializer(serializers.ModelSerializer):
+    legs = ExchangeLegSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ExchangeCycle
+        fields = ["id", "size", "created_at", "legs"]
+
 
 class BookRequestSerializer(serializers.ModelSerializer):
     # 🔹 Computed / read-only fields for frontend
     book_title = serializers.CharField(source="book.title", read_only=True)
     book_cover = serializers.ImageField(source="book.cover", read_only=True)
+    book_cover_renditions = serializers.SerializerMethodField()
     requester_username = serializers.CharField(
         source="requester.username", read_only=True
     )
@@ -53,10 +149,17 @@ class BookRequestSerializer(serializers.ModelSerializer):
             "book_owner_username",
             "book_title",
             "book_cover",
+            "book_cover_renditions",
             "status",
         ]
         read_only_fields = [ "requester"]
 
+    def get_book_cover_renditions(self, obj):
+        book = obj.book
+        return rendition_urls(
+            book.cover_renditions, book.cover.name, book.cover.storage, self.context.get("request")
+        )
+
     def validate(self, data):
         user = self.context["request"].user
         book = data["book"]
@@ -109,6 +212,28 @@ class BookRequestSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class RequestTransitionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=["approved", "rejected", "cancelled"])
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    # context["max_transitions"]: BULK_REQUEST_STATUS["MAX_TRANSITIONS"]
+    transitions = RequestTransitionSerializer(many=True, allow_empty=False)
+
+    def validate_transitions(self, value):
+        limit = self.context["max_transitions"]
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} transitions per call.")
+        # apply_transitions() takes {id: status}: a repeated id would be lost
+        seen, repeated = set(), set()
+        for item in value:
+            (repeated if item["id"] in seen else seen).add(item["id"])
+        if repeated:
+            raise serializers.ValidationError(
+                f"Each request can appear only once; repeated: {sorted(repeated)}."
+            )
+        return value
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -1,13 +1,23 @@
 from django.db import transaction as db_transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import BookRequest, Notification, Transaction, Book
+from .models import Announcement, BadgeCounter, BookRequest, Feedback, Notification, Transaction, Book, Wishlist
+from .stats import adjust_book_stats
+from .badges import adjust_badges
+from .jobs import enqueue
+from .cache import invalidate
+from .images import needs_renditions
+from .recommendations import mark_stale
+from . import exchanges
+from .streams import publish
+from . import tasks  # noqa: F401  (registers job handlers)
 
 
 """
 SIGNAL BEHAVIOR SUMMARY:
 
 1️⃣ When a BookRequest is saved with status == "approved":
+    - a background job is enqueued (core/tasks.py, run by `manage.py runworker`)
     - A Transaction is created automatically (unless it already exists)
     - RENT:
         -> book becomes unavailable (available_for = "none")
@@ -19,11 +29,44 @@ SIGNAL BEHAVIOR SUMMARY:
         -> swap ownership between both books
         -> both books become unavailable
         -> if missing or invalid exchange_book -> create admin notification
+    - POST /api/bookrequests/bulk-status/ uses .update() and applies these
+      effects itself, in its own transaction (core/transitions.py)
 
 2️⃣ When a Transaction is saved with status == "returned":
     - ONLY for RENT:
         -> book becomes available again (available_for = "rent")
-        -> notify wishlist users
+        -> notify wishlist users (background job doing batched
+           bulk_create, see core/notifications.py)
+
+3️⃣ When a Feedback or BookRequest is created / updated / deleted:
+    - Book.rating_sum, rating_count and request_count are adjusted
+      in place (see core/stats.py)
+
+4️⃣ When a Book is saved with a new / removed cover:
+    - a background job renders thumb / card / full copies (core/images.py)
+
+5️⃣ When a Book, Feedback, BookRequest or Announcement changes:
+    - the public response cache for that catalogue is invalidated
+      after commit (see core/cache.py)
+
+6️⃣ When a Notification or BookRequest is created / updated / deleted,
+   or a Book changes owner:
+    - the affected users' badge counters (unread notifications,
+      pending incoming requests) are adjusted (see core/badges.py)
+
+7️⃣ When a Wishlist entry, Feedback or BookRequest is added / removed,
+   or a rating changes:
+    - the book is marked stale and a debounced job recomputes its
+      "readers also liked" neighbours (see core/recommendations.py)
+
+8️⃣ When a Wishlist entry is added / removed, or a Book enters / leaves
+   exchange or changes owner:
+    - the users are marked stale and a debounced job searches for
+      2- and 3-way exchange cycles through them (see core/exchanges.py)
+
+9️⃣ When a Notification is created (one by one or through bulk_notify):
+    - the recipient's open /api/notifications/stream/ connections are
+      woken after commit (see core/streams.py)
 """
 
 
@@ -35,82 +78,13 @@ def create_transaction_after_approval(sender, instance, created, **kwargs):
     if instance.status != "approved":
         return
 
-    book = instance.book
-    requester = instance.requester
-    req_type = instance.request_type
-
-    # Avoid duplicate transactions
-    exists = Transaction.objects.filter(
-        book=book,
-        borrower=requester,
-        owner=book.owner,
-        transaction_type=req_type,
-        status="received"
-    ).exists()
-
-    if exists:
-        return
-
-    # All operations are atomic (safe)
-    with db_transaction.atomic():
-
-        # Create Transaction record
-        txn = Transaction.objects.create(
-            book=book,
-            owner=book.owner,
-            borrower=requester,
-            transaction_type=req_type,
-            status="received"
-        )
-
-        # --------------------------------------------------------
-        # RENT LOGIC
-        # --------------------------------------------------------
-        if req_type == "rent":
-            book.available_for = "none"
-            book.save(update_fields=["available_for"])
-
-        # --------------------------------------------------------
-        # DONATE LOGIC
-        # (Book permanently belongs to requester)
-        # --------------------------------------------------------
-        elif req_type == "donate":
-            book.owner = requester
-            book.available_for = "none"
-            book.save(update_fields=["owner_id", "available_for"])
-
-        # --------------------------------------------------------
-        # EXCHANGE LOGIC
-        # (Swap ownership of two books)
-        # --------------------------------------------------------
-        elif req_type == "exchange":
-            exchange_book = getattr(instance, "exchange_book", None)
-
-            # Must exist AND belong to requester
-            if exchange_book and exchange_book.owner == requester:
-                original_owner = book.owner
-
-                # Swap owners
-                book.owner = requester
-                exchange_book.owner = original_owner
-
-                # Both books become unavailable after exchange
-                book.available_for = "none"
-                exchange_book.available_for = "none"
-
-                # Save
-                book.save(update_fields=["owner_id", "available_for"])
-                exchange_book.save(update_fields=["owner_id", "available_for"])
-
-            else:
-                # Missing or invalid exchange_book → create admin notification
-                Notification.objects.create(
-                    user=book.owner,
-                    message=(
-                        f"Exchange request #{instance.id} approved but missing/invalid "
-                        f"exchange_book. Please complete the exchange manually."
-                    )
-                )
+    # Transaction + ownership changes run in a background job (core/tasks.py);
+    # the key makes repeated saves of an approved request enqueue it once.
+    enqueue(
+        "core.apply_approved_request",
+        {"request_id": instance.pk},
+        key=f"approve-request:{instance.pk}",
+    )
 
 
 # ----------------------------------------------------------------------
@@ -128,17 +102,282 @@ def notify_on_book_return(sender, instance, **kwargs):
         book.available_for = "rent"
         book.save(update_fields=["available_for"])
 
-    # Notify wishlist users (if related_name is 'wishlist_users')
-    try:
-        wishlist_entries = book.wishlist_users.all()
-    except Exception:
-        # fallback if related_name not set
-        wishlist_entries = getattr(book, "wishlist_set", []).all()
-
-    for item in wishlist_entries:
-        # item may be Wishlist or User depending on model
-        user = item.user if hasattr(item, "user") else item
-        Notification.objects.create(
-            user=user,
-            message=f"The book '{book.title}' is now available again!"
+    # Notify wishlist users in bulk from a background job
+    enqueue(
+        "core.notify_wishlist_users",
+        {
+            "book_id": book.pk,
+            "message": f"The book '{book.title}' is now available again!",
+        },
+        key=f"book-returned:{instance.pk}",
+    )
+
+
+# ----------------------------------------------------------------------
+# Cover uploaded / replaced / removed → (re)build renditions off-thread
+# ----------------------------------------------------------------------
+@receiver(post_save, sender=Book)
+def schedule_cover_renditions(sender, instance, **kwargs):
+    if not needs_renditions(instance.cover, instance.cover_renditions):
+        return
+
+    enqueue(
+        "core.book_cover_renditions",
+        {"book_id": instance.pk},
+        key=f"renditions:book:{instance.pk}:{instance.cover.name}" if instance.cover else None,
+    )
+
+
+# ----------------------------------------------------------------------
+# Denormalized Book aggregates (rating_sum / rating_count / request_count)
+# ----------------------------------------------------------------------
+def _stash_previous(instance, update_fields, tracked, *fields):
+    """Remember the stored values of `fields` before an update."""
+    instance._previous = None
+    if instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(tracked):
+        return
+    instance._previous = (
+        type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    )
+
+
+@receiver(pre_save, sender=Feedback)
+def remember_feedback_rating(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(
+        instance, update_fields, ("book", "book_id", "rating"), "book_id", "rating"
+    )
+
+
+@receiver(post_save, sender=Feedback)
+def update_rating_stats(sender, instance, created, **kwargs):
+    if created:
+        adjust_book_stats(
+            Book, instance.book_id, rating_sum=instance.rating, rating_count=1
+        )
+        return
+
+    previous = getattr(instance, "_previous", None)
+    if previous is None:
+        return
+
+    if previous["book_id"] != instance.book_id:
+        adjust_book_stats(
+            Book, previous["book_id"], rating_sum=-previous["rating"], rating_count=-1
+        )
+        adjust_book_stats(
+            Book, instance.book_id, rating_sum=instance.rating, rating_count=1
+        )
+    else:
+        adjust_book_stats(
+            Book, instance.book_id, rating_sum=instance.rating - previous["rating"]
+        )
+
+
+@receiver(post_delete, sender=Feedback)
+def remove_rating_stats(sender, instance, **kwargs):
+    adjust_book_stats(
+        Book, instance.book_id, rating_sum=-instance.rating, rating_count=-1
+    )
+
+
+@receiver(pre_save, sender=BookRequest)
+def remember_request_book(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(
+        instance, update_fields, ("book", "book_id", "status"), "book_id", "status"
+    )
+
+
+@receiver(post_save, sender=BookRequest)
+def update_request_stats(sender, instance, created, **kwargs):
+    if created:
+        adjust_book_stats(Book, instance.book_id, request_count=1)
+        return
+
+    previous = getattr(instance, "_previous", None)
+    if previous and previous["book_id"] != instance.book_id:
+        adjust_book_stats(Book, previous["book_id"], request_count=-1)
+        adjust_book_stats(Book, instance.book_id, request_count=1)
+
+
+@receiver(post_delete, sender=BookRequest)
+def remove_request_stats(sender, instance, **kwargs):
+    adjust_book_stats(Book, instance.book_id, request_count=-1)
+
+
+# ----------------------------------------------------------------------
+# Badge counters (core/badges.py)
+# ----------------------------------------------------------------------
+def _book_owner_id(book_id):
+    return Book.objects.filter(pk=book_id).values_list("owner_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Notification)
+def remember_notification_state(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(
+        instance, update_fields, ("user", "user_id", "is_read"), "user_id", "is_read"
+    )
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_badge(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if created:
+        previous = {"user_id": instance.user_id, "is_read": True}
+    if previous is None:
+        return
+
+    was_unread = not previous["is_read"]
+    is_unread = not instance.is_read
+    if previous["user_id"] != instance.user_id:
+        adjust_badges(BadgeCounter, [previous["user_id"]], unread_notifications=-was_unread)
+        adjust_badges(BadgeCounter, [instance.user_id], unread_notifications=is_unread)
+    else:
+        adjust_badges(
+            BadgeCounter, [instance.user_id], unread_notifications=is_unread - was_unread
+        )
+
+
+@receiver(post_delete, sender=Notification)
+def remove_unread_badge(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_badges(BadgeCounter, [instance.user_id], unread_notifications=-1)
+
+
+@receiver(post_save, sender=BookRequest)
+def update_pending_badge(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if created:
+        previous = {"book_id": instance.book_id, "status": None}
+    if previous is None:
+        return
+
+    was_pending = previous["status"] == "pending"
+    is_pending = instance.status == "pending"
+    if previous["book_id"] != instance.book_id:
+        adjust_badges(
+            BadgeCounter, [_book_owner_id(previous["book_id"])], pending_requests=-was_pending
+        )
+        adjust_badges(
+            BadgeCounter, [_book_owner_id(instance.book_id)], pending_requests=is_pending
+        )
+    elif was_pending != is_pending:
+        adjust_badges(
+            BadgeCounter,
+            [_book_owner_id(instance.book_id)],
+            pending_requests=is_pending - was_pending,
         )
+
+
+@receiver(pre_delete, sender=BookRequest)
+def remember_request_owner(sender, instance, **kwargs):
+    # The book may be deleted in the same cascade before post_delete runs
+    instance._book_owner_id = _book_owner_id(instance.book_id)
+
+
+@receiver(post_delete, sender=BookRequest)
+def remove_pending_badge(sender, instance, **kwargs):
+    if instance.status == "pending":
+        adjust_badges(
+            BadgeCounter,
+            [getattr(instance, "_book_owner_id", None)],
+            pending_requests=-1,
+        )
+
+
+@receiver(pre_save, sender=Book)
+def remember_book_owner(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(
+        instance, update_fields, ("owner", "owner_id", "available_for"),
+        "owner_id", "available_for",
+    )
+
+
+@receiver(post_save, sender=Book)
+def move_pending_badges(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if created or previous is None or previous["owner_id"] == instance.owner_id:
+        return
+
+    pending = BookRequest.objects.filter(book=instance, status="pending").count()
+    adjust_badges(BadgeCounter, [previous["owner_id"]], pending_requests=-pending)
+    adjust_badges(BadgeCounter, [instance.owner_id], pending_requests=pending)
+
+
+# ----------------------------------------------------------------------
+# Public response cache invalidation (core/cache.py)
+# ----------------------------------------------------------------------
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Feedback)
+@receiver([post_save, post_delete], sender=BookRequest)
+def invalidate_book_cache(sender, **kwargs):
+    db_transaction.on_commit(lambda: invalidate("books"))
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def invalidate_announcement_cache(sender, **kwargs):
+    db_transaction.on_commit(lambda: invalidate("announcements"))
+
+
+# ----------------------------------------------------------------------
+# Readers also liked (core/recommendations.py)
+# ----------------------------------------------------------------------
+@receiver(post_save, sender=Wishlist)
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=BookRequest)
+def mark_similarities_stale(sender, instance, created, **kwargs):
+    # Status / comment edits don't change who is interested in the book
+    if created or sender is Feedback:
+        mark_stale([instance.book_id])
+
+
+@receiver(post_delete, sender=Wishlist)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=BookRequest)
+def mark_similarities_stale_on_delete(sender, instance, **kwargs):
+    mark_stale([instance.book_id])
+
+
+# ----------------------------------------------------------------------
+# Exchange cycle matching (core/exchanges.py)
+# ----------------------------------------------------------------------
+@receiver(post_save, sender=Wishlist)
+def mark_wisher_exchanges_stale(sender, instance, created, **kwargs):
+    if created:
+        exchanges.mark_stale([instance.user_id])
+
+
+@receiver(post_delete, sender=Wishlist)
+def mark_wisher_exchanges_stale_on_delete(sender, instance, **kwargs):
+    exchanges.mark_stale([instance.user_id])
+
+
+@receiver(post_save, sender=Book)
+def mark_owner_exchanges_stale(sender, instance, created, **kwargs):
+    # A new book has no wishers yet
+    previous = getattr(instance, "_previous", None)
+    if created or previous is None:
+        return
+    if "exchange" not in (previous["available_for"], instance.available_for):
+        return
+    if (previous["owner_id"], previous["available_for"]) != (
+        instance.owner_id, instance.available_for
+    ):
+        exchanges.mark_stale([previous["owner_id"], instance.owner_id])
+
+
+@receiver(post_delete, sender=Book)
+def mark_owner_exchanges_stale_on_delete(sender, instance, **kwargs):
+    if instance.available_for == "exchange":
+        exchanges.mark_stale([instance.owner_id])
+
+
+# ----------------------------------------------------------------------
+# Live notification streams (core/streams.py)
+# ----------------------------------------------------------------------
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+    if created:
+        user_id = instance.user_id
+        db_transaction.on_commit(lambda: publish([user_id]))
@@ -0,0 +1,47 @@
+"""
+DENORMALIZED BOOK AGGREGATES:
+
+Book.rating_sum / rating_count / request_count replace the per-request
+Avg("feedbacks__rating") / Count("requests") annotations. They are
+adjusted with single-row F() UPDATEs from core/signals.py and can be
+recomputed from scratch with `manage.py rebuild_book_stats`. Book.save()
+leaves them out of full saves, so a PATCH of a book loaded before an
+increment can't write the old value back.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def adjust_book_stats(book_model, book_id, **deltas):
+    """Apply `field=delta` increments to one book without loading it."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not book_id or not deltas:
+        return
+    # Clamped at zero: a drifted counter must never make a delete fail
+    book_model.objects.filter(pk=book_id).update(
+        **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+    )
+
+
+def rebuild_book_stats(book_queryset, feedback_model, request_model):
+    """Recompute all aggregates for `book_queryset` in one UPDATE."""
+
+    def book_total(model, expression):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(book=OuterRef("pk"))
+                .order_by()
+                .values("book")
+                .annotate(total=expression)
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    return book_queryset.update(
+        rating_sum=book_total(feedback_model, Sum("rating")),
+        rating_count=book_total(feedback_model, Count("pk")),
+        request_count=book_total(request_model, Count("pk")),
+    )
@@ -0,0 +1,304 @@
+"""
+NOTIFICATION STREAM (GET /api/notifications/stream/, served by booknest/asgi.py):
+
+A text/event-stream with one event per new Notification of the caller:
+
+    id: 1234
+    event: notification
+    data: {"id": 1234, "message": "...", "is_read": false, ...}
+
+- The stream resumes after the Last-Event-ID header (EventSource sends it
+  when reconnecting) or ?last_event_id=. Missed notifications are replayed
+  from the table. Without either, it starts after the newest notification,
+  so only new ones are pushed.
+- An idle stream holds no thread and no database connection. It waits on
+  an asyncio.Event until the process's bus reports a notification for its
+  user, then reads the new rows.
+- Buses (NOTIFICATION_STREAM["BACKEND"]):
+      postgres  one LISTEN connection per process; writers pg_notify() the
+                recipient ids on CHANNEL after commit
+      local     in-process only (tests, SQLite, a single server process)
+- A ": keepalive" comment goes out every KEEPALIVE seconds, so proxies
+  keep idle connections open and streams of clients that left are closed.
+
+Polling GET /api/notifications/ keeps working for clients without SSE.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Max
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS = {
+    # None = "postgres" on PostgreSQL, "local" otherwise
+    "BACKEND": None,
+    "CHANNEL": "booknest_notifications",
+    "KEEPALIVE": 20,
+    # EventSource reconnect delay sent to clients (ms)
+    "RETRY_MS": 3000,
+    "REPLAY_LIMIT": 100,
+    # Seconds between LISTEN reconnect attempts
+    "RECONNECT_DELAY": 2,
+}
+
+# pg_notify payloads must stay under 8000 bytes
+PAYLOAD_LIMIT = 7900
+
+
+def stream_settings():
+    conf = {**DEFAULTS, **getattr(settings, "NOTIFICATION_STREAM", {})}
+    if conf["BACKEND"] is None:
+        postgres = connections["default"].vendor == "postgresql"
+        conf["BACKEND"] = "postgres" if postgres else "local"
+    return conf
+
+
+# ------------------------------------------------------------
+# Per-process fan-out to open streams
+# ------------------------------------------------------------
+class Hub:
+    """user id -> asyncio.Events of this process's open streams."""
+
+    def __init__(self):
+        self.waiters = defaultdict(set)
+        self.loop = None
+
+    def subscribe(self, user_id):
+        self.loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        self.waiters[user_id].add(event)
+        return event
+
+    def unsubscribe(self, user_id, event):
+        events = self.waiters.get(user_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self.waiters[user_id]
+
+    def wake(self, user_ids):
+        """Must run on the event loop; see wake_threadsafe()."""
+        for user_id in user_ids:
+            for event in self.waiters.get(user_id, ()):
+                event.set()
+
+    def wake_all(self):
+        self.wake(list(self.waiters))
+
+    def wake_threadsafe(self, user_ids):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wake, list(user_ids))
+
+
+class LocalBus:
+    def __init__(self, hub, conf):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, user_ids):
+        self.hub.wake_threadsafe(user_ids)
+
+
+class PostgresBus:
+    # Django connection params the LISTEN connection must not get
+    EXCLUDED_PARAMS = (
+        "context", "cursor_factory", "prepare_threshold", "server_side_binding",
+        "assume_role", "isolation_level", "pool",
+    )
+
+    def __init__(self, hub, conf):
+        self.hub = hub
+        self.channel = conf["CHANNEL"]
+        self.reconnect_delay = conf["RECONNECT_DELAY"]
+        self.task = None
+
+    def publish(self, user_ids):
+        with connections["default"].cursor() as cursor:
+            for payload in self.payloads(user_ids):
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    @staticmethod
+    def payloads(user_ids):
+        chunk = ""
+        for user_id in user_ids:
+            if len(chunk) + len(str(user_id)) + 1 > PAYLOAD_LIMIT:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk},{user_id}" if chunk else str(user_id)
+        if chunk:
+            yield chunk
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.listen())
+
+    def connect(self):
+        database = connections["default"]
+        params = database.get_connection_params()
+        for key in self.EXCLUDED_PARAMS:
+            params.pop(key, None)
+        conn = database.Database.connect(**params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    @staticmethod
+    def drain(conn):
+        """Payloads received on `conn` (psycopg2 or psycopg 3)."""
+        if hasattr(conn, "poll"):
+            conn.poll()
+            while conn.notifies:
+                yield conn.notifies.pop(0).payload
+        else:
+            pgconn = conn.pgconn
+            pgconn.consume_input()
+            while (notify := pgconn.notifies()) is not None:
+                yield notify.extra.decode()
+
+    async def listen(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                conn = await asyncio.to_thread(self.connect)
+            except Exception:
+                logger.exception("Notification stream: LISTEN connection failed")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            # Anything sent while we were disconnected was missed
+            self.hub.wake_all()
+            lost = loop.create_future()
+
+            def readable():
+                try:
+                    for payload in self.drain(conn):
+                        self.hub.wake(int(user_id) for user_id in payload.split(",") if user_id)
+                except Exception as exc:
+                    if not lost.done():
+                        lost.set_exception(exc)
+
+            loop.add_reader(conn.fileno(), readable)
+            try:
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Notification stream: LISTEN connection lost, reconnecting")
+            finally:
+                loop.remove_reader(conn.fileno())
+                conn.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+BACKENDS = {"local": LocalBus, "postgres": PostgresBus}
+
+hub = Hub()
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            conf = stream_settings()
+            _bus = BACKENDS[conf["BACKEND"]](hub, conf)
+        return _bus
+
+
+def publish(user_ids):
+    """Wake the streams of `user_ids` (call after commit)."""
+    user_ids = list(user_ids)
+    if user_ids:
+        get_bus().publish(user_ids)
+
+
+# ------------------------------------------------------------
+# The stream
+# ------------------------------------------------------------
+def format_event(notification):
+    data = json.dumps(NotificationSerializer(notification).data)
+    return f"id: {notification.pk}\nevent: notification\ndata: {data}\n\n"
+
+
+async def events(user_id, last_id, conf):
+    bus = get_bus()
+    waiter = hub.subscribe(user_id)
+    bus.start()
+    try:
+        yield f"retry: {conf['RETRY_MS']}\n\n"
+        while True:
+            # Cleared before reading, so a wake-up during the read isn't lost
+            waiter.clear()
+            rows = [
+                notification
+                async for notification in Notification.objects.filter(
+                    user_id=user_id, pk__gt=last_id
+                ).order_by("pk")[: conf["REPLAY_LIMIT"]]
+            ]
+            for notification in rows:
+                yield format_event(notification)
+                last_id = notification.pk
+            if len(rows) == conf["REPLAY_LIMIT"]:
+                continue
+
+            try:
+                await asyncio.wait_for(waiter.wait(), conf["KEEPALIVE"])
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        hub.unsubscribe(user_id, waiter)
+
+
+authenticator = CachedJWTAuthentication()
+
+
+async def notification_stream(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    try:
+        auth = await authenticator.aauthenticate(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=401)
+    user = auth[0] if auth else await request.auser()
+    if isinstance(user, AnonymousUser) or not user.is_authenticated:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401,
+            headers={"WWW-Authenticate": authenticator.authenticate_header(request)},
+        )
+
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if last_id is None or not last_id.isdigit():
+        newest = await Notification.objects.filter(user=user).aaggregate(newest=Max("pk"))
+        last_id = newest["newest"] or 0
+
+    response = StreamingHttpResponse(
+        events(user.pk, int(last_id), stream_settings()),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx: don't buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,161 @@
+"""
+SYNTHETIC DATA (`manage.py seed_synthetic`, `manage.py loadtest`):
+
+Deterministic fake users, books and activity for capacity testing.
+Row ids are assigned up front (max(id) + 1 onwards), so every table can
+be generated as a stream of plain dicts without reading anything back:
+
+    owner of book i       = user (i % users)
+    a user's books        = i, i + users, i + 2 * users, ...
+
+Rows are loaded with COPY ... FROM STDIN on PostgreSQL (executemany
+INSERTs elsewhere) in chunks of BATCH_SIZE, so memory stays flat at
+millions of rows. Neither path sends signals: the caller rebuilds the
+denormalized counters afterwards.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+
+WORDS = (
+    "river", "stone", "glass", "shadow", "garden", "winter", "silent", "empire",
+    "ocean", "forgotten", "golden", "night", "paper", "iron", "secret", "last",
+    "city", "light", "storm", "children", "summer", "kingdom", "letters", "house",
+)
+AUTHORS = (
+    "Amara Okafor", "Lena Fischer", "Ravi Menon", "Sofia Marquez", "Kenji Sato",
+    "Noah Bennett", "Priya Nair", "Elena Petrova", "Tomas Silva", "Hannah Cole",
+    "Arjun Rao", "Maya Lindqvist", "Omar Haddad", "Grace Kim", "Lucas Moreau",
+)
+# (lat, lng) centres books are scattered around
+CITIES = (
+    (12.9716, 77.5946), (19.0760, 72.8777), (28.6139, 77.2090), (13.0827, 80.2707),
+    (17.3850, 78.4867), (22.5726, 88.3639), (18.5204, 73.8567), (9.9312, 76.2673),
+)
+CITY_SPREAD_DEG = 0.15
+
+# Share of each status, in BookRequest / Transaction STATUS_CHOICES order
+REQUEST_STATUS_WEIGHTS = {"pending": 30, "approved": 40, "rejected": 20, "cancelled": 10}
+TRANSACTION_STATUS_WEIGHTS = {"received": 40, "returned": 50, "cancelled": 10}
+
+BATCH_SIZE = 50_000
+
+
+def title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).title()
+
+
+def coordinates(rng):
+    lat, lng = rng.choice(CITIES)
+    return (
+        round(lat + rng.gauss(0, CITY_SPREAD_DEG), 6),
+        round(lng + rng.gauss(0, CITY_SPREAD_DEG), 6),
+    )
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+# ------------------------------------------------------------
+# Loader
+# ------------------------------------------------------------
+class Loader:
+    """
+    Writes streams of {attname: value} rows. Columns missing from a row
+    take the field default; auto_now / auto_now_add columns default to the
+    load time.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, using_copy=None):
+        self.batch_size = batch_size
+        self.using_copy = connection.vendor == "postgresql" if using_copy is None else using_copy
+        self.now = timezone.now()
+
+    def defaults(self, model):
+        defaults = {}
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                defaults[field.attname] = self.now
+            else:
+                defaults[field.attname] = field.get_default()
+        return defaults
+
+    def load(self, model, rows):
+        defaults = self.defaults(model)
+        rows = iter(rows)
+        total = 0
+        while batch := list(islice(rows, self.batch_size)):
+            batch = [{**defaults, **row} for row in batch]
+            if self.using_copy:
+                self.copy(model, batch)
+            else:
+                self.insert(model, batch)
+            total += len(batch)
+        return total
+
+    def insert(self, model, batch):
+        # Plain executemany rather than bulk_create, which would overwrite
+        # the generated auto_now_add timestamps
+        fields = model._meta.concrete_fields
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            connection.ops.quote_name(model._meta.db_table),
+            ", ".join(connection.ops.quote_name(field.column) for field in fields),
+            ", ".join(["%s"] * len(fields)),
+        )
+        params = [
+            [field.get_db_prep_save(row[field.attname], connection) for field in fields]
+            for row in batch
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+    def copy(self, model, batch):
+        columns = [field.attname for field in model._meta.concrete_fields]
+        names = {field.attname: field.column for field in model._meta.concrete_fields}
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')".format(
+            connection.ops.quote_name(model._meta.db_table),
+            ", ".join(connection.ops.quote_name(names[c]) for c in columns),
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def reset_sequences(self, *models):
+        """Move id sequences past the explicitly assigned ids (PostgreSQL)."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -0,0 +1,168 @@
+"""
+JOB HANDLERS (enqueued from core/signals.py, run by `manage.py runworker`)
+"""
+
+from django.db import transaction as db_transaction
+
+from .cache import invalidate
+from .exchanges import match_stale_exchanges
+from .images import refresh_renditions
+from .jobs import job
+from .models import Book, BookRequest, Notification, Transaction
+from .notifications import notify_wishlist_users
+from .overdue import sweep_overdue_rentals
+from .recommendations import refresh_stale_similarities
+
+
+job("core.notify_wishlist_users")(notify_wishlist_users)
+
+
+@job("core.book_cover_renditions")
+def book_cover_renditions(book_id):
+    # .update() bypasses post_save, so drop cached catalogue pages here
+    if refresh_renditions(Book, book_id, "cover", "cover_renditions"):
+        invalidate("books")
+
+
+@job("core.refresh_similar_books")
+def refresh_similar_books():
+    books, _ = refresh_stale_similarities()
+    if books:
+        invalidate("books")
+
+
+job("core.match_exchanges")(match_stale_exchanges)
+
+
+# Enqueued by `manage.py run_scheduler` (core/scheduler.py)
+job("core.sweep_overdue_rentals")(sweep_overdue_rentals)
+
+
+# ------------------------------------------------------------
+# Approved request → create Transaction + apply logic
+# ------------------------------------------------------------
+@job("core.apply_approved_request")
+def apply_approved_request(request_id):
+    with db_transaction.atomic():
+        instance = (
+            BookRequest.objects.select_related("requester")
+            .select_for_update(of=("self",))
+            .filter(pk=request_id)
+            .first()
+        )
+        # Deleted or moved out of "approved" before the worker got to it
+        if instance is None or instance.status != "approved":
+            return
+        lock_books(instance)
+        apply_approval(instance)
+
+
+def lock_books(instance):
+    """
+    Row-lock the request's book and exchange book, in id order like
+    core/transitions.py, and attach the locked rows. Locking the books
+    serializes approvals of them, so the checks in apply_approval() can't
+    race another worker or a bulk update.
+    """
+    book_ids = {instance.book_id, instance.exchange_book_id} - {None}
+    books = {
+        book.pk: book
+        for book in Book.objects.select_related("owner")
+        .select_for_update(of=("self",))
+        .filter(pk__in=book_ids)
+        .order_by("pk")
+    }
+    instance.book = books[instance.book_id]
+    if instance.exchange_book_id is not None:
+        instance.exchange_book = books.get(instance.exchange_book_id)
+
+
+def apply_approval(instance):
+    """
+    Create the Transaction of an approved request and hand the book over.
+    The caller holds the row locks of instance.book and instance.exchange_book.
+    """
+    book = instance.book
+    requester = instance.requester
+    req_type = instance.request_type
+
+    # Avoid duplicate transactions
+    exists = Transaction.objects.filter(
+        book=book,
+        borrower=requester,
+        owner=book.owner,
+        transaction_type=req_type,
+        status="received"
+    ).exists()
+
+    if exists:
+        return None
+
+    # Another approval of this book got there first
+    if book.available_for == "none":
+        BookRequest.objects.filter(pk=instance.pk).update(status="rejected")
+        db_transaction.on_commit(lambda: invalidate("books"))
+        return None
+
+    # All operations are atomic (safe)
+    with db_transaction.atomic():
+
+        # Create Transaction record
+        txn = Transaction.objects.create(
+            book=book,
+            owner=book.owner,
+            borrower=requester,
+            transaction_type=req_type,
+            status="received"
+        )
+
+        # --------------------------------------------------------
+        # RENT LOGIC
+        # --------------------------------------------------------
+        if req_type == "rent":
+            book.available_for = "none"
+            book.save(update_fields=["available_for"])
+
+        # --------------------------------------------------------
+        # DONATE LOGIC
+        # (Book permanently belongs to requester)
+        # --------------------------------------------------------
+        elif req_type == "donate":
+            book.owner = requester
+            book.available_for = "none"
+            book.save(update_fields=["owner_id", "available_for"])
+
+        # --------------------------------------------------------
+        # EXCHANGE LOGIC
+        # (Swap ownership of two books)
+        # --------------------------------------------------------
+        elif req_type == "exchange":
+            exchange_book = getattr(instance, "exchange_book", None)
+
+            # Must exist AND belong to requester
+            if exchange_book and exchange_book.owner == requester:
+                original_owner = book.owner
+
+                # Swap owners
+                book.owner = requester
+                exchange_book.owner = original_owner
+
+                # Both books become unavailable after exchange
+                book.available_for = "none"
+                exchange_book.available_for = "none"
+
+                # Save
+                book.save(update_fields=["owner_id", "available_for"])
+                exchange_book.save(update_fields=["owner_id", "available_for"])
+
+            else:
+                # Missing or invalid exchange_book → create admin notification
+                Notification.objects.create(
+                    user=book.owner,
+                    message=(
+                        f"Exchange request #{instance.id} approved but missing/invalid "
+                        f"exchange_book. Please complete the exchange manually."
+                    )
+                )
+
+    return txn
@@ -1,3 +1,1385 @@
-from django.test import TestCase
+import posixpath
+import re
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, models
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from PIL import Image
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from booknest import urls as project_urls
+
+from . import images
+from .dbpool import connection_mode
+from .jobs import enqueue, job, run_pending_jobs
+from .metrics import as_prometheus, metrics_settings, registry
+from .middleware import ReplicaRoutingMiddleware
+from .routers import RoutingState, routing_state
+from .models import (
+    BadgeCounter,
+    Book,
+    BookRequest,
+    ExchangeCycle,
+    Feedback,
+    Job,
+    Notification,
+    SimilarBook,
+    StaleSimilarity,
+    SweepMark,
+    Transaction,
+    Wishlist,
+)
+from .exchanges import WantsGraph, find_cycles, match_stale_exchanges
+from .geo import KM_PER_DEGREE_LAT, bounding_boxes, nearby
+from .images import refresh_renditions
+from .overdue import sweep_overdue_rentals
+from .scheduler import Scheduler
+from .search import (
+    SimpleSearchBackend,
+    TrigramSearchBackend,
+    get_search_backend,
+    tsquery_text,
+)
+from .recommendations import rebuild_similar_books, refresh_stale_similarities
+
+User = get_user_model()
+
+
+class WishlistFanOutTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.borrower = User.objects.create_user(username="borrower")
+
+    def make_book(self, wishlisters):
+        book = Book.objects.create(owner=self.owner, title="Dune", available_for="rent")
+        users = User.objects.bulk_create(
+            [User(username=f"reader-{book.pk}-{i}") for i in range(wishlisters)]
+        )
+        Wishlist.objects.bulk_create([Wishlist(user=user, book=book) for user in users])
+        return book
+
+    def return_book(self, book):
+        txn = Transaction.objects.create(
+            book=book, owner=self.owner, borrower=self.borrower, transaction_type="rent"
+        )
+        txn.status = "returned"
+        with CaptureQueriesContext(connection) as queries:
+            txn.save()
+            run_pending_jobs()
+        return len(queries)
+
+    def test_notifies_every_wishlister_from_a_job(self):
+        book = self.make_book(wishlisters=5)
+
+        self.return_book(book)
+
+        self.assertEqual(
+            Notification.objects.filter(message__contains="'Dune' is now available").count(),
+            5,
+        )
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=1000)
+    def test_query_count_does_not_grow_with_wishlist_size(self):
+        small = self.return_book(self.make_book(wishlisters=3))
+        large = self.return_book(self.make_book(wishlisters=150))
+
+        self.assertEqual(small, large)
+        self.assertEqual(Notification.objects.count(), 153)
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=10)
+    def test_fan_out_is_chunked_by_batch_size(self):
+        book = self.make_book(wishlisters=25)
+        baseline = self.return_book(self.make_book(wishlisters=0))
+
+        # 25 rows in chunks of 10 -> three chunks, each one notification
+        # INSERT plus the badge counter UPDATE and INSERT
+        self.assertEqual(self.return_book(book), baseline + 3 * 3)
+        self.assertEqual(Notification.objects.filter(user__wishlist__book=book).count(), 25)
+
+
+calls = []
+
+
+@job("tests.flaky")
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key_enqueues_once(self):
+        first = enqueue("tests.flaky", {"fail_times": 0}, key="same")
+        second = enqueue("tests.flaky", {"fail_times": 0}, key="same")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(calls, [0])
+
+    def test_failed_job_is_retried_with_backoff_then_gives_up(self):
+        queued = enqueue("tests.flaky", {"fail_times": 5}, max_attempts=2)
+
+        with self.assertLogs("core.jobs", "WARNING"):
+            run_pending_jobs()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ("queued", 1))
+        self.assertIn("RuntimeError", queued.last_error)
+
+        # Not due yet: the retry is scheduled in the future
+        self.assertEqual(run_pending_jobs(), 0)
+
+        Job.objects.filter(pk=queued.pk).update(run_at=queued.created_at)
+        with self.assertLogs("core.jobs", "ERROR"):
+            run_pending_jobs()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ("failed", 2))
+
+    def test_approval_creates_transaction_in_background(self):
+        owner = User.objects.create_user(username="owner")
+        requester = User.objects.create_user(username="requester")
+        book = Book.objects.create(owner=owner, title="Dune", available_for="donate")
+        request = BookRequest.objects.create(
+            book=book, requester=requester, request_type="donate"
+        )
+
+        request.status = "approved"
+        request.save(update_fields=["status"])
+        request.save(update_fields=["status"])
+        self.assertFalse(Transaction.objects.exists())
+
+        run_pending_jobs()
+
+        book.refresh_from_db()
+        self.assertEqual(book.owner, requester)
+        self.assertEqual(Transaction.objects.filter(book=book).count(), 1)
+
+
+@override_settings(RESPONSE_CACHE={"ALIAS": "default", "TIMEOUT": 60, "ENABLED": True})
+class PublicResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        owner = User.objects.create_user(username="owner")
+        self.book = Book.objects.create(owner=owner, title="Dune", available_for="rent")
+
+    def test_anonymous_list_is_served_from_cache_until_a_book_changes(self):
+        first = self.client.get("/api/books/", {"genre": "", "page": "1"})
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        # Same normalized params, no queries needed
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/books/", {"page": "1"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = "Dune Messiah"
+            self.book.save()
+
+        third = self.client.get("/api/books/", {"page": "1"})
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertContains(third, "Dune Messiah")
+
+    @override_settings(ALLOWED_HOSTS=["*"])
+    def test_entries_are_kept_per_host(self):
+        for i in range(10):
+            Book.objects.create(owner=self.book.owner, title=f"Book {i}", available_for="rent")
+
+        forged = self.client.get("/api/books/", HTTP_HOST="evil.example")
+        self.assertEqual(forged["X-Cache"], "MISS")
+        self.assertIn("http://evil.example/", forged.json()["next"])
+
+        response = self.client.get("/api/books/", HTTP_HOST="booknest.example")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotContains(response, "evil.example")
+        self.assertIn("http://booknest.example/", response.json()["next"])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(f"/api/books/{self.book.pk}/")["ETag"]
+
+        response = self.client.get(f"/api/books/{self.book.pk}/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="librarian")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_csv_stream_reports_row_errors_and_imports_the_rest(self):
+        body = (
+            "title,author,available_for,genre\n"
+            '"Dune, Part One",Herbert,rent,fiction\n'
+            "Broken,,sell,\n"
+            "Emma,Austen,donate,\n"
+        )
+
+        response = self.client.post(
+            "/api/books/bulk-import/?batch_size=2", body, content_type="text/csv"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(response.json()["errors"][0]["row"], 3)
+        self.assertEqual(
+            sorted(Book.objects.filter(owner=self.user).values_list("title", flat=True)),
+            ["Dune, Part One", "Emma"],
+        )
+
+
+    def test_undecodable_and_unparsable_rows_are_row_errors(self):
+        csv_body = (
+            b"title,author,available_for\n"
+            b"Dune,Herbert,rent\n"
+            b"Bad \xff,Nobody,rent\n"
+            b"Huge," + b"x" * 200_000 + b",rent\n"
+            b"Emma,Austen,donate\n"
+        )
+        ndjson_body = b'{"title": "Ulysses", "available_for": "rent"}\n\xff\xfe\n'
+
+        for body, content_type, rows in (
+            (csv_body, "text/csv", [3, 4]),
+            (ndjson_body, "application/x-ndjson", [2]),
+        ):
+            with self.subTest(content_type=content_type):
+                response = self.client.post(
+                    "/api/books/bulk-import/?batch_size=999999999",
+                    body,
+                    content_type=content_type,
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([e["row"] for e in response.json()["errors"]], rows)
+
+        self.assertEqual(
+            sorted(Book.objects.filter(owner=self.user).values_list("title", flat=True)),
+            ["Dune", "Emma", "Ulysses"],
+        )
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        owner = User.objects.create_user(username="owner")
+        Book.objects.create(owner=owner, title="Dune", available_for="rent")
+
+    def test_server_timing_and_per_action_histograms(self):
+        response = self.client.get("/api/books/")
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+
+        staff = APIClient()
+        staff.force_authenticate(User.objects.create_user(username="ops", is_staff=True))
+        data = staff.get("/api/metrics/").json()["views"]["BookViewSet.list"]
+        self.assertEqual(data["duration_ms"]["count"], 1)
+        self.assertGreater(data["queries"]["avg"], 0)
+
+        text = staff.get("/api/metrics/", {"output": "prometheus"}).content.decode()
+        self.assertIn('booknest_request_queries_count{view="BookViewSet.list"} 1', text)
+        self.assertIn('booknest_db_connections_opened_total{alias="default"}', text)
+
+    def test_prometheus_counts_survive_the_window(self):
+        registry.record("BookViewSet.list", 200, {"duration_ms": 12.0})
+        registry.record("BookViewSet.list", 200, {"duration_ms": 30.0})
+
+        later = time.time() + metrics_settings()["WINDOW_SECONDS"] * 2
+        with mock.patch("core.metrics.time.time", return_value=later):
+            windowed = registry.snapshot()["BookViewSet.list"]["duration_ms"]
+            text = as_prometheus(registry.lifetime_snapshot())
+
+        self.assertEqual(windowed["count"], 0)
+        self.assertIn('booknest_request_duration_ms_count{view="BookViewSet.list"} 2', text)
+        self.assertIn('booknest_request_duration_ms_sum{view="BookViewSet.list"} 42.000', text)
+
+    def test_database_connection_stats(self):
+        staff = APIClient()
+        staff.force_authenticate(User.objects.create_user(username="ops", is_staff=True))
+
+        database = staff.get("/api/metrics/").json()["database"]["default"]
+
+        self.assertEqual(database["mode"], connection_mode(connection.settings_dict))
+        self.assertEqual(database["conn_max_age"], connection.settings_dict["CONN_MAX_AGE"])
+        self.assertGreaterEqual(database["connections_opened"], 1)
+
+    def test_metrics_endpoint_requires_staff_or_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+
+        with self.settings(REQUEST_METRICS={"TOKEN": "scrape"}):
+            response = self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="scrape")
+        self.assertEqual(response.status_code, 200)
+
+
+class BookStatsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.reader = User.objects.create_user(username="reader")
+        self.dune = Book.objects.create(owner=self.owner, title="Dune", available_for="rent")
+        self.emma = Book.objects.create(owner=self.owner, title="Emma", available_for="rent")
+
+    def stats(self, book):
+        book.refresh_from_db()
+        return book.rating_sum, book.rating_count, book.request_count
+
+    def test_feedback_create_update_move_and_delete(self):
+        feedback = Feedback.objects.create(user=self.reader, book=self.dune, rating=4)
+        self.assertEqual(self.stats(self.dune), (4, 1, 0))
+
+        feedback.rating = 2
+        feedback.save()
+        self.assertEqual(self.stats(self.dune), (2, 1, 0))
+
+        feedback.book = self.emma
+        feedback.save()
+        self.assertEqual(self.stats(self.dune), (0, 0, 0))
+        self.assertEqual(self.stats(self.emma), (2, 1, 0))
+
+        feedback.delete()
+        self.assertEqual(self.stats(self.emma), (0, 0, 0))
+
+    def test_request_create_move_and_delete(self):
+        request = BookRequest.objects.create(
+            book=self.dune, requester=self.reader, request_type="rent"
+        )
+        self.assertEqual(self.stats(self.dune)[2], 1)
+
+        request.book = self.emma
+        request.save()
+        self.assertEqual((self.stats(self.dune)[2], self.stats(self.emma)[2]), (0, 1))
+
+        request.delete()
+        self.assertEqual(self.stats(self.emma)[2], 0)
+
+    def test_book_update_keeps_concurrent_increments(self):
+        stale = Book.objects.get(pk=self.dune.pk)
+        Feedback.objects.create(user=self.reader, book=self.dune, rating=5)
+        BookRequest.objects.create(book=self.dune, requester=self.reader, request_type="rent")
+
+        stale.title = "Dune Messiah"
+        stale.save()
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.patch(f"/api/books/{self.dune.pk}/", {"genre": "fiction"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stats(self.dune), (5, 1, 1))
+        self.assertEqual((self.dune.title, self.dune.genre), ("Dune Messiah", "fiction"))
+
+    def test_saving_a_partially_loaded_book_writes_only_its_columns(self):
+        Book.objects.filter(pk=self.dune.pk).update(description="Spice")
+        book = Book.objects.only("id", "title").get(pk=self.dune.pk)
+
+        book.title = "Dune Messiah"
+        with CaptureQueriesContext(connection) as queries:
+            book.save()
+
+        # No refresh of the deferred columns, and none written back
+        self.assertFalse(any('"description"' in q["sql"] for q in queries))
+        self.dune.refresh_from_db()
+        self.assertEqual((self.dune.title, self.dune.description), ("Dune Messiah", "Spice"))
+
+
+class BadgeCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.reader = User.objects.create_user(username="reader")
+        self.book = Book.objects.create(owner=self.owner, title="Dune", available_for="rent")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def badges(self):
+        return self.client.get("/api/badges/").json()
+
+    def test_counters_follow_notifications_and_requests(self):
+        Notification.objects.create(user=self.owner, message="hi")
+        seen = Notification.objects.create(user=self.owner, message="hello")
+        request = BookRequest.objects.create(
+            book=self.book, requester=self.reader, request_type="rent"
+        )
+        self.assertEqual(self.badges(), {"unread_notifications": 2, "pending_requests": 1})
+
+        seen.is_read = True
+        seen.save()
+        request.status = "rejected"
+        request.save(update_fields=["status"])
+        self.assertEqual(self.badges(), {"unread_notifications": 1, "pending_requests": 0})
+
+    def test_mark_all_read_is_a_single_update(self):
+        for i in range(3):
+            Notification.objects.create(user=self.owner, message=f"n{i}")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/notifications/mark-all-read/")
+
+        self.assertEqual(response.json(), {"marked_read": 3})
+        notification_writes = [
+            q for q in queries if q["sql"].startswith('UPDATE "core_notification"')
+        ]
+        self.assertEqual(len(notification_writes), 1)
+        self.assertEqual(self.badges()["unread_notifications"], 0)
+
+    def test_reconcile_fixes_drift(self):
+        BookRequest.objects.create(book=self.book, requester=self.reader, request_type="rent")
+        BadgeCounter.objects.filter(user=self.owner).update(pending_requests=7)
+
+        call_command("reconcile_badges", stdout=StringIO())
+
+        self.assertEqual(self.badges()["pending_requests"], 1)
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.other = User.objects.create_user(username="other")
+        self.readers = [User.objects.create_user(username=f"reader{i}") for i in range(3)]
+        self.dune = Book.objects.create(owner=self.owner, title="Dune", available_for="rent")
+        self.emma = Book.objects.create(owner=self.owner, title="Emma", available_for="rent")
+        theirs = Book.objects.create(owner=self.other, title="Ulysses", available_for="rent")
+        self.requests = [
+            BookRequest.objects.create(book=book, requester=reader, request_type="rent")
+            for book, reader in (
+                (self.dune, self.readers[0]),
+                (self.dune, self.readers[1]),
+                (self.emma, self.readers[2]),
+                (theirs, self.readers[0]),
+            )
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def bulk(self, *transitions):
+        return self.client.post(
+            "/api/bookrequests/bulk-status/",
+            {"transitions": [{"id": pk, "status": status} for pk, status in transitions]},
+            format="json",
+        )
+
+    def test_approval_rejects_competitors_in_one_call(self):
+        first, second, emma, theirs = (r.pk for r in self.requests)
+
+        response = self.bulk(
+            (first, "approved"), (emma, "rejected"), (theirs, "approved"), (9999, "rejected")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "updated": [
+                    {"id": first, "status": "approved"},
+                    {"id": emma, "status": "rejected"},
+                ],
+                "auto_rejected": [second],
+                "skipped": [
+                    {"id": theirs, "reason": "forbidden"},
+                    {"id": 9999, "reason": "not_found"},
+                ],
+            },
+        )
+        self.assertEqual(Transaction.objects.get().borrower, self.readers[0])
+        self.dune.refresh_from_db()
+        self.assertEqual(self.dune.available_for, "none")
+        self.assertEqual(BadgeCounter.objects.get(user=self.owner).pending_requests, 0)
+
+        # Already decided
+        response = self.bulk((second, "approved"))
+        self.assertEqual(response.json()["skipped"], [{"id": second, "reason": "not_pending"}])
+
+    def test_rejects_duplicates_and_oversized_batches(self):
+        pk = self.requests[0].pk
+        response = self.bulk((pk, "approved"), (self.requests[2].pk, "rejected"), (pk, "rejected"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(pk), response.json()["transitions"][0])
+        self.assertEqual(BookRequest.objects.get(pk=pk).status, "pending")
+        with override_settings(BULK_REQUEST_STATUS={"MAX_TRANSITIONS": 1}):
+            response = self.bulk((pk, "approved"), (self.requests[2].pk, "rejected"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_exchange_approval_swaps_the_locked_books(self):
+        offered = Book.objects.create(
+            owner=self.readers[2], title="Neuromancer", available_for="exchange"
+        )
+        self.emma.available_for = "exchange"
+        self.emma.save()
+        request = BookRequest.objects.create(
+            book=self.emma, requester=self.readers[2], request_type="exchange",
+            exchange_book=offered,
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk((request.pk, "approved"))
+
+        self.assertEqual(response.json()["updated"], [{"id": request.pk, "status": "approved"}])
+        # Both books come from the one locking read, in id order
+        (book_read,) = [
+            q["sql"] for q in queries if q["sql"].startswith('SELECT "core_book"."id"')
+        ]
+        locked = re.search(r'"core_book"\."id" IN \(([^)]*)\)', book_read).group(1)
+        self.assertEqual({int(pk) for pk in locked.split(",")}, {self.emma.pk, offered.pk})
+        self.assertEqual(
+            sorted(Book.objects.filter(pk__in=[self.emma.pk, offered.pk]).values_list(
+                "pk", "owner_id", "available_for"
+            )),
+            [(self.emma.pk, self.readers[2].pk, "none"), (offered.pk, self.owner.pk, "none")],
+        )
+
+    def test_approval_job_skips_a_book_already_handed_over(self):
+        for request in self.requests[:2]:
+            request.status = "approved"
+            request.save(update_fields=["status"])
+
+        run_pending_jobs()
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.requests[1].refresh_from_db()
+        self.assertEqual(self.requests[1].status, "rejected")
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class BulkStatusConcurrencyTests(TransactionTestCase):
+    WORKERS = 8
+
+    def test_concurrent_approvals_hand_the_book_over_once(self):
+        owner = User.objects.create_user(username="owner")
+        book = Book.objects.create(owner=owner, title="Dune", available_for="rent")
+        request_ids = [
+            BookRequest.objects.create(
+                book=book,
+                requester=User.objects.create_user(username=f"reader{i}"),
+                request_type="rent",
+            ).pk
+            for i in range(self.WORKERS)
+        ]
+        barrier = threading.Barrier(self.WORKERS)
+
+        def approve(request_id):
+            client = APIClient()
+            client.force_authenticate(owner)
+            try:
+                barrier.wait()
+                return client.post(
+                    "/api/bookrequests/bulk-status/",
+                    {"transitions": [{"id": request_id, "status": "approved"}]},
+                    format="json",
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            codes = list(pool.map(approve, request_ids))
+
+        self.assertEqual(codes, [200] * self.WORKERS)
+        self.assertEqual(BookRequest.objects.filter(status="approved").count(), 1)
+        self.assertEqual(Transaction.objects.filter(book=book).count(), 1)
+
+        # Losers that were locked while the winner committed can't win later
+        for request_id in BookRequest.objects.filter(status="pending").values_list("pk", flat=True):
+            approve_later = APIClient()
+            approve_later.force_authenticate(owner)
+            response = approve_later.post(
+                "/api/bookrequests/bulk-status/",
+                {"transitions": [{"id": request_id, "status": "approved"}]},
+                format="json",
+            )
+            self.assertEqual(response.json()["skipped"][0]["reason"], "unavailable")
+        self.assertEqual(Transaction.objects.filter(book=book).count(), 1)
+
+
+@override_settings(OVERDUE_RENTALS={"BATCH_SIZE": 1})
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.reader = User.objects.create_user(username="reader")
+        self.book = Book.objects.create(owner=self.owner, title="Dune", available_for="none")
+        self.now = timezone.now()
+
+    def rental(self, days, **fields):
+        return Transaction.objects.create(
+            book=self.book,
+            owner=self.owner,
+            borrower=self.reader,
+            transaction_type=fields.pop("transaction_type", "rent"),
+            end_date=self.now + timedelta(days=days),
+            **fields,
+        )
+
+    def test_each_overdue_rental_is_reminded_once(self):
+        self.rental(-2)
+        self.rental(-2)
+        self.rental(3)
+        self.rental(-5, status="returned")
+        self.rental(-5, transaction_type="donate")
+
+        self.assertEqual(sweep_overdue_rentals(), (2, 4))
+        self.assertEqual(Notification.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(BadgeCounter.objects.get(user=self.owner).unread_notifications, 2)
+
+        # Nothing new fell due
+        self.assertEqual(sweep_overdue_rentals(), (0, 0))
+
+        self.rental(-1)
+        self.assertEqual(sweep_overdue_rentals(), (1, 2))
+
+        mark = SweepMark.objects.get(name="overdue_rentals")
+        self.assertEqual((mark.runs, mark.rows_scanned, mark.last_scanned), (3, 3, 1))
+
+    def test_scheduler_enqueues_once_per_interval(self):
+        jobs = {"core.sweep_overdue_rentals": 60}
+        self.assertEqual(Scheduler(jobs).tick(now=120), ["core.sweep_overdue_rentals"])
+        # Another scheduler in the same interval reuses the job
+        Scheduler(jobs).tick(now=150)
+        self.assertEqual(Job.objects.filter(name="core.sweep_overdue_rentals").count(), 1)
+
+        Scheduler(jobs).tick(now=180)
+        self.assertEqual(Job.objects.filter(name="core.sweep_overdue_rentals").count(), 2)
+
+
+class NearbyBooksTests(TestCase):
+    origin = (12.97, 77.59)
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def book_at(self, title, lat, lng):
+        return Book.objects.create(
+            owner=self.owner, title=title, available_for="rent",
+            location_lat=round(lat, 6), location_lng=round(lng, 6),
+        )
+
+    def north(self, km):
+        return self.origin[0] + km / KM_PER_DEGREE_LAT, self.origin[1]
+
+    def get(self, **params):
+        lat, lng = self.origin
+        return self.client.get("/api/books/nearby/", {"lat": lat, "lng": lng, **params})
+
+    def test_nearest_first_within_the_radius(self):
+        for km in (8, 1, 15, 3):
+            self.book_at(f"{km} km", *self.north(km))
+        self.book_at("elsewhere", -33.87, 151.21)
+
+        rows = self.get(radius_km=10).json()["results"]
+        self.assertEqual([row["title"] for row in rows], ["1 km", "3 km", "8 km"])
+        for row, km in zip(rows, (1, 3, 8)):
+            self.assertAlmostEqual(row["distance_km"], km, delta=0.01)
+
+        rows = self.get(radius_km=20).json()["results"]
+        self.assertEqual([row["title"] for row in rows], ["1 km", "3 km", "8 km", "15 km"])
+
+    def test_circle_across_the_antimeridian(self):
+        self.book_at("east", 0, 179.99)
+        self.book_at("west", 0, -179.99)
+
+        self.assertEqual(len(bounding_boxes(0, 179.99, 5)), 2)
+        rows = nearby(Book.objects.all(), 0, 179.995, 5)
+        self.assertEqual([book.title for book in rows], ["east", "west"])
+
+    def test_invalid_coordinates_and_radius(self):
+        for params in (
+            {"lat": "nan"},
+            {"lng": "inf"},
+            {"lat": "-inf"},
+            {"lat": 90.5},
+            {"lng": -180.5},
+            {"lat": "north"},
+            {"radius_km": "nan"},
+            {"radius_km": "inf"},
+            {"radius_km": 0},
+            {"radius_km": -1},
+            {"radius_km": 201},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+        response = self.client.get("/api/books/nearby/", {"lat": 12.97})
+        self.assertEqual(response.status_code, 400)
+
+
+class ValuesSerializerParityTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="owner")
+        reader = User.objects.create_user(username="reader")
+        for i, available_for in enumerate(["rent", "rent", "donate"]):
+            book = Book.objects.create(
+                owner=owner, title=f"Dune {i}", author="Herbert", available_for=available_for,
+                location_lat=12.97 + i / 1000, location_lng=77.59,
+            )
+            BookRequest.objects.create(book=book, requester=reader, request_type=available_for)
+        # Covers set without saving, so no rendition jobs run
+        Book.objects.filter(title="Dune 0").update(
+            cover="covers/dune.jpg",
+            cover_renditions={
+                "source": "covers/dune.jpg",
+                "thumb": {"webp": "covers/r/dune.webp", "jpeg": "covers/r/dune.jpg"},
+            },
+            rating_sum=9, rating_count=2,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def assertSameResponses(self, path, data=None):
+        with self.settings(FAST_LIST={"ENABLED": False}):
+            expected = self.client.get(path, data)
+        actual = self.client.get(path, data)
+
+        self.assertEqual(actual.status_code, 200)
+        self.assertEqual(actual.content, expected.content)
+        return actual
+
+    def test_list_actions_are_byte_identical(self):
+        response = self.assertSameResponses("/api/books/")
+        self.assertEqual(response.json()["results"][-1]["avg_rating"], 4.5)
+
+        self.assertSameResponses("/api/books/", {"pagination": "cursor", "available_for": "rent"})
+        self.assertSameResponses("/api/books/my/", {"ordering": "title"})
+        self.assertSameResponses("/api/books/nearby/", {"lat": 12.97, "lng": 77.59})
+        self.assertSameResponses("/api/bookrequests/")
+        self.assertSameResponses("/api/bookrequests/my/")
+
+    def test_list_fetches_only_serialized_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/bookrequests/")
+
+        select = next(q["sql"] for q in queries if "LIMIT" in q["sql"])
+        self.assertNotIn('"core_book"."description"', select)
+        self.assertIn('"core_book"."cover_renditions"', select)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        Book.objects.bulk_create(
+            Book(owner=self.owner, title=f"Book {i}", available_for="rent") for i in range(25)
+        )
+        # Ties on created_at: most rows share one timestamp, the id breaks them
+        now = timezone.now()
+        ids = list(Book.objects.order_by("pk").values_list("pk", flat=True))
+        Book.objects.filter(pk__in=ids[:20]).update(created_at=now)
+        Book.objects.filter(pk__in=ids[20:]).update(created_at=now - timedelta(days=1))
+        self.expected = list(
+            Book.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def walk(self, url, params=None, link="next"):
+        pages = []
+        page = self.client.get(url, params).json()
+        while True:
+            pages.append([row["id"] for row in page["results"]])
+            if page[link] is None:
+                return pages, page
+            page = self.client.get(page[link]).json()
+
+    def test_cursor_round_trip_with_ties_on_created_at(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(FAST_LIST={"ENABLED": fast}):
+                pages, last = self.walk("/api/books/", {"pagination": "cursor"})
+                self.assertEqual([len(ids) for ids in pages], [10, 10, 5])
+                self.assertEqual(sum(pages, []), self.expected)
+
+                # ...and back again from the last page
+                back, first = self.walk(last["previous"], link="previous")
+                self.assertEqual(back, pages[-2::-1])
+                self.assertIsNone(first["previous"])
+                self.assertIsNotNone(first["next"])
+
+    def test_sparse_fields_keep_the_cursor_working(self):
+        pages, _ = self.walk("/api/books/", {"pagination": "cursor", "fields": "id"})
+
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_other_orderings_and_bad_cursors(self):
+        page = self.client.get("/api/books/", {"pagination": "cursor", "ordering": "title"}).json()
+        self.assertEqual(page["count"], 25)
+
+        response = self.client.get("/api/books/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="owner")
+        self.book = Book.objects.create(
+            owner=owner, title="Dune", author="Herbert", description="Spice. " * 500,
+            available_for="rent",
+        )
+
+    def get(self, path, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, data)
+        select = next(q["sql"] for q in queries if '"core_book"."title"' in q["sql"])
+        return response, select
+
+    def test_fields_trim_output_and_columns_on_both_paths(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(
+                FAST_LIST={"ENABLED": fast}, RESPONSE_CACHE={"ENABLED": False}
+            ):
+                response, select = self.get("/api/books/", {"fields": "id,title,owner"})
+                self.assertEqual(
+                    response.json()["results"],
+                    [{"id": self.book.pk, "title": "Dune", "owner": "owner"}],
+                )
+                self.assertNotIn('"core_book"."description"', select)
+                self.assertNotIn('"core_book"."rating_sum"', select)
+
+    def test_cursor_pages_without_the_keyset_columns_in_fields(self):
+        for i in range(11):
+            Book.objects.create(owner=self.book.owner, title=f"Book {i}", available_for="rent")
+        client = APIClient()
+        client.force_authenticate(self.book.owner)
+
+        for path, params in (
+            ("/api/books/", {"fields": "title"}),
+            ("/api/books/", {"exclude": "id,created_at"}),
+            ("/api/books/my/", {"fields": "title"}),
+        ):
+            for fast in (True, False):
+                with self.subTest(path=path, params=params, fast=fast), self.settings(
+                    FAST_LIST={"ENABLED": fast}, RESPONSE_CACHE={"ENABLED": False}
+                ):
+                    page = client.get(path, {**params, "pagination": "cursor"}).json()
+                    rows = page["results"]
+                    page = client.get(page["next"]).json()
+                    rows += page["results"]
+
+                    self.assertIsNone(page["next"])
+                    self.assertEqual(len({row["title"] for row in rows}), 12)
+                    self.assertTrue(all("created_at" not in row for row in rows))
+
+    def test_exclude_on_retrieve(self):
+        response, select = self.get(f"/api/books/{self.book.pk}/", {"exclude": "description"})
+
+        self.assertNotIn("description", response.json())
+        self.assertIn("avg_rating", response.json())
+        self.assertNotIn('"core_book"."description"', select)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/books/", {"fields": "title,password"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json()["fields"])
+
+
+class SearchBackendTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="owner")
+        self.dune = Book.objects.create(owner=owner, title="Dune", available_for="rent")
+        Book.objects.create(
+            owner=owner, title="Emma", description="Not about dune at all", available_for="rent"
+        )
+        for i in range(8):
+            Book.objects.create(
+                owner=owner, title=f"Dunes and the long road, volume {i}", available_for="rent"
+            )
+
+    def test_candidate_thresholds_merge_over_the_defaults(self):
+        with self.settings(BOOK_SEARCH={"CANDIDATE_THRESHOLDS": {"similarity": 0.4}}):
+            backend = TrigramSearchBackend()
+
+        self.assertEqual(backend.candidate_thresholds, {"similarity": 0.4, "word_similarity": 0.6})
+
+    def test_auto_backend_follows_the_database(self):
+        expected = (
+            TrigramSearchBackend if connection.vendor == "postgresql" else SimpleSearchBackend
+        )
+        self.assertIsInstance(get_search_backend("auto"), expected)
+
+    def test_simple_backend_ranks_title_matches_first(self):
+        backend = SimpleSearchBackend(weights={"title": 2.0})
+        results = list(backend.search(Book.objects.all(), "dune"))
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[-1].title, "Emma")
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm")
+    def test_trigram_candidates_are_the_best_matches(self):
+        # Low enough that every "Dunes ..." volume is a candidate too
+        backend = TrigramSearchBackend(
+            weights={"description": 0.5},
+            candidate_limit=2,
+            candidate_thresholds={"similarity": 0.05},
+        )
+
+        results = list(backend.search(Book.objects.all(), "Dune"))
+
+        self.assertEqual(results[0], self.dune)
+        self.assertEqual(len(results), 2)
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm")
+    def test_trigram_thresholds_stay_inside_the_search(self):
+        def threshold():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT current_setting('pg_trgm.similarity_threshold')")
+                return cursor.fetchone()[0]
+
+        before = threshold()
+        backend = TrigramSearchBackend(
+            weights={"description": 0.5}, candidate_thresholds={"similarity": 0.05}
+        )
+        results = list(backend.search(Book.objects.all(), "Dune"))
+
+        self.assertEqual(results[0], self.dune)
+        self.assertTrue(all(book.similarity > backend.min_similarity for book in results))
+        self.assertEqual(threshold(), before)
+
+
+class FullTextSearchFilterTests(TestCase):
+    def test_terms_become_prefix_matches(self):
+        self.assertEqual(tsquery_text(["Dune", "herb!"]), "dune:* & herb:*")
+        self.assertEqual(tsquery_text(["&|!"]), "")
+
+    def test_sqlite_keeps_the_search_filter_contract(self):
+        owner = User.objects.create_user(username="owner")
+        Book.objects.create(owner=owner, title="Dune", author="Herbert", available_for="rent")
+        Book.objects.create(owner=owner, title="Emma", isbn="9780141439587", available_for="rent")
+        # Authenticated, so responses bypass the public response cache
+        client = APIClient()
+        client.force_authenticate(owner)
+
+        for term, titles in (("herb", ["Dune"]), ("978014", ["Emma"]), ("", ["Emma", "Dune"])):
+            response = client.get("/api/books/", {"search": term})
+            self.assertEqual([b["title"] for b in response.json()["results"]], titles)
+
+
+class SeedSyntheticTests(TestCase):
+    def test_seeds_linked_rows_with_counters_and_known_password(self):
+        call_command(
+            "seed_synthetic", users=6, books_per_user=2, requests_per_book=3,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Book.objects.count(), 12)
+        self.assertFalse(
+            BookRequest.objects.filter(requester=models.F("book__owner")).exists()
+        )
+        book = Book.objects.order_by("-request_count").first()
+        self.assertEqual(book.request_count, book.requests.count())
+        owner = User.objects.get(pk=book.owner_id)
+        self.assertEqual(
+            owner.badges.pending_requests,
+            BookRequest.objects.filter(book__owner=owner, status="pending").count(),
+        )
+
+        response = self.client.post(
+            "/api/auth/token/", {"username": owner.username, "password": "loadtest"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class SimilarBooksTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="owner")
+        self.dune, self.messiah, self.emma = (
+            Book.objects.create(owner=owner, title=title, author="Someone")
+            for title in ("Dune", "Dune Messiah", "Emma")
+        )
+        self.first = User.objects.create_user(username="first")
+        self.second = User.objects.create_user(username="second")
+        for user, books in (
+            (self.first, [self.dune, self.messiah]),
+            (self.second, [self.dune, self.messiah, self.emma]),
+        ):
+            Wishlist.objects.bulk_create(Wishlist(user=user, book=book) for book in books)
+
+    def similar(self, book):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/books/{book.pk}/similar/")
+        self.assertEqual(response.status_code, 200)
+        return [(row["title"], round(row["score"], 3)) for row in response.json()]
+
+    def test_neighbours_ranked_by_cosine(self):
+        rebuild_similar_books()
+
+        self.assertEqual(self.similar(self.dune), [("Dune Messiah", 1.0), ("Emma", 0.707)])
+        self.assertEqual(self.similar(self.emma), [("Dune", 0.707), ("Dune Messiah", 0.707)])
+
+    def test_refresh_recomputes_stale_books_and_their_neighbours(self):
+        rebuild_similar_books()
+        # Rating 5 (weight 2.0) from a reader who had not touched Emma
+        Feedback.objects.create(user=self.first, book=self.emma, rating=5)
+        self.assertTrue(StaleSimilarity.objects.filter(book_id=self.emma.pk).exists())
+
+        refresh_stale_similarities()
+
+        self.assertFalse(StaleSimilarity.objects.exists())
+        # Dune's row was not marked, but its cosine with Emma changed
+        self.assertEqual(self.similar(self.dune), [("Dune Messiah", 1.0), ("Emma", 0.949)])
+
+    def test_refresh_reads_only_the_affected_readers(self):
+        # Readers and books the change can't reach
+        other = User.objects.create_user(username="other")
+        for title in ("Ulysses", "Odyssey"):
+            book = Book.objects.create(owner=other, title=title, author="Someone")
+            Wishlist.objects.create(user=other, book=book)
+        rebuild_similar_books()
+        Feedback.objects.create(user=self.first, book=self.emma, rating=5)
+
+        def rows():
+            return sorted(SimilarBook.objects.values_list("book_id", "similar_id", "rank", "score"))
+
+        with CaptureQueriesContext(connection) as queries:
+            refresh_stale_similarities()
+        refreshed = rows()
+        rebuild_similar_books()
+
+        self.assertEqual(refreshed, rows())
+        for table in ("core_wishlist", "core_bookrequest", "core_feedback"):
+            reads = [q["sql"] for q in queries if f'FROM "{table}"' in q["sql"]]
+            self.assertTrue(reads)
+            self.assertTrue(all("WHERE" in sql for sql in reads), table)
+
+
+class ExchangeCycleTests(TestCase):
+    def setUp(self):
+        self.ann, self.bob, self.cat, self.dan = (
+            User.objects.create_user(username=name) for name in ("ann", "bob", "cat", "dan")
+        )
+        self.books = {
+            user.username: Book.objects.create(
+                owner=user, title=f"{user.username}'s book", available_for="exchange"
+            )
+            for user in (self.ann, self.bob, self.cat, self.dan)
+        }
+        # ann -> bob -> cat -> ann, and ann <-> dan
+        for user, owner in (
+            (self.ann, "bob"), (self.bob, "cat"), (self.cat, "ann"),
+            (self.ann, "dan"), (self.dan, "ann"),
+        ):
+            Wishlist.objects.create(user=user, book=self.books[owner])
+
+    def suggestions(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/api/exchanges/suggestions/")
+        self.assertEqual(response.status_code, 200)
+        return [
+            [(leg["giver_username"], leg["receiver_username"]) for leg in cycle["legs"]]
+            for cycle in response.json()
+        ]
+
+    def test_finds_two_and_three_way_cycles_incrementally(self):
+        match_stale_exchanges()
+
+        self.assertEqual(
+            self.suggestions(self.ann),
+            [
+                [("ann", "dan"), ("dan", "ann")],
+                [("ann", "cat"), ("bob", "ann"), ("cat", "bob")],
+            ],
+        )
+        self.assertEqual(
+            self.suggestions(self.cat), [[("ann", "cat"), ("bob", "ann"), ("cat", "bob")]]
+        )
+
+        # Bob's book leaves exchange: only the ring through bob goes away
+        self.books["bob"].available_for = "rent"
+        self.books["bob"].save()
+        match_stale_exchanges()
+
+        self.assertEqual(self.suggestions(self.ann), [[("ann", "dan"), ("dan", "ann")]])
+        self.assertEqual(ExchangeCycle.objects.count(), 1)
+
+    def test_incremental_load_stays_near_the_stale_users(self):
+        # A swap between users the ring can't reach
+        eve, fay = (User.objects.create_user(username=name) for name in ("eve", "fay"))
+        for user, owner in ((eve, fay), (fay, eve)):
+            book = Book.objects.create(owner=owner, title="Far away", available_for="exchange")
+            Wishlist.objects.create(user=user, book=book)
+
+        full = WantsGraph.load()
+        near = WantsGraph.load_around([self.cat.pk], 3)
+
+        self.assertNotIn(eve.pk, near.index)
+        self.assertEqual(
+            find_cycles(near, [near.index[self.cat.pk]]),
+            find_cycles(full, [full.index[self.cat.pk]]),
+        )
+        # Pairwise swaps only: one hop out, one back
+        self.assertEqual(len(WantsGraph.load_around([self.dan.pk], 2)), 2)
+
+
+@override_settings(REPLICA_ROUTING={"REPLICAS": ["replica1"], "STICKY_SECONDS": 60})
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def request(self, method, user_id=None, write=False):
+        """The alias Book reads use inside a request through the middleware."""
+        seen = {}
+
+        def view(request):
+            if write:
+                Book.objects.none().update(title="x")  # routed only, no query
+            seen["alias"] = Book.objects.all().db
+            return HttpResponse()
+
+        headers = {}
+        if user_id:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(User(pk=user_id))}"
+        ReplicaRoutingMiddleware(view)(getattr(RequestFactory(), method)("/", **headers))
+        return seen["alias"]
+
+    def test_safe_reads_use_replica_and_writes_pin_the_user(self):
+        self.assertEqual(self.request("get", user_id=1), "replica1")
+        self.assertEqual(self.request("patch", user_id=1, write=True), "default")
+
+        # Read-your-writes for the writer only
+        self.assertEqual(self.request("get", user_id=1), "default")
+        self.assertEqual(self.request("get", user_id=2), "replica1")
+
+    def test_locking_reads_and_other_apps_stay_on_primary(self):
+        token = routing_state.set(RoutingState("replica1"))
+        try:
+            self.assertEqual(Book.objects.all().db, "replica1")
+            self.assertEqual(Book.objects.select_for_update().db, "default")
+            self.assertEqual(Session.objects.all().db, "default")
+        finally:
+            routing_state.reset(token)
+        self.assertEqual(Book.objects.all().db, "default")
+
+
+class IndexAdviceTests(TestCase):
+    def test_explains_each_viewset_and_rolls_back_seed_data(self):
+        out = StringIO()
+
+        call_command("index_advice", books=60, users=5, stdout=out)
+
+        self.assertIn("BookViewSet.my_books  [200]", out.getvalue())
+        self.assertIn("query plan(s) flagged", out.getvalue())
+        self.assertFalse(Book.objects.exists())
+
+
+class AsyncReadURLConf:
+    urlpatterns = [path("api/", include("core.async_urls"))] + project_urls.urlpatterns
+
+
+@override_settings(
+    ROOT_URLCONF=AsyncReadURLConf,
+    ASYNC_READS={"LONG_POLL_INTERVAL": 0.01},
+)
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        self.book = Book.objects.create(owner=self.user, title="Dune", available_for="rent")
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.sync_client = APIClient(headers=self.auth)
+
+    def get(self, path, data=None):
+        return AsyncClient().get(path, data, headers=self.auth)
+
+    async def test_async_list_matches_the_sync_viewset(self):
+        response = await self.get("/api/books/", {"ordering": "title"})
+
+        with self.settings(ROOT_URLCONF="booknest.urls"):
+            expected = await sync_to_async(self.sync_client.get)(
+                "/api/books/", {"ordering": "title"}
+            )
+        self.assertEqual(response.status_code, 200)
+        # Rendered by core/async_views.py, not by a DRF view
+        self.assertNotIsInstance(response, Response)
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_my_requests_matches_the_sync_viewset(self):
+        other = await User.objects.acreate(username="owner")
+        book = await Book.objects.acreate(owner=other, title="Emma", available_for="rent")
+        await Book.objects.filter(pk=book.pk).aupdate(cover="book_covers/emma.jpg")
+        await BookRequest.objects.acreate(book=book, requester=self.user, request_type="rent")
+
+        response = await self.get("/api/bookrequests/my/")
+        with self.settings(ROOT_URLCONF="booknest.urls"):
+            expected = await sync_to_async(self.sync_client.get)("/api/bookrequests/my/")
+
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.json()["results"][0]["book_cover"], "/media/book_covers/emma.jpg")
+
+    async def test_fuzzy_search_backend_may_query_while_building(self):
+        class QueryingBackend(SimpleSearchBackend):
+            # Like TrigramSearchBackend.set_thresholds: the DB is hit in search()
+            def search(self, queryset, query):
+                Book.objects.exists()
+                return super().search(queryset, query)
+
+        with mock.patch("core.async_views.get_search_backend", QueryingBackend):
+            response = await self.get("/api/books/fuzzy-search/", {"q": "dune"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["title"] for row in response.json()["results"]], ["Dune"])
+
+    async def test_my_requests_requires_a_token(self):
+        response = await AsyncClient().get("/api/bookrequests/my/")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    async def test_notifications_long_poll_returns_newer_rows(self):
+        first = await Notification.objects.acreate(user=self.user, message="old")
+
+        timed_out = await self.get(
+            "/api/notifications/", {"since": first.pk, "wait": "0.05"}
+        )
+        self.assertEqual(timed_out.json()["results"], [])
+
+        await Notification.objects.acreate(user=self.user, message="new")
+        response = await self.get(
+            "/api/notifications/", {"since": first.pk, "wait": "5"}
+        )
+        self.assertEqual([n["message"] for n in response.json()["results"]], ["new"])
+
+
+@override_settings(NOTIFICATION_STREAM={"BACKEND": "local", "KEEPALIVE": 0.05})
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def notify(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, message=message)
+
+    async def next_event(self, stream):
+        while (chunk := await anext(stream)) == b": keepalive\n\n":
+            pass
+        return chunk.decode()
+
+    async def test_replays_after_last_event_id_then_pushes_new_rows(self):
+        seen = await Notification.objects.acreate(user=self.user, message="seen")
+        await Notification.objects.acreate(user=self.user, message="missed")
+
+        response = await AsyncClient().get(
+            "/api/notifications/stream/",
+            headers={**self.auth, "Last-Event-ID": str(seen.pk)},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+
+        self.assertEqual(await self.next_event(stream), "retry: 3000\n\n")
+        self.assertIn('"message": "missed"', await self.next_event(stream))
+
+        await sync_to_async(self.notify)("live")
+        event = await self.next_event(stream)
+        self.assertIn("event: notification", event)
+        self.assertIn('"message": "live"', event)
+        await stream.aclose()
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get("/api/notifications/stream/")
+
+        self.assertEqual(response.status_code, 401)
+
+
+class CoverRenditionTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+        self.owner = User.objects.create_user(username="owner")
+        self.book = Book.objects.create(
+            owner=self.owner, title="Dune", author="Herbert", cover=self.upload("red")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def upload(self, color):
+        buffer = BytesIO()
+        Image.new("RGB", (300, 400), color).save(buffer, "PNG")
+        return SimpleUploadedFile("dune.png", buffer.getvalue(), content_type="image/png")
+
+    def refresh(self):
+        changed = refresh_renditions(Book, self.book.pk, "cover", "cover_renditions")
+        self.book.refresh_from_db()
+        return changed
+
+    def files(self):
+        renditions = self.book.cover_renditions
+        return [name for size, files in renditions.items() if size != "source" for name in files.values()]
+
+    def test_rebuild_swaps_in_new_files_then_deletes_the_old_ones(self):
+        self.assertTrue(self.refresh())
+        old = self.files()
+        self.assertTrue(all(default_storage.exists(name) for name in old))
+
+        self.book.cover = self.upload("blue")
+        self.book.save()
+        self.assertTrue(self.refresh())
+
+        self.assertEqual(self.book.cover_renditions["source"], self.book.cover.name)
+        self.assertTrue(all(default_storage.exists(name) for name in self.files()))
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertFalse(self.refresh())
+
+    def test_failed_build_keeps_the_current_set(self):
+        self.refresh()
+        current = self.book.cover_renditions
+        self.book.cover = self.upload("blue")
+        self.book.save()
+
+        real_resize, calls = images.resize, []
+
+        def flaky_resize(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return real_resize(*args)
+
+        with mock.patch("core.images.resize", flaky_resize):
+            with self.assertRaises(OSError):
+                self.refresh()
+
+        self.assertEqual(self.book.cover_renditions, current)
+        self.assertTrue(all(default_storage.exists(name) for name in self.files()))
+        _, written = default_storage.listdir(
+            posixpath.dirname(images.rendition_name(self.book.cover.name, "thumb", "webp"))
+        )
+        self.assertEqual(written, [])
+
+    def test_renditions_of_a_replaced_cover_are_hidden(self):
+        self.refresh()
+        self.book.cover = self.upload("blue")
+        self.book.save()
+
+        for fast in (True, False):
+            with self.settings(FAST_LIST={"ENABLED": fast}):
+                listed = self.client.get("/api/books/my/").json()["results"][0]
+                self.assertEqual(listed["cover_renditions"], {})
+        detail = self.client.get(f"/api/books/{self.book.pk}/").json()
+        self.assertEqual(detail["cover_renditions"], {})
+
+        self.refresh()
+        detail = self.client.get(f"/api/books/{self.book.pk}/").json()
+        self.assertEqual(set(detail["cover_renditions"]), {"thumb", "card", "full"})
@@ -0,0 +1,183 @@
+"""
+BULK STATUS CHANGES (POST /api/bookrequests/bulk-status/):
+
+    {"transitions": [{"id": 12, "status": "approved"},
+                     {"id": 13, "status": "rejected"}, ...]}
+
+Every transition runs in one database transaction, under the rules of
+PATCH /api/bookrequests/{id}/: only pending requests change, the book
+owner approves or rejects, the requester cancels.
+
+Locking (select_for_update(skip_locked=True) on PostgreSQL):
+    - the requests are locked first, then the books being approved and
+      the books offered in exchange for them, both in id order
+    - a row held by another transaction is skipped rather than waited on
+      and reported as "locked", so the caller can retry it
+    - the book lock serializes approvals of a book. Approving one request
+      rejects the book's other pending requests in the same transaction
+      ("auto_rejected"), and a book already handed over refuses approval
+      ("unavailable")
+
+The per-request signal side effects are batched: one UPDATE per status,
+one badge update per group of owners, one cache invalidation. Approvals
+create their Transaction inside the same transaction (core.tasks
+.apply_approval), so the book lock covers the hand-over as well.
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .badges import adjust_badges_per_user
+from .cache import invalidate
+from .models import BadgeCounter, Book, BookRequest
+from .tasks import apply_approval
+
+
+DEFAULTS = {
+    "MAX_TRANSITIONS": 200,
+}
+
+
+def bulk_status_settings():
+    return {**DEFAULTS, **getattr(settings, "BULK_REQUEST_STATUS", {})}
+
+
+def _lock(queryset):
+    return queryset.select_for_update(skip_locked=True, of=("self",)).order_by("pk")
+
+
+def apply_transitions(user, transitions):
+    """
+    Apply `transitions` ({request_id: new status}) as `user`. Returns
+    {"updated": [...], "auto_rejected": [ids], "skipped": [{"id", "reason"}]}.
+    """
+    skipped = []
+    changes = {}
+
+    with transaction.atomic():
+        requests = {
+            instance.pk: instance
+            for instance in _lock(
+                BookRequest.objects.select_related("book", "requester").filter(
+                    pk__in=transitions
+                )
+            )
+        }
+        missing = set(transitions) - requests.keys()
+        existing = set(
+            BookRequest.objects.filter(pk__in=missing).values_list("pk", flat=True)
+        )
+
+        for request_id, new_status in sorted(transitions.items()):
+            instance = requests.get(request_id)
+            if instance is None:
+                reason = "locked" if request_id in existing else "not_found"
+            elif instance.status != "pending":
+                reason = "not_pending"
+            elif new_status == "cancelled":
+                reason = None if instance.requester_id == user.pk else "forbidden"
+            else:
+                reason = None if instance.book.owner_id == user.pk else "forbidden"
+
+            if reason:
+                skipped.append({"id": request_id, "reason": reason})
+            else:
+                changes[request_id] = new_status
+
+        # ----------------------------------------------------
+        # Approvals: one per book, under the book's lock
+        # ----------------------------------------------------
+        approvals = defaultdict(list)
+        for request_id, new_status in sorted(changes.items()):
+            if new_status == "approved":
+                approvals[requests[request_id].book_id].append(requests[request_id])
+
+        # An exchange approval hands the offered book over as well
+        exchange_ids = {
+            instances[0].exchange_book_id for instances in approvals.values()
+        } - {None}
+        books = {
+            book.pk: book
+            for book in _lock(
+                Book.objects.select_related("owner").filter(
+                    pk__in=approvals.keys() | exchange_ids
+                )
+            )
+        }
+        approved = []
+        for book_id, instances in approvals.items():
+            book = books.get(book_id)
+            exchange_id = instances[0].exchange_book_id
+            if book is None or (exchange_id is not None and exchange_id not in books):
+                reason = "locked"
+            elif book.owner_id != user.pk:
+                reason = "forbidden"
+            elif book.available_for == "none":
+                reason = "unavailable"
+            else:
+                reason = None
+
+            if reason:
+                for instance in instances:
+                    skipped.append({"id": instance.pk, "reason": reason})
+                    del changes[instance.pk]
+                continue
+
+            # The lowest id wins; the others are rejected with the competitors
+            winner = instances[0]
+            winner.book = book
+            if exchange_id is not None:
+                winner.exchange_book = books[exchange_id]
+            approved.append(winner)
+
+        # Pending requests locked elsewhere stay pending; approving them
+        # later fails, as their book is no longer available
+        competing = _lock(
+            BookRequest.objects.filter(
+                book_id__in=[instance.book_id for instance in approved], status="pending"
+            ).exclude(pk__in=[instance.pk for instance in approved])
+        ).values_list("pk", flat=True)
+        for request_id in competing:
+            changes[request_id] = "rejected"
+
+        # ----------------------------------------------------
+        # Batched writes and side effects
+        # ----------------------------------------------------
+        by_status = defaultdict(list)
+        for request_id, new_status in changes.items():
+            by_status[new_status].append(request_id)
+        for new_status, request_ids in by_status.items():
+            BookRequest.objects.filter(pk__in=request_ids).update(status=new_status)
+
+        # Every changed request was pending. Only cancellations can belong
+        # to another owner's book.
+        owners = Counter(requests[pk].book.owner_id for pk in by_status["cancelled"])
+        owners[user.pk] += len(by_status["approved"]) + len(by_status["rejected"])
+        adjust_badges_per_user(
+            BadgeCounter,
+            "pending_requests",
+            {owner_id: -count for owner_id, count in owners.items()},
+        )
+
+        for instance in approved:
+            instance.status = "approved"
+            apply_approval(instance)
+
+        if changes:
+            transaction.on_commit(lambda: invalidate("books"))
+
+    return {
+        "updated": [
+            {"id": request_id, "status": new_status}
+            for request_id, new_status in sorted(changes.items())
+            if transitions.get(request_id) == new_status
+        ],
+        "auto_rejected": sorted(
+            request_id
+            for request_id, new_status in changes.items()
+            if transitions.get(request_id) != new_status
+        ),
+        "skipped": skipped,
+    }
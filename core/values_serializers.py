@@ -0,0 +1,247 @@
+"""
+VALUES SERIALIZERS (read-only fast path for list actions):
+
+A ModelSerializer builds a model instance per row, walks `source=` paths
+attribute by attribute and calls a bound field for every value. For
+100-row pages that costs more than the SQL itself.
+
+A ValuesSerializer mirrors one ModelSerializer (`serializer_class`):
+
+    - the queryset is narrowed to `.values(<only the needed columns>)`,
+      "book.owner.username" becoming the join "book__owner__username"
+    - once per request every field is compiled into a row accessor:
+      a plain itemgetter when DRF would return the value unchanged,
+      the DRF field's own to_representation() otherwise
+    - SerializerMethodFields are reimplemented as get_<name>(row) over the
+      columns listed in `computed`
+
+The output is identical to the ModelSerializer's (see the parity tests).
+ViewSets opt in per action with ValuesListMixin.values_actions;
+settings.FAST_LIST["ENABLED"] switches the fast path off globally.
+"""
+
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import FileField
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .images import rendition_urls
+from .models import Book, BookRequest
+from .pagination import KeysetPagination
+from .serializers import (
+    BookRequestSerializer,
+    BookSerializer,
+    NearbyBookSerializer,
+    average_rating,
+)
+
+
+DEFAULTS = {
+    "ENABLED": True,
+}
+
+# DRF fields whose to_representation() returns database values unchanged
+PASSTHROUGH = (
+    serializers.ReadOnlyField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+)
+
+
+def fast_list_settings():
+    return {**DEFAULTS, **getattr(settings, "FAST_LIST", {})}
+
+
+def resolve_source(model, source):
+    """("book__owner__username", <model field>) for source "book.owner.username"."""
+    field = None
+    for part in source.split("."):
+        field = model._meta.pk if part == "pk" else model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return source.replace(".", "__"), field
+
+
+def values_serializer_for(serializer_class, context=None):
+    """The ValuesSerializer mirroring `serializer_class`, or None."""
+    if not fast_list_settings()["ENABLED"]:
+        return None
+    values_class = ValuesSerializer.registry.get(serializer_class)
+    return values_class(context) if values_class else None
+
+
+class ValuesSerializer:
+    serializer_class = None
+    # SerializerMethodField name -> columns its get_<name>(row) reads
+    computed = {}
+
+    registry = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.serializer_class is not None:
+            ValuesSerializer.registry[cls.serializer_class] = cls
+
+    def __init__(self, context=None):
+        self.context = {} if context is None else context
+        self.columns, self.plan = self.compile()
+
+    def compile(self):
+        serializer = self.serializer_class(context=self.context)
+        model = serializer.Meta.model
+        columns, plan = {}, []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in self.computed:
+                    raise ImproperlyConfigured(
+                        f"{type(self).__name__}.computed has no columns for '{name}'."
+                    )
+                columns.update(dict.fromkeys(self.computed[name]))
+                plan.append((name, getattr(self, f"get_{name}")))
+                continue
+
+            column, model_field = resolve_source(model, field.source)
+            columns[column] = None
+            plan.append((name, self.accessor(column, field, model_field)))
+
+        return list(columns), plan
+
+    def accessor(self, column, field, model_field):
+        if type(field) in PASSTHROUGH or (
+            type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None
+        ):
+            return itemgetter(column)
+
+        convert = field.to_representation
+        if isinstance(model_field, FileField):
+            # values() gives the file name; DRF expects the FieldFile
+            def convert(name, attr_class=model_field.attr_class, model_field=model_field):
+                return field.to_representation(attr_class(None, model_field, name))
+
+        def get(row):
+            value = row[column]
+            return None if value is None else convert(value)
+
+        return get
+
+    # ---------------------------------------------------
+    # Public API
+    # ---------------------------------------------------
+    def prepare(self, queryset, extra=()):
+        """`extra`: columns other code reads from the rows; never rendered."""
+        return queryset.values(*dict.fromkeys([*self.columns, *extra]))
+
+    def to_representation(self, row):
+        return {name: get(row) for name, get in self.plan}
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+# ------------------------------------------------------------
+# Serializers
+# ------------------------------------------------------------
+class BookValuesSerializer(ValuesSerializer):
+    serializer_class = BookSerializer
+    computed = {
+        "avg_rating": ("rating_sum", "rating_count"),
+        "request_count": ("request_count",),
+        "cover_renditions": ("cover_renditions", "cover"),
+    }
+    storage = Book._meta.get_field("cover").storage
+
+    def get_avg_rating(self, row):
+        return average_rating(row["rating_sum"], row["rating_count"])
+
+    def get_request_count(self, row):
+        return row["request_count"]
+
+    def get_cover_renditions(self, row):
+        return rendition_urls(
+            row["cover_renditions"], row["cover"], self.storage, self.context.get("request")
+        )
+
+
+class NearbyBookValuesSerializer(BookValuesSerializer):
+    serializer_class = NearbyBookSerializer
+    computed = {**BookValuesSerializer.computed, "distance_km": ("distance_km",)}
+
+    def get_distance_km(self, row):
+        return round(row["distance_km"], 3)
+
+
+class BookRequestValuesSerializer(ValuesSerializer):
+    serializer_class = BookRequestSerializer
+    computed = {
+        "book_cover_renditions": ("book__cover_renditions", "book__cover"),
+    }
+    storage = BookRequest._meta.get_field("book").related_model._meta.get_field("cover").storage
+
+    def get_book_cover_renditions(self, row):
+        return rendition_urls(
+            row["book__cover_renditions"],
+            row["book__cover"],
+            self.storage,
+            self.context.get("request"),
+        )
+
+
+# ------------------------------------------------------------
+# ViewSet mixin
+# ------------------------------------------------------------
+class ValuesListMixin:
+    """
+    Serves `values_actions` through the ValuesSerializer registered for the
+    serializer class, when there is one. Custom list-style actions call
+    list_response() instead of paginating / serializing by hand.
+    """
+
+    values_actions = ("list",)
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.values_actions:
+            return super().list(request, *args, **kwargs)
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def pagination_columns(self, queryset):
+        """Columns a keyset cursor reads from each row, even under ?fields=."""
+        if self.paginator is None:
+            return ()
+        field = getattr(self, "keyset_field", KeysetPagination.keyset_field)
+        names = {f.name for f in queryset.model._meta.concrete_fields}
+        return tuple(name for name in ("id", field) if name in names)
+
+    def get_values_serializer(self, serializer_class, context):
+        if self.action not in self.values_actions:
+            return None
+        return values_serializer_for(serializer_class, context)
+
+    def list_response(self, queryset, serializer_class=None, context=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        context = self.get_serializer_context() if context is None else context
+
+        fast = self.get_values_serializer(serializer_class, context)
+        if fast is not None:
+            queryset = fast.prepare(queryset, self.pagination_columns(queryset))
+
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        if fast is not None:
+            data = fast.serialize(rows)
+        else:
+            data = serializer_class(rows, many=True, context=context).data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
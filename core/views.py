@@ -1,29 +1,53 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
     IsAuthenticated,
     IsAdminUser,
 )
-from django.db import models
-from django.db.models import Avg, Count
+from django.db import models, transaction
 from django_filters.rest_framework import DjangoFilterBackend
-from django.contrib.postgres.search import TrigramSimilarity
-from .models import Announcement, Book, Feedback, Notification, Report, Wishlist
+from .models import (
+    Announcement,
+    BadgeCounter,
+    Book,
+    ExchangeCycle,
+    ExchangeLeg,
+    Feedback,
+    Notification,
+    Report,
+    Wishlist,
+)
 from .serializers import (
     AnnouncementSerializer,
     BookRequestSerializer,
+    BulkStatusSerializer,
     BookSerializer,
+    ExchangeCycleSerializer,
     FeedbackSerializer,
+    NearbyBookSerializer,
     NotificationSerializer,
     ReportSerializer,
+    SimilarBookSerializer,
     WishlistSerializer,
 )
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from .models import Book, BookRequest, Transaction
 from .serializers import BookSerializer, TransactionSerializer
+from .search import FullTextSearchFilter, get_search_backend
+from .geo import nearby
+from .cache import CachedResponseMixin
+from .transitions import apply_transitions, bulk_status_settings
+from .values_serializers import ValuesListMixin
+from .fieldsets import SparseFieldsetMixin
+from .importers import FORMATS, detect_format, import_books, iter_rows
+from .badges import BADGE_FIELDS, adjust_badges
+from .metrics import as_json, as_prometheus, metrics_settings, registry
+from . import dbpool, scheduler
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -33,16 +57,36 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.owner == request.user
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class HasMetricsAccess(permissions.BasePermission):
+    """Staff users, or scrapers sending X-Metrics-Token: <REQUEST_METRICS["TOKEN"]>."""
+
+    def has_permission(self, request, view):
+        token = metrics_settings()["TOKEN"]
+        sent = request.META.get("HTTP_X_METRICS_TOKEN", "")
+        if token and sent and constant_time_compare(token, sent):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class BookViewSet(
+    CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = Book.objects.all().order_by("-created_at")
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     parser_classes = (MultiPartParser, FormParser)
 
+    # Anonymous list/retrieve responses are cached (core/cache.py)
+    cache_namespace = "books"
+    # Serialized from .values() rows (core/values_serializers.py);
+    # ?fields= / ?exclude= narrow both (core/fieldsets.py)
+    values_actions = ("list", "nearby", "my_books")
+
     # Filtering, searching, ordering
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        # tsvector + GIN on Postgres, DRF's SearchFilter elsewhere (core/search.py)
+        FullTextSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["owner__id", "available_for", "author", "genre"]
@@ -50,14 +94,9 @@ class BookViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at", "title", "author", "genre"]
 
     def get_queryset(self):
-        return (
-            Book.objects.select_related("owner")  # FK
-            .prefetch_related("feedbacks", "requests")  # reverse lookups
-            .annotate(
-                avg_rating=Avg("feedbacks__rating"), request_count=Count("requests")
-            )
-            .order_by("-created_at")
-        )
+        # avg_rating / request_count come from denormalized Book columns,
+        # so listing needs no joins on feedbacks or requests.
+        return Book.objects.select_related("owner").order_by("-created_at")
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -71,14 +110,8 @@ class BookViewSet(viewsets.ModelViewSet):
         if not query:
             return Response({"detail": "Missing query parameter ?q="}, status=400)
 
-        books = (
-            Book.objects.annotate(
-                similarity=TrigramSimilarity("title", query)
-                + TrigramSimilarity("author", query)
-                + TrigramSimilarity("description", query)
-            )
-            .filter(similarity__gt=0.1)
-            .order_by("-similarity")
+        books = get_search_backend().search(
+            Book.objects.select_related("owner"), query
         )
 
         page = self.paginate_queryset(books)
@@ -89,6 +122,99 @@ class BookViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(books, many=True)
         return Response(serializer.data)
 
+    # ---------------------------------------------------
+    # Bulk import: /api/books/bulk-import/
+    # Body is a CSV or NDJSON stream (Content-Type text/csv or
+    # application/x-ndjson), or a multipart upload in the "file" field.
+    # ---------------------------------------------------
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="bulk-import",
+    )
+    def bulk_import(self, request):
+        content_type = request.content_type or ""
+
+        if content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response({"detail": "Missing multipart field 'file'."}, status=400)
+            stream = upload
+            fmt = request.query_params.get("type") or detect_format(
+                upload.content_type, upload.name
+            )
+        else:
+            # Read the raw body line by line; never load it into request.data
+            stream = request.stream
+            fmt = request.query_params.get("type") or detect_format(content_type)
+
+        if fmt not in FORMATS or stream is None:
+            return Response(
+                {"detail": "Send CSV (text/csv) or NDJSON (application/x-ndjson)."},
+                status=400,
+            )
+
+        batch_size = request.query_params.get("batch_size")
+        result = import_books(
+            iter_rows(stream, fmt),
+            owner=request.user,
+            batch_size=int(batch_size) if batch_size and batch_size.isdigit() else None,
+        )
+        return Response(result, status=200)
+
+    # ---------------------------------------------------
+    # Books near me: /api/books/nearby/?lat=&lng=&radius_km=
+    # ---------------------------------------------------
+    nearby_default_radius_km = 10
+    nearby_max_radius_km = 200
+
+    @action(detail=False, methods=["get"], url_path="nearby")
+    def nearby(self, request):
+        try:
+            lat = float(request.query_params["lat"])
+            lng = float(request.query_params["lng"])
+            radius_km = float(
+                request.query_params.get("radius_km", self.nearby_default_radius_km)
+            )
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Query parameters ?lat= and ?lng= (numbers) are required."},
+                status=400,
+            )
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return Response({"detail": "lat/lng out of range."}, status=400)
+        if not 0 < radius_km <= self.nearby_max_radius_km:
+            return Response(
+                {"detail": f"radius_km must be between 0 and {self.nearby_max_radius_km}."},
+                status=400,
+            )
+
+        books = nearby(Book.objects.select_related("owner"), lat, lng, radius_km)
+        return self.list_response(books, NearbyBookSerializer)
+
+    # ---------------------------------------------------
+    # Readers also liked: /api/books/{id}/similar/
+    # Neighbours are precomputed (core/recommendations.py); this is one
+    # indexed read of at most TOP_K rows, so it is not paginated.
+    # ---------------------------------------------------
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        if not str(pk).isdigit():
+            return Response({"detail": "Not found."}, status=404)
+
+        books = (
+            Book.objects.filter(similar_to__book_id=pk)
+            .select_related("owner")
+            .annotate(score=models.F("similar_to__score"))
+            .order_by("similar_to__rank")
+        )
+        serializer = SimilarBookSerializer(
+            books, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
     # ---------------------------------------------------
     # My books endpoint(for flutter interface)
     # ---------------------------------------------------
@@ -103,15 +229,9 @@ class BookViewSet(viewsets.ModelViewSet):
         qs = Book.objects.filter(owner=user).order_by("-created_at")
 
         # Apply performance optimization
-        qs = qs.select_related("owner").prefetch_related("feedbacks", "requests")
+        qs = qs.select_related("owner")
 
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+        return self.list_response(qs)
 
     # ---------------------------------------------------
     # My requests endpoint(for flutter interface)
@@ -142,10 +262,11 @@ class BookViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BookRequestViewSet(viewsets.ModelViewSet):
+class BookRequestViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = BookRequest.objects.all().order_by("-created_at")
     serializer_class = BookRequestSerializer
     permission_classes = [IsAuthenticated]
+    values_actions = ("list", "my_requests")
 
     def get_queryset(self):
         # Add select_related for performance
@@ -180,13 +301,28 @@ class BookRequestViewSet(viewsets.ModelViewSet):
             .order_by("-created_at")
         )
 
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = BookRequestSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        # No serializer context: book_cover stays a relative URL here
+        return self.list_response(qs, BookRequestSerializer, context={})
 
-        serializer = BookRequestSerializer(qs, many=True)
-        return Response(serializer.data)
+    # ----------------------------------------------------
+    # Custom endpoint: /api/bookrequests/bulk-status/
+    # ----------------------------------------------------
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="bulk-status",
+    )
+    def bulk_status(self, request):
+        serializer = BulkStatusSerializer(
+            data=request.data,
+            context={"max_transitions": bulk_status_settings()["MAX_TRANSITIONS"]},
+        )
+        serializer.is_valid(raise_exception=True)
+        transitions = {
+            item["id"]: item["status"] for item in serializer.validated_data["transitions"]
+        }
+        return Response(apply_transitions(request.user, transitions))
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -325,9 +461,10 @@ class ReportViewSet(viewsets.ModelViewSet):
         return Report.objects.filter(reporter=user)
 
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Announcement.objects.filter(is_active=True).order_by("-created_at")
     serializer_class = AnnouncementSerializer
+    cache_namespace = "announcements"
 
     def get_permissions(self):
         # admins can CRUD, users can only read
@@ -344,6 +481,80 @@ class NotificationViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by(
+        queryset = Notification.objects.filter(user=self.request.user).order_by(
             "-created_at"
         )
+        # ?since=<id>: only newer notifications (long-polling clients,
+        # see core/async_views.py)
+        since = self.request.query_params.get("since")
+        if self.action == "list" and since and since.isdigit():
+            queryset = queryset.filter(pk__gt=int(since))
+        return queryset
+
+    # ----------------------------------------------------
+    # POST /api/notifications/mark-all-read/
+    # ----------------------------------------------------
+    @action(detail=False, methods=["post"], url_path="mark-all-read")
+    def mark_all_read(self, request):
+        # One UPDATE; .update() skips post_save, so fix the badge here
+        with transaction.atomic():
+            marked = Notification.objects.filter(
+                user=request.user, is_read=False
+            ).update(is_read=True)
+            adjust_badges(BadgeCounter, [request.user.pk], unread_notifications=-marked)
+        return Response({"marked_read": marked})
+
+
+# ------------------------------------------------------------
+# GET /api/badges/  (counters kept by core/badges.py)
+# ------------------------------------------------------------
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def badges(request):
+    counts = BadgeCounter.objects.filter(user=request.user).values(*BADGE_FIELDS).first()
+    return Response(counts or dict.fromkeys(BADGE_FIELDS, 0))
+
+
+# ------------------------------------------------------------
+# GET /api/exchanges/suggestions/  (cycles found by core/exchanges.py)
+# Each cycle lists who hands which book to whom; shortest cycles first.
+# ------------------------------------------------------------
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def exchange_suggestions(request):
+    cycles = (
+        ExchangeCycle.objects.filter(legs__receiver=request.user)
+        .prefetch_related(
+            models.Prefetch(
+                "legs",
+                queryset=ExchangeLeg.objects.select_related("giver", "receiver", "book"),
+            )
+        )
+        .order_by("size", "-created_at")
+    )
+    # A deleted book takes its leg with it until the next match run
+    complete = [cycle for cycle in cycles if len(cycle.legs.all()) == cycle.size]
+    return Response(ExchangeCycleSerializer(complete, many=True).data)
+
+
+# ------------------------------------------------------------
+# GET /api/metrics/  (?output=prometheus for the text format)
+# ------------------------------------------------------------
+@api_view(["GET"])
+@permission_classes([HasMetricsAccess])
+def metrics(request):
+    database = dbpool.connection_stats()
+    sweeps = scheduler.sweep_stats()
+    if request.query_params.get("output") == "prometheus":
+        return HttpResponse(
+            as_prometheus(registry.lifetime_snapshot())
+            + dbpool.as_prometheus(database)
+            + scheduler.as_prometheus(sweeps),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+    return Response({
+        "window_seconds": metrics_settings()["WINDOW_SECONDS"],
+        "views": as_json(registry.snapshot()),
+        "database": database,
+        "sweeps": sweeps,
+    })